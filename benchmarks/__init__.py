@@ -0,0 +1,11 @@
+"""
+Headless benchmarks for the load, save, render and edit hot paths.
+
+    python -m benchmarks                      # run, compare with benchmarks/baseline.json
+    python -m benchmarks --save-baseline      # run and store the results as the new baseline
+    python -m benchmarks --sizes 1000 50000 -o results.json
+    python -m benchmarks.compression          # file size against time, per compression level
+
+Baselines are machine specific: store one per machine (or CI runner)
+before comparing against it.
+"""
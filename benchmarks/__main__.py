@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# Must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Returns the (key, baseline, current) entries slower than the tolerance"""
+    regressions = []
+    for key, seconds in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            print(f"new         {key:<40} {seconds * 1000:10.2f} ms")
+            continue
+
+        ratio = seconds / base if base else float("inf")
+        slower = ratio > 1 + tolerance and seconds - base > min_delta
+        label = "REGRESSION" if slower else ("faster" if ratio < 1 - tolerance else "ok")
+        print(f"{label:<11} {key:<40} {base * 1000:10.2f} -> {seconds * 1000:10.2f} ms ({ratio:5.2f}x)")
+        if slower:
+            regressions.append((key, base, seconds))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time the editor hot paths on synthetic scenes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Numbers of shapes per scene")
+    parser.add_argument("--variants", nargs="+", choices=["flat", "nested"], default=["flat", "nested"])
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Rounds per scene, the best is kept")
+    parser.add_argument("-o", "--output", help="Write the results as JSON")
+    parser.add_argument("-b", "--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--min-delta", type=float, default=0.002,
+                        help="Slowdowns under this many seconds are noise")
+    args = parser.parse_args(argv)
+
+    from PySide6 import __version__ as pyside_version
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    from src.app import VectorEditorWindow
+    from benchmarks.scenes import make_project
+    from benchmarks.cases import run
+
+    window = VectorEditorWindow()
+    results = {}
+    for variant in args.variants:
+        for size in args.sizes:
+            project = make_project(size, nested=(variant == "nested"))
+            start = time.perf_counter()
+            for case, seconds in run(window, project, args.repeat).items():
+                results[f"{case}/{variant}/{size}"] = seconds
+            print(f"{variant}/{size}: {time.perf_counter() - start:.2f}s")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pyside": pyside_version,
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "repeat": args.repeat,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        for key, seconds in sorted(results.items()):
+            print(f"{key:<40} {seconds * 1000:10.2f} ms")
+        print(f"No baseline at {args.baseline}, run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print(f"FAILED: {len(regressions)} regression(s) over {args.tolerance:.0%}")
+        return 1
+
+    print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
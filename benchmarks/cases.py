@@ -0,0 +1,127 @@
+"""
+One benchmark round over a synthetic project.
+
+Every round rebuilds the scene and runs the cases in order, the edit
+cases undo what they did, so rounds can be repeated on the same window.
+"""
+import os
+import tempfile
+import time
+
+from src.logic.compression import Compression
+from src.logic.document import DocumentModel
+from src.logic.factory import ShapeFactory
+from src.logic.io_manager import FileManager
+from src.logic.strategies import JsonSaveStrategy, BinarySaveStrategy, ImageSaveStrategy, SvgSaveStrategy
+from src.logic.symbols import SYMBOLS
+from src.logic.render_cache import RENDER_CACHE
+
+CASES = [
+    "from_dict",
+    "document_build",
+    "json_save",
+    "json_load",
+    "gzip_save",
+    "gzip_load",
+    "binary_save",
+    "binary_document_load",
+    "lazy_from_dict",
+    "document_json_save",
+    "image_save",
+    "svg_save",
+    "panel_selection",
+    "group_selection",
+    "make_symbol",
+    "ungroup_selection",
+    "bulk_delete",
+    "undo",
+    "redo",
+]
+
+class Timer:
+    def __init__(self, results: dict):
+        self.results = results
+
+    def __call__(self, case: str, func, *args):
+        start = time.perf_counter()
+        value = func(*args)
+        self.results[case] = time.perf_counter() - start
+        return value
+
+def select_top_level(scene):
+    """Selects every top-level shape with a single selectionChanged"""
+    blocked = scene.blockSignals(True)
+    try:
+        for item in scene.items():
+            if hasattr(item, "to_dict") and item.parent_group is None:
+                item.setSelected(True)
+    finally:
+        scene.blockSignals(blocked)
+
+def run_round(window, project: dict, workdir: str) -> dict:
+    """Returns {case: seconds} for one round"""
+    canvas = window.canvas
+    scene = canvas.scene
+    stack = canvas.undo_stack
+    results = {}
+    timed = Timer(results)
+
+    # Load
+    items = timed("from_dict", lambda: [ShapeFactory.from_dict(data) for data in project["shapes"]])
+    scene.setSceneRect(0, 0, project["scene"]["width"], project["scene"]["height"])
+    for item in items:
+        scene.addItem(item)
+    # Items added outside the undo stack, as the loader does
+    timed("document_build", canvas.sync_document)
+
+    # Save, from the scene and from the document model
+    timed("json_save", JsonSaveStrategy().save, os.path.join(workdir, "bench.json"), scene)
+    # Saved groups carry their bounds: reloading them builds placeholders only
+    saved = timed("json_load", FileManager.load_project, os.path.join(workdir, "bench.json"))
+    compressed = JsonSaveStrategy(compression=Compression.GZIP)
+    timed("gzip_save", compressed.save, os.path.join(workdir, "bench.json.gz"), scene)
+    timed("gzip_load", FileManager.load_project, os.path.join(workdir, "bench.json.gz"))
+    timed("binary_save", BinarySaveStrategy().save, os.path.join(workdir, "bench.vecb"), scene)
+    # Read as columns: no dictionary per shape
+    timed("binary_document_load", DocumentModel.load, os.path.join(workdir, "bench.vecb"))
+    timed("lazy_from_dict", lambda: [ShapeFactory.from_dict(data) for data in saved["shapes"]])
+    timed("document_json_save", lambda: JsonSaveStrategy().write(
+        os.path.join(workdir, "bench_document.json"), canvas.document.to_data()))
+    timed("image_save", ImageSaveStrategy(fmt="PNG", bg_color="white").save,
+          os.path.join(workdir, "bench.png"), scene)
+    timed("svg_save", SvgSaveStrategy(bg_color="white").save, os.path.join(workdir, "bench.svg"), scene)
+
+    # Selection, as the properties panel sees it: the signal only starts the
+    # tracker's frame timer, the flush runs the refresh it schedules
+    select_top_level(scene)
+    def panel_selection():
+        scene.selectionChanged.emit()
+        window.props_panel.selection.flush()
+    timed("panel_selection", panel_selection)
+
+    # Edit
+    timed("group_selection", canvas.group_selection)
+    # The group becomes one symbol instance, undo brings it back selected
+    timed("make_symbol", canvas.make_symbol_selection)
+    stack.undo()
+    timed("ungroup_selection", canvas.ungroup_selection)
+
+    select_top_level(scene)
+    timed("bulk_delete", canvas.delete_selection)
+    timed("undo", stack.undo)
+    timed("redo", stack.redo)
+
+    stack.clear()
+    RENDER_CACHE.clear()
+    scene.clear()
+    SYMBOLS.clear()
+    return results
+
+def run(window, project: dict, repeat: int) -> dict:
+    """Best time of `repeat` rounds for every case"""
+    best = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(repeat):
+            for case, seconds in run_round(window, project, workdir).items():
+                best[case] = min(seconds, best.get(case, seconds))
+    return best
@@ -0,0 +1,80 @@
+"""
+Size against save and load time for the compressed project containers.
+
+    python -m benchmarks.compression
+    python -m benchmarks.compression --sizes 10000 100000 --precision 2 -o compression.json
+
+The same synthetic project is written with FileManager.save_project_json
+for every method and level, then read back with FileManager.load_project.
+Only file I/O is timed, no scene is built.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.scenes import make_project
+from src.logic.compression import Compression
+from src.logic.io_manager import FileManager
+
+# (method, level) pairs, None is the codec's default
+SETTINGS = [
+    (Compression.NONE, None),
+    (Compression.GZIP, 1),
+    (Compression.GZIP, 6),
+    (Compression.GZIP, 9),
+    (Compression.LZMA, 0),
+    (Compression.LZMA, 3),
+    (Compression.LZMA, 6),
+    (Compression.LZMA, 9),
+]
+
+def measure(project: dict, filename: str, method: str, level, precision, repeat: int) -> dict:
+    """Best save and load times of `repeat` runs, and the file size"""
+    save = load = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        FileManager.save_project_json(filename, project, precision, method, level)
+        save = min(save, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        FileManager.load_project(filename)
+        load = min(load, time.perf_counter() - start)
+    return {"bytes": os.path.getsize(filename), "save": save, "load": load}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compression",
+                                     description="Compare project file sizes and times per compression level.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000], help="Numbers of shapes per project")
+    parser.add_argument("--nested", action="store_true", help="Wrap the shapes in nested groups")
+    parser.add_argument("-p", "--precision", type=int, help="Decimals kept on coordinates (default: exact)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per setting, the best is kept")
+    parser.add_argument("-o", "--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            project = make_project(size, nested=args.nested)
+            filename = os.path.join(workdir, "bench.json")
+            plain = None
+
+            print(f"{size} shapes")
+            print(f"{'method':<8} {'level':>5} {'size':>12} {'ratio':>7} {'save':>10} {'load':>10}")
+            for method, level in SETTINGS:
+                result = measure(project, filename, method, level, args.precision, args.repeat)
+                plain = plain or result["bytes"]
+                shown = "-" if level is None else level
+                print(f"{method:<8} {shown:>5} {result['bytes'] / 1024:>8.0f} KiB {plain / result['bytes']:>6.2f}x "
+                      f"{result['save'] * 1000:>7.1f} ms {result['load'] * 1000:>7.1f} ms")
+                results[f"{method}/{shown}/{size}"] = result
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
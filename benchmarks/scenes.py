@@ -0,0 +1,52 @@
+"""Synthetic projects, in the same dictionary format as saved files"""
+import math
+import random
+
+COLORS = ["#000000", "#ff0000", "#00a000", "#0000ff", "#808080"]
+KINDS = ["rect", "ellipse", "line"]
+
+# Nested scenes: leaves per top-level group, children per nesting level
+NESTED_GROUP_SIZE = 256
+NESTED_BRANCHING = 4
+NESTED_DEPTH = 4
+
+def make_shape(rng: random.Random, extent: float) -> dict:
+    kind = rng.choice(KINDS)
+    x = rng.uniform(0, extent)
+    y = rng.uniform(0, extent)
+    style = {"color": rng.choice(COLORS), "stroke_width": rng.randint(1, 4)}
+
+    if kind == "line":
+        props = {"x1": x, "y1": y, "x2": x + rng.uniform(-40, 40), "y2": y + rng.uniform(-40, 40)}
+        return {"type": kind, "pos": [0.0, 0.0], "props": {**props, **style}}
+
+    w = rng.uniform(2, 40)
+    h = rng.uniform(2, 40)
+    return {"type": kind, "pos": [x, y], "props": {"x": x, "y": y, "w": w, "h": h, **style}}
+
+def _nest(shapes: list, depth: int) -> dict:
+    if depth == 0 or len(shapes) <= NESTED_BRANCHING:
+        children = shapes
+    else:
+        step = math.ceil(len(shapes) / NESTED_BRANCHING)
+        children = [_nest(shapes[i:i + step], depth - 1) for i in range(0, len(shapes), step)]
+    return {"type": "group", "pos": [0.0, 0.0], "children": children}
+
+def make_project(size: int, nested: bool = False, seed: int = 0) -> dict:
+    """
+    :param size: Number of leaf shapes
+    :param nested: Wrap the shapes in groups NESTED_DEPTH levels deep
+    """
+    rng = random.Random(seed)
+    extent = math.sqrt(size) * 20
+    shapes = [make_shape(rng, extent) for _ in range(size)]
+
+    if nested:
+        shapes = [_nest(shapes[i:i + NESTED_GROUP_SIZE], NESTED_DEPTH)
+                  for i in range(0, len(shapes), NESTED_GROUP_SIZE)]
+
+    return {
+        "version": "1.0",
+        "scene": {"width": extent, "height": extent},
+        "shapes": shapes
+    }
@@ -0,0 +1,182 @@
+"""
+Headless batch converter: renders vector projects to images or SVG.
+
+    python convert.py drawings/ -o thumbs/ -f png -j 8
+"""
+import argparse
+import os
+import sys
+import time
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Compressed projects (.json.gz, .json.xz) are detected by content on load
+PROJECT_EXTENSIONS = (".json", ".vecb", ".gz", ".xz")
+COMPRESSED_EXTENSIONS = (".gz", ".xz")
+
+def collect_inputs(paths, recursive: bool):
+    """
+    (filename, root) pairs, root being the directory argument a file was
+    found in, None for file arguments. A file listed twice is kept once.
+    """
+    files = []
+    seen = set()
+
+    def add(filename, root):
+        key = os.path.normcase(os.path.realpath(filename))
+        if key not in seen:
+            seen.add(key)
+            files.append((filename, root))
+
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                for root, _, names in os.walk(path):
+                    for n in sorted(names):
+                        if n.lower().endswith(PROJECT_EXTENSIONS):
+                            add(os.path.join(root, n), path)
+            else:
+                for n in sorted(os.listdir(path)):
+                    if n.lower().endswith(PROJECT_EXTENSIONS):
+                        add(os.path.join(path, n), path)
+        else:
+            add(path, None)
+    return files
+
+def output_path(filename: str, output_dir: str, fmt: str, root: str = None, keep_extension: bool = False) -> str:
+    """
+    Target of one input: next to it, or under output_dir at its path
+    relative to `root` (the directory it was found in).
+    :param keep_extension: x.json -> x.json.png instead of x.png
+    """
+    name = os.path.basename(filename)
+    base, ext = os.path.splitext(name)
+    if keep_extension:
+        base = name
+    elif ext.lower() in COMPRESSED_EXTENSIONS:
+        base = os.path.splitext(base)[0]
+    if not output_dir:
+        directory = os.path.dirname(filename)
+    elif root:
+        directory = os.path.join(output_dir, os.path.relpath(os.path.dirname(filename), root))
+    else:
+        directory = output_dir
+    return os.path.normpath(os.path.join(directory, f"{base}.{fmt.lower()}"))
+
+def plan_targets(files, output_dir: str, fmt: str) -> list:
+    """
+    [(filename, target)] for the (filename, root) pairs of collect_inputs.
+    Inputs that would share a target (x.json and x.vecb, or x.json.gz)
+    keep their full name in it. Raises ValueError if targets still clash.
+    """
+    def clashes(targets):
+        counts = Counter(os.path.normcase(t) for t in targets)
+        return {os.path.normcase(t) for t in targets if counts[os.path.normcase(t)] > 1}
+
+    targets = [output_path(f, output_dir, fmt, root) for f, root in files]
+    shared = clashes(targets)
+    if shared:
+        targets = [output_path(f, output_dir, fmt, root, keep_extension=True)
+                   if os.path.normcase(t) in shared else t
+                   for (f, root), t in zip(files, targets)]
+        shared = clashes(targets)
+    if shared:
+        names = [f for (f, _), t in zip(files, targets) if os.path.normcase(t) in shared]
+        raise ValueError("These inputs would overwrite each other's output: " + ", ".join(names))
+    return [(f, t) for (f, _), t in zip(files, targets)]
+
+# --- Worker process ---
+_app = None
+
+def _init_worker():
+    # Every worker owns its own offscreen QApplication
+    global _app
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PySide6.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication([])
+
+def convert_file(filename: str, target: str, fmt: str, scale: float):
+    """Returns (filename, target, seconds, error message or None)"""
+    from PySide6.QtWidgets import QGraphicsScene
+    from src.logic.loader import load_scene
+    from src.logic.strategies import ImageSaveStrategy
+
+    start = time.perf_counter()
+    if fmt.upper() == "SVG":
+        return convert_svg(filename, target, start)
+
+    scene = QGraphicsScene()
+    try:
+        load_scene(scene, filename)
+        bg_color = "transparent" if fmt.upper() == "PNG" else "white"
+        ImageSaveStrategy(fmt=fmt.upper(), bg_color=bg_color, scale=scale).save(target, scene)
+        return filename, target, time.perf_counter() - start, None
+    except Exception as e:
+        return filename, target, time.perf_counter() - start, str(e)
+    finally:
+        scene.clear()
+
+def convert_svg(filename: str, target: str, start: float):
+    """SVG is written from the document model, no graphics item is built"""
+    from src.logic.document import DocumentModel
+    from src.logic.strategies import SvgSaveStrategy
+
+    try:
+        SvgSaveStrategy().write(target, DocumentModel.load(filename).to_data())
+        return filename, target, time.perf_counter() - start, None
+    except Exception as e:
+        return filename, target, time.perf_counter() - start, str(e)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render vector projects to PNG/JPG/SVG without a GUI.")
+    parser.add_argument("inputs", nargs="+", help="Project files or directories")
+    parser.add_argument("-o", "--output-dir", help="Output directory (default: next to each input)")
+    parser.add_argument("-f", "--format", choices=["png", "jpg", "svg"], default="png")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes")
+    parser.add_argument("-s", "--scale", type=float, default=1.0, help="Output pixels per scene unit")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        print("No projects found")
+        return 1
+
+    try:
+        jobs = plan_targets(files, args.output_dir, args.format)
+    except ValueError as e:
+        print(e)
+        return 1
+    for directory in {os.path.dirname(target) for _, target in jobs}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    failures = 0
+    start = time.perf_counter()
+
+    # Spawned workers start clean instead of inheriting a forked Qt state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs), mp_context=context,
+                             initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(convert_file, f, target, args.format, args.scale)
+            for f, target in jobs
+        ]
+        for future in as_completed(futures):
+            filename, target, seconds, error = future.result()
+            if error:
+                failures += 1
+                print(f"FAIL {filename} ({seconds:.3f}s): {error}")
+            else:
+                print(f"OK   {filename} -> {target} ({seconds:.3f}s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(files) - failures}/{len(files)} converted in {elapsed:.2f}s "
+          f"({len(files) / elapsed:.1f} files/s, {args.jobs} workers)")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
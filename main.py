@@ -11,6 +11,10 @@ def main():
     window = VectorEditorWindow()
     window.show()
 
+    # A project given on the command line is opened, with crash recovery if needed
+    if len(sys.argv) > 1:
+        window.open_file(sys.argv[1])
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
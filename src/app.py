@@ -1,15 +1,23 @@
 from PySide6.QtWidgets import (QMainWindow, QMessageBox, QWidget, 
                                QVBoxLayout, QHBoxLayout, QPushButton, 
-                               QFrame, QFileDialog)
+                               QFrame, QFileDialog, QProgressDialog,
+                               QInputDialog)
 from PySide6.QtGui import QCloseEvent, QAction, QKeySequence
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
 
 from src.widgets.canvas import EditorCanvas
 from src.widgets.properties import PropertiesPanel
-
-from src.logic.strategies import JsonSaveStrategy, ImageSaveStrategy
-from src.logic.io_manager import FileManager
-from src.logic.factory import ShapeFactory
+from src.widgets.perf_overlay import PerformanceOverlay
+
+from src.logic.strategies import JsonSaveStrategy, BinarySaveStrategy, ImageSaveStrategy, SvgSaveStrategy
+from src.logic.compression import Compression
+from src.logic.loader import ProjectLoader
+from src.logic.save_worker import SaveWorker
+from src.logic.journal import EditJournal
+from src.logic.instrumentation import PROFILER
+from src.logic.styles import STYLES
+from src.logic.symbols import SYMBOLS
+from src.logic.render_cache import RENDER_CACHE
 
 class VectorEditorWindow(QMainWindow):
     def __init__(self):
@@ -21,7 +29,17 @@ class VectorEditorWindow(QMainWindow):
         # Trigger floating in window manager
         self.setWindowFlag(Qt.WindowType.Dialog, True)
 
+        self.loader = None
+
+        # One writer thread keeps saves to the same file in order
+        self.save_pool = QThreadPool(self)
+        self.save_pool.setMaxThreadCount(1)
+        self.save_jobs = {}  # signals -> worker, keeps running jobs alive
+
         self._init_ui()
+
+        # Crash-safe autosave, active once the document has a project file
+        self.journal = EditJournal(self.canvas.scene, self.canvas.document, self.save_pool, self)
         
         print("Window initialized")
 
@@ -30,11 +48,15 @@ class VectorEditorWindow(QMainWindow):
 
         # Status bar
         self.statusBar().showMessage("Ready")
+        self.perf_overlay = PerformanceOverlay(self)
+        self.statusBar().addPermanentWidget(self.perf_overlay)
 
         # Menu bar
         menubar = self.menuBar()
         file_menu = menubar.addMenu("&File")
         edit_menu = menubar.addMenu("&Edit")
+        view_menu = menubar.addMenu("&View")
+        arrange_menu = menubar.addMenu("&Arrange")
 
         # Actions
         exit_action = QAction("Exit", self)
@@ -62,6 +84,10 @@ class VectorEditorWindow(QMainWindow):
         ungroup_action.setStatusTip("Ungroup selected group")
         ungroup_action.triggered.connect(self.canvas.ungroup_selection)
 
+        symbol_action = QAction("Make Symbol", self)
+        symbol_action.setStatusTip("Replace the selected groups by instances of shared symbols")
+        symbol_action.triggered.connect(self.canvas.make_symbol_selection)
+
         stack = self.canvas.undo_stack
 
         undo_action = stack.createUndoAction(self)
@@ -75,6 +101,54 @@ class VectorEditorWindow(QMainWindow):
         delete_action.triggered.connect(self.canvas.delete_selection)
         self.addAction(delete_action)  # Enable shortcut without menu
 
+        cache_action = QAction("Cache Group Rendering", self)
+        cache_action.setStatusTip("Paint the selected groups from a cached pixmap")
+        cache_action.triggered.connect(self.canvas.toggle_group_cache)
+
+        profile_action = QAction("Performance Overlay", self)
+        profile_action.setCheckable(True)
+        profile_action.setShortcut("Ctrl+Shift+P")
+        profile_action.setStatusTip("Time painting, tools, commands and file I/O")
+        profile_action.toggled.connect(self.perf_overlay.set_active)
+
+        trace_action = QAction("Export Performance Trace...", self)
+        trace_action.setStatusTip("Save the recorded timings as a Chrome trace")
+        trace_action.triggered.connect(self.on_export_trace_clicked)
+
+        zoom_in_action = QAction("Zoom In", self)
+        zoom_in_action.setShortcut(QKeySequence.StandardKey.ZoomIn)
+        zoom_in_action.triggered.connect(lambda: self.canvas.zoom_by(self.canvas.ZOOM_STEP))
+
+        zoom_out_action = QAction("Zoom Out", self)
+        zoom_out_action.setShortcut(QKeySequence.StandardKey.ZoomOut)
+        zoom_out_action.triggered.connect(lambda: self.canvas.zoom_by(1 / self.canvas.ZOOM_STEP))
+
+        reset_zoom_action = QAction("Reset Zoom", self)
+        reset_zoom_action.setShortcut("Ctrl+0")
+        reset_zoom_action.setStatusTip("Wheel zooms, middle button or Space+drag pans")
+        reset_zoom_action.triggered.connect(self.canvas.reset_zoom)
+
+        align_actions = []
+        for edge, label in (("left", "Left"), ("hcenter", "Center"), ("right", "Right"),
+                            ("top", "Top"), ("vcenter", "Middle"), ("bottom", "Bottom")):
+            action = QAction(f"Align {label}", self)
+            action.triggered.connect(lambda checked=False, e=edge: self.canvas.align_selection(e))
+            align_actions.append(action)
+
+        distribute_h_action = QAction("Distribute Horizontally", self)
+        distribute_h_action.triggered.connect(lambda: self.canvas.distribute_selection(0))
+
+        distribute_v_action = QAction("Distribute Vertically", self)
+        distribute_v_action.triggered.connect(lambda: self.canvas.distribute_selection(1))
+
+        scale_action = QAction("Scale...", self)
+        scale_action.setStatusTip("Scale the selection about its center")
+        scale_action.triggered.connect(self.on_scale_clicked)
+
+        rotate_action = QAction("Rotate...", self)
+        rotate_action.setStatusTip("Rotate the selection about its center")
+        rotate_action.triggered.connect(self.on_rotate_clicked)
+
         # Add actions to menu
         file_menu.addAction(exit_action)
         file_menu.addSeparator()
@@ -83,12 +157,31 @@ class VectorEditorWindow(QMainWindow):
 
         edit_menu.addAction(group_action)
         edit_menu.addAction(ungroup_action)
+        edit_menu.addAction(symbol_action)
         edit_menu.addSeparator()
         edit_menu.addAction(undo_action)
         edit_menu.addAction(redo_action)
         edit_menu.addSeparator()
         edit_menu.addAction(delete_action)
 
+        for action in align_actions:
+            arrange_menu.addAction(action)
+        arrange_menu.addSeparator()
+        arrange_menu.addAction(distribute_h_action)
+        arrange_menu.addAction(distribute_v_action)
+        arrange_menu.addSeparator()
+        arrange_menu.addAction(scale_action)
+        arrange_menu.addAction(rotate_action)
+
+        view_menu.addAction(zoom_in_action)
+        view_menu.addAction(zoom_out_action)
+        view_menu.addAction(reset_zoom_action)
+        view_menu.addSeparator()
+        view_menu.addAction(cache_action)
+        view_menu.addSeparator()
+        view_menu.addAction(profile_action)
+        view_menu.addAction(trace_action)
+
         # Toolbar
         toolbar = self.addToolBar("File")
         toolbar.addAction(exit_action)
@@ -119,11 +212,13 @@ class VectorEditorWindow(QMainWindow):
         self.btn_line = QPushButton("Line")
         self.btn_rect = QPushButton("Rect")
         self.btn_ellipse = QPushButton("Ellipse")
+        self.btn_freehand = QPushButton("Freehand")
 
         self.btn_select.setCheckable(True)
         self.btn_line.setCheckable(True)
         self.btn_rect.setCheckable(True)
         self.btn_ellipse.setCheckable(True)
+        self.btn_freehand.setCheckable(True)
 
         self.btn_line.setChecked(True) # Default selected tool
         self.current_tool = "line"
@@ -132,23 +227,25 @@ class VectorEditorWindow(QMainWindow):
         self.btn_line.clicked.connect(lambda: self.on_change_tool("line"))
         self.btn_rect.clicked.connect(lambda: self.on_change_tool("rect"))
         self.btn_ellipse.clicked.connect(lambda: self.on_change_tool("ellipse"))
+        self.btn_freehand.clicked.connect(lambda: self.on_change_tool("polyline"))
 
         tools_layout.addWidget(self.btn_select)
         tools_layout.addWidget(self.btn_line)
         tools_layout.addWidget(self.btn_rect)
         tools_layout.addWidget(self.btn_ellipse)
+        tools_layout.addWidget(self.btn_freehand)
         tools_layout.addStretch() # Pushes buttons to the top
 
         # --- Right Part (Canvas) ---
         self.canvas = EditorCanvas()
         self.canvas.set_tool(self.current_tool)
 
-        self_props_panel = PropertiesPanel(self.canvas.scene, self.canvas.undo_stack)
+        self.props_panel = PropertiesPanel(self.canvas.scene, self.canvas.undo_stack)
         
         # 3. Assemble
         main_layout.addWidget(tools_panel)
         main_layout.addWidget(self.canvas)
-        main_layout.addWidget(self_props_panel)
+        main_layout.addWidget(self.props_panel)
 
     def on_change_tool(self, tool_name: str):
         self.current_tool = tool_name
@@ -158,6 +255,7 @@ class VectorEditorWindow(QMainWindow):
         self.btn_line.setChecked(tool_name == "line")
         self.btn_rect.setChecked(tool_name == "rect")
         self.btn_ellipse.setChecked(tool_name == "ellipse")
+        self.btn_freehand.setChecked(tool_name == "polyline")
 
         self.canvas.set_tool(tool_name)
 
@@ -170,6 +268,9 @@ class VectorEditorWindow(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
+            # Do not cut a background save short
+            self.save_pool.waitForDone()
+            self.journal.close()
             event.accept()
             print("Window closed")
         else:
@@ -177,7 +278,9 @@ class VectorEditorWindow(QMainWindow):
             print("Exit canceled")
 
     def on_save_clicked(self):
-        filters = "Vector Project (*.json);;PNG Image (*.png);;JPEG Image (*.jpg)"
+        filters = ("Vector Project (*.json);;Binary Vector Project (*.vecb);;"
+                   "Compressed Vector Project (*.json.gz);;Compressed Vector Project, xz (*.json.xz);;"
+                   "PNG Image (*.png);;JPEG Image (*.jpg);;SVG Image (*.svg)")
         filename, selected_filter = QFileDialog.getSaveFileName(self, "Save File", "", filters)
 
         if not filename:
@@ -186,46 +289,188 @@ class VectorEditorWindow(QMainWindow):
         strategy = None
         if filename.lower().endswith(".json"):
             strategy = JsonSaveStrategy()
+        elif filename.lower().endswith(".vecb"):
+            strategy = BinarySaveStrategy()
+        elif Compression.from_suffix(filename) != Compression.NONE:
+            method = Compression.from_suffix(filename)
+            level, ok = QInputDialog.getInt(
+                self, "Compression", "Level (0 fastest - 9 smallest):", Compression.DEFAULT_LEVEL[method], 0, 9
+            )
+            if not ok:
+                return
+            strategy = JsonSaveStrategy(compression=method, level=level)
         elif filename.lower().endswith(".png"):
             strategy = ImageSaveStrategy(fmt="PNG", bg_color="transparent")
         elif filename.lower().endswith(".jpg"):
             strategy = ImageSaveStrategy(fmt="JPG", bg_color="white")
+        elif filename.lower().endswith(".svg"):
+            strategy = SvgSaveStrategy(bg_color="transparent")
         else:
             strategy = JsonSaveStrategy()  # Default to JSON
 
+        if isinstance(strategy, ImageSaveStrategy):
+            dpi, ok = QInputDialog.getInt(
+                self, "Export Resolution", "DPI:", ImageSaveStrategy.BASE_DPI, 24, 2400
+            )
+            if not ok:
+                return
+            # Large exports switch to tiled rendering on their own
+            strategy.scale = dpi / ImageSaveStrategy.BASE_DPI
+
+        # Phase 1: snapshot on the GUI thread, the scene is not touched afterwards
         try:
-            strategy.save(filename, self.canvas.scene)
-            self.statusBar().showMessage(f"File saved: {filename}")
+            with PROFILER.span("save.snapshot", "io", {"strategy": type(strategy).__name__}):
+                snapshot = strategy.snapshot(self.canvas.scene)
         except Exception as e:
             QMessageBox.critical(self, "Save Error", f"Failed to save file:\n{str(e)}")
             self.statusBar().showMessage("Save failed")
+            return
 
-    def on_open_clicked(self):
-        filename, _ = QFileDialog.getOpenFileName(self, "Open File", "", "Vector Project (*.json)")
+        # Phase 2: encode and write in the background
+        worker = SaveWorker(strategy, filename, snapshot)
+        worker.signals.finished.connect(self.on_save_finished)
+        worker.signals.failed.connect(self.on_save_failed)
+        self.save_jobs[worker.signals] = worker
+        self.save_pool.start(worker)
+
+        self.statusBar().showMessage(f"Saving: {filename}...")
+
+    # Slots on the window, so they are queued to the GUI thread
+    def on_save_finished(self, filename: str):
+        self.save_jobs.pop(self.sender(), None)
+        self.statusBar().showMessage(f"File saved: {filename}")
+        if filename.lower().endswith((".json", ".vecb", *Compression.SUFFIXES)):
+            # The project file is now the base of the autosave
+            self.journal.start(filename)
+
+    def on_save_failed(self, filename: str, error: str):
+        self.save_jobs.pop(self.sender(), None)
+        self.statusBar().showMessage(f"Save failed: {filename}: {error}")
+
+    def on_scale_clicked(self):
+        percent, ok = QInputDialog.getDouble(self, "Scale", "Scale (%):", 100.0, 1.0, 10000.0, 1)
+        if ok and percent != 100.0:
+            self.canvas.scale_selection(percent / 100.0)
+
+    def on_rotate_clicked(self):
+        degrees, ok = QInputDialog.getDouble(self, "Rotate", "Angle (degrees, clockwise):", 90.0, -360.0, 360.0, 1)
+        if ok and degrees:
+            self.canvas.rotate_selection(degrees)
+
+    def on_export_trace_clicked(self):
+        if not PROFILER.events:
+            QMessageBox.information(self, "Performance Trace",
+                                    "Nothing recorded yet: turn on View > Performance Overlay first.")
+            return
+
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export Performance Trace", "trace.json", "Chrome Trace (*.json)"
+        )
         if not filename:
             return
 
         try:
-            data = FileManager.load_json(filename)
+            PROFILER.export_chrome_trace(filename)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not export trace:\n{str(e)}")
+            return
+        self.statusBar().showMessage(f"Trace exported: {filename} ({len(PROFILER.events)} events)")
 
-            self.canvas.scene.clear()
-            self.canvas.undo_stack.clear()
+    def on_open_clicked(self):
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Open File", "", "Vector Project (*.json *.vecb *.gz *.xz)"
+        )
+        if filename:
+            self.open_file(filename)
 
-            scene_info = data.get("scene", {})
-            w = scene_info.get("width", 800)
-            h = scene_info.get("height", 600)
-            self.canvas.scene.setSceneRect(0, 0, w, h)
+    def open_file(self, filename: str):
+        if self.loader:
+            self.loader.cancel()
 
-            shapes = data.get("shapes", [])
-            for shape_data in shapes:
-                try:
-                    shape_obj = ShapeFactory.from_dict(shape_data)
-                    self.canvas.scene.addItem(shape_obj)
-                except Exception as e:
-                    print(f"Skipping corrupt shape: {e}")
+        # Unsaved edits of the current project stay recoverable
+        self.journal.close()
 
-            self.statusBar().showMessage(f"Loaded: {filename}")
+        self.clear_scene()
+        self.canvas.undo_stack.clear()
+        self.canvas.scene.setSceneRect(0, 0, 800, 600)
+        self.canvas.document.reset()
+        STYLES.clear_named()  # Named styles belong to the document
+        SYMBOLS.clear()
 
+        if EditJournal.has_recovery(filename) and self.ask_recovery(filename):
+            return
+
+        # Shapes are streamed in while the event loop keeps running
+        progress = QProgressDialog("Loading project...", "Cancel", 0, 1000, self)
+        progress.setWindowTitle("Open File")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
+
+        loader = ProjectLoader(self.canvas.scene, filename, parent=self, document=self.canvas.document)
+        self.loader = loader
+
+        def on_progress(done, total):
+            progress.setValue(int(done * 1000 / total) if total else 1000)
+            self.statusBar().showMessage(f"Loading: {loader.loaded} shapes")
+
+        def on_finished(count):
+            progress.close()
+            self.loader = None
+            self.journal.start(filename)
+            self.statusBar().showMessage(f"Loaded: {filename} ({count} shapes)")
+
+        def on_failed(message):
+            progress.close()
+            self.loader = None
+            self.clear_scene()
+            self.canvas.document.reset()
+            QMessageBox.critical(self, "Error", f"Could not load file:\n{message}")
+            self.statusBar().showMessage("Load failed")
+
+        def on_canceled():
+            progress.close()
+            self.loader = None
+            self.clear_scene()
+            self.canvas.document.reset()
+            self.statusBar().showMessage("Load canceled")
+
+        loader.progress.connect(on_progress)
+        loader.finished.connect(on_finished)
+        loader.failed.connect(on_failed)
+        loader.canceled.connect(on_canceled)
+        progress.canceled.connect(loader.cancel)
+
+        loader.start()
+
+    def clear_scene(self):
+        # The pixmap cache holds the groups of the scene alive
+        RENDER_CACHE.clear()
+        self.canvas.scene.clear()
+        # Deleted items never report that they left the selection
+        self.props_panel.selection.reset()
+
+    def ask_recovery(self, filename: str) -> bool:
+        """Offers to restore the autosave of a crashed session. Returns True if restored."""
+        reply = QMessageBox.question(
+            self,
+            "Recover unsaved changes",
+            f"{filename} has unsaved changes from a previous session.\n"
+            "Recover them? Otherwise they are discarded.",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply != QMessageBox.Yes:
+            EditJournal.discard_files(filename)
+            return False
+
+        try:
+            replayed = self.journal.recover(filename)
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not load file:\n{e}")
-            self.statusBar().showMessage("Load failed")
\ No newline at end of file
+            self.clear_scene()
+            self.canvas.document.reset()
+            QMessageBox.critical(self, "Error", f"Could not recover changes:\n{str(e)}")
+            self.statusBar().showMessage("Recovery failed")
+            return False
+        self.canvas.sync_document()
+
+        self.statusBar().showMessage(f"Recovered: {filename} ({replayed} edits replayed)")
+        return True
@@ -0,0 +1,510 @@
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import numpy as np
+
+from src.logic.simplify import pack_points, unpack_points
+
+class BinaryFormat:
+    """
+    Compact binary project container.
+    Decoupled from Qt logic: works on the same dictionaries as
+    Shape.to_dict / ShapeFactory.from_dict.
+
+    Layout (little-endian, every table aligned to 8 bytes):
+        header
+        pos     float64[2 * nodes]   item position
+        geom    float64[4 * nodes]   x, y, w, h  or  x1, y1, x2, y2  or  first, count (polyline)
+                                     or  left, top, right, bottom (group, NaN if unknown)
+                                     or  definition index (symbol instance)
+        parent  int32[nodes]         index of the parent group or definition, -1 at top level
+        style   int32[nodes]         index into the style table, -1 for groups
+        kind    uint8[nodes]         see KINDS
+        widths  int32[styles]        style table: stroke widths
+        xform   float64[2 * nodes]   rotation, scale (only with FLAG_TRANSFORMS)
+        points  float64[2 * points]  polyline x, y pairs (only with FLAG_POINTS)
+        strings (uint16 len, utf-8)  style table: color, then name ("" if anonymous),
+                                     then the name of every definition node (only with FLAG_SYMBOLS)
+
+    The style table is the one of src.logic.styles: one entry per
+    (color, width) and one per named style. Version 1 files have no names,
+    versions before 3 have no transforms, before 4 no polylines.
+    A polyline's geometry is the range of its points in the points table.
+    Group bounds are only read with FLAG_GROUP_BOUNDS, older files have zeros.
+    Version 5 adds symbols: every definition is a top-level "definition"
+    node holding its tree, written once before the shapes; instances are
+    "symbol" nodes referring to it.
+
+    Nodes are stored in pre-order, so children always follow their group.
+    """
+
+    MAGIC = b"VECB"
+    VERSION = 5
+    FLAG_TRANSFORMS = 1
+    FLAG_POINTS = 2
+    FLAG_GROUP_BOUNDS = 4
+    FLAG_SYMBOLS = 8
+    HEADER = struct.Struct("<4sHHddIII")  # magic, version, flags, w, h, nodes, styles, strings size
+
+    NO_BOUNDS = (math.nan,) * 4
+
+    KINDS = ["group", "rect", "ellipse", "line", "polyline", "symbol", "definition"]
+    GEOMETRY_KEYS = {
+        "rect": ("x", "y", "w", "h"),
+        "ellipse": ("x", "y", "w", "h"),
+        "line": ("x1", "y1", "x2", "y2"),
+    }
+
+    @staticmethod
+    def is_binary(filename: str) -> bool:
+        with open(filename, 'rb') as f:
+            return f.read(len(BinaryFormat.MAGIC)) == BinaryFormat.MAGIC
+
+    @staticmethod
+    def encode(data: dict):
+        """Yields the file contents as a sequence of byte blocks"""
+        kind_ids = {name: i for i, name in enumerate(BinaryFormat.KINDS)}
+
+        pos = array('d')
+        geom = array('d')
+        parent = array('i')
+        style = array('i')
+        kind = array('B')
+        xform = array('d')
+        points = array('d')
+        has_bounds = False
+        styles = {}  # (color, width, name) -> index
+
+        # Named styles come first, so unused ones survive the round trip
+        for named in data.get("styles", []):
+            key = (named.get("color", "black"), named.get("stroke_width", 2), named["name"])
+            styles.setdefault(key, len(styles))
+
+        # Definitions come first, so readers know them before any instance
+        symbols = data.get("symbols", [])
+        definitions = {symbol["name"]: i for i, symbol in enumerate(symbols)}
+
+        # Explicit stack instead of recursion: nested groups can be deep
+        stack = [(shape, -1) for shape in reversed(data.get("shapes", []))]
+        stack.extend(({"type": "definition", **symbol}, -1) for symbol in reversed(symbols))
+        while stack:
+            shape, parent_index = stack.pop()
+            shape_type = shape.get("type")
+            if shape_type not in kind_ids:
+                raise ValueError(f"Unknown type: {shape_type}")
+
+            index = len(kind)
+            kind.append(kind_ids[shape_type])
+            parent.append(parent_index)
+            pos.extend(shape.get("pos", [0, 0]))
+            xform.extend((shape.get("rotation", 0.0), shape.get("scale", 1.0)))
+
+            if shape_type == "definition":
+                style.append(-1)
+                geom.extend(BinaryFormat.NO_BOUNDS)
+                for child in reversed(shape.get("children", [])):
+                    stack.append((child, index))
+            elif shape_type == "symbol":
+                style.append(-1)
+                if shape["symbol"] not in definitions:
+                    raise ValueError(f"Unknown symbol: {shape['symbol']}")
+                geom.extend((definitions[shape["symbol"]], 0.0, 0.0, 0.0))
+            elif shape_type == "group":
+                style.append(-1)
+                bounds = shape.get("bounds")
+                if bounds:
+                    has_bounds = True
+                    geom.extend(bounds)
+                else:
+                    geom.extend(BinaryFormat.NO_BOUNDS)
+                for child in reversed(shape.get("children", [])):
+                    stack.append((child, index))
+            else:
+                props = shape.get("props", {})
+                key = (props.get("color", "black"), props.get("stroke_width", 2), props.get("style", ""))
+                style.append(styles.setdefault(key, len(styles)))
+                if shape_type == "polyline":
+                    first = len(points) // 2
+                    points.extend(unpack_points(props["points"]))
+                    geom.extend((first, len(points) // 2 - first, 0.0, 0.0))
+                else:
+                    geom.extend(props[k] for k in BinaryFormat.GEOMETRY_KEYS[shape_type])
+
+        widths = array('i', (width for _, width, _ in styles))
+        strings = bytearray()
+        for color, _, name in styles:
+            for text in (color, name):
+                raw = text.encode('utf-8')
+                strings += struct.pack("<H", len(raw)) + raw
+        for symbol in symbols:
+            raw = symbol["name"].encode('utf-8')
+            strings += struct.pack("<H", len(raw)) + raw
+
+        # Rotation and scale are rare: the table is only written when used
+        tables = [pos, geom, parent, style, kind, widths]
+        flags = 0
+        if any(xform[i] != 0.0 or xform[i + 1] != 1.0 for i in range(0, len(xform), 2)):
+            tables.append(xform)
+            flags |= BinaryFormat.FLAG_TRANSFORMS
+        if points:
+            tables.append(points)
+            flags |= BinaryFormat.FLAG_POINTS
+        if has_bounds:
+            flags |= BinaryFormat.FLAG_GROUP_BOUNDS
+        if symbols:
+            flags |= BinaryFormat.FLAG_SYMBOLS
+
+        scene = data.get("scene", {})
+        yield BinaryFormat.HEADER.pack(
+            BinaryFormat.MAGIC, BinaryFormat.VERSION, flags,
+            scene.get("width", 800), scene.get("height", 600),
+            len(kind), len(styles), len(strings)
+        )
+
+        for table in tables:
+            if sys.byteorder != "little":
+                table.byteswap()
+            raw = table.tobytes()
+            yield raw
+            yield bytes(BinaryFormat._padding(len(raw)))
+        yield bytes(strings)
+
+    @staticmethod
+    def _padding(size: int) -> int:
+        return -size % 8
+
+class BinaryProjectReader:
+    """
+    Reads a binary project through mmap.
+
+    Tables are cast straight from memoryviews over the mapped file and
+    indexed in place while the shapes are built: neither the file nor
+    its tables are copied.
+    Iterating yields the same (key, value) events as JsonStreamReader,
+    each top-level shape being a to_dict-compatible dictionary.
+    read_columns() skips the dictionaries: loaders that keep columns or
+    build items themselves read the tables as NumPy arrays.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.total_bytes = os.path.getsize(filename)
+        self.bytes_read = 0
+
+    def _map(self):
+        try:
+            with open(self.filename, 'rb') as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            raise IOError(f"Failed to read file: {e}")
+
+    def __iter__(self):
+        mm = self._map()
+
+        # The tables are views over the map: it stays open until the last shape is built
+        with mm:
+            header, columns, style_table = self._read_tables(mm)
+            try:
+                width, height, nodes = header
+                yield "version", "1.0"
+                yield "scene", {"width": width, "height": height}
+
+                named = [{"name": name, "color": color, "stroke_width": w}
+                         for color, w, name in style_table if name]
+                if named:
+                    yield "styles", named
+                yield from self._build_shapes(nodes, columns, style_table)
+            finally:
+                self._release(columns)
+
+    def read_columns(self) -> "BinaryColumns":
+        """
+        The tables as NumPy arrays over the mapped file, nothing is copied
+        (see BinaryColumns). The map is released along with the last array.
+        """
+        mm = self._map()
+        header, columns, style_table = self._read_tables(mm)
+        width, height, nodes = header
+        pos, geom, parent, style, kind, xform, points, has_bounds, names = columns
+
+        def table(view, dtype, per_row=1):
+            values = np.frombuffer(view, dtype=dtype)
+            return values.reshape(-1, per_row) if per_row > 1 else values
+
+        tables = (
+            table(pos, np.float64, 2), table(geom, np.float64, 4),
+            table(parent, np.int32), table(style, np.int32), table(kind, np.uint8),
+            table(xform, np.float64, 2) if xform is not None else None,
+            table(points, np.float64, 2) if points is not None else None,
+        )
+        self.bytes_read = self.total_bytes
+        return BinaryColumns(width, height, tables, style_table, names, has_bounds)
+
+    def _read_tables(self, mm):
+        header = BinaryFormat.HEADER
+        if len(mm) < header.size:
+            raise ValueError("File is corrupted or has invalid format")
+
+        magic, version, flags, width, height, nodes, styles, colors_size = header.unpack_from(mm, 0)
+        if magic != BinaryFormat.MAGIC or version > BinaryFormat.VERSION:
+            raise ValueError("File is corrupted or has invalid format")
+
+        view = memoryview(mm)
+        offset = header.size
+        layout = [('d', 2 * nodes), ('d', 4 * nodes), ('i', nodes), ('i', nodes), ('B', nodes), ('i', styles)]
+        has_xform = version >= 3 and flags & BinaryFormat.FLAG_TRANSFORMS
+        if has_xform:
+            layout.append(('d', 2 * nodes))
+        has_points = version >= 4 and flags & BinaryFormat.FLAG_POINTS
+
+        columns = []
+        points = None
+        try:
+            for code, count in layout:
+                columns.append(self._read_table(mm, view, offset, code, count))
+                offset += self._table_size(code, count)
+
+            if has_points:
+                # The table ends with the last polyline's range
+                geom, kind = columns[1], columns[4]
+                polyline = BinaryFormat.KINDS.index("polyline")
+                count = max((geom[4 * i] + geom[4 * i + 1] for i in range(nodes) if kind[i] == polyline), default=0)
+                count = 2 * int(count)
+                points = self._read_table(mm, view, offset, 'd', count)
+                offset += self._table_size('d', count)
+        finally:
+            view.release()
+
+        xform = columns.pop() if has_xform else None
+        widths = columns.pop()
+        columns.append(xform)
+        columns.append(points)
+        columns.append(bool(flags & BinaryFormat.FLAG_GROUP_BOUNDS))
+        per_style = 2 if version >= 2 else 1
+        definitions = 0
+        if version >= 5 and flags & BinaryFormat.FLAG_SYMBOLS:
+            definition = BinaryFormat.KINDS.index("definition")
+            definitions = sum(1 for k in columns[4] if k == definition)
+        strings = self._read_strings(mm, offset, styles * per_style + definitions)
+        # Definition names follow the style table
+        columns.append(strings[styles * per_style:])
+        strings = strings[:styles * per_style]
+        colors = strings[::per_style]
+        names = strings[1::2] if version >= 2 else [""] * styles
+        style_table = list(zip(colors, widths, names))
+        self._release([widths])
+
+        return (width, height, nodes), columns, style_table
+
+    def _read_table(self, mm, view, offset, code, count):
+        size = count * array(code).itemsize
+        if offset + size > len(mm):
+            raise ValueError("File is corrupted or has invalid format")
+        return self._table(view, offset, size, code)
+
+    @staticmethod
+    def _release(tables):
+        """Releases the table views, the map cannot be closed while they are exported"""
+        for table in tables:
+            if isinstance(table, memoryview):
+                table.release()
+
+    @staticmethod
+    def _table_size(code, count) -> int:
+        size = count * array(code).itemsize
+        return size + BinaryFormat._padding(size)
+
+    def _build_shapes(self, nodes, columns, style_table):
+        pos, geom, parent, style, kind, xform, points, has_bounds, definitions = columns
+        tables = (pos, geom, style, xform, points, has_bounds, definitions)
+        kinds = BinaryFormat.KINDS
+        per_node = self.total_bytes / nodes if nodes else 0
+        shapes = [None] * nodes
+        top = None
+        names = iter(definitions)
+
+        for i in range(nodes):
+            shape_type = kinds[kind[i]]
+            if shape_type == "definition":
+                # Read back as a "symbols" event, not as a shape
+                shape = {"name": next(names), "children": []}
+            else:
+                shape = self._node(i, shape_type, tables, style_table)
+            shapes[i] = shape
+
+            if parent[i] < 0:
+                # A new top-level shape means the previous one is complete
+                if top is not None:
+                    self.bytes_read = int(i * per_node)
+                    yield self._event(top)
+                top = shape
+            else:
+                shapes[parent[i]]["children"].append(shape)
+
+        self.bytes_read = self.total_bytes
+        if top is not None:
+            yield self._event(top)
+
+    @staticmethod
+    def _node(i: int, shape_type: str, tables, style_table) -> dict:
+        """
+        The dictionary of node `i`, children not included. `tables` index
+        flat (memoryviews, or lists), the points table is sliced as an array.
+        """
+        pos, geom, style, xform, points, has_bounds, definitions = tables
+        g = 4 * i
+        if shape_type == "symbol":
+            shape = {"type": "symbol", "pos": [pos[2 * i], pos[2 * i + 1]], "symbol": definitions[int(geom[g])]}
+        elif shape_type == "group":
+            shape = {"type": "group", "pos": [pos[2 * i], pos[2 * i + 1]], "children": []}
+            bounds = list(geom[g:g + 4])
+            if has_bounds and bounds[0] == bounds[0]:  # NaN: saved without bounds
+                shape["bounds"] = bounds
+        else:
+            color, stroke_width, style_name = style_table[style[i]]
+            if shape_type == "polyline":
+                first, count = int(geom[g]), int(geom[g + 1])
+                props = {"points": pack_points(points[2 * first:2 * (first + count)])}
+            else:
+                k0, k1, k2, k3 = BinaryFormat.GEOMETRY_KEYS[shape_type]
+                props = {k0: geom[g], k1: geom[g + 1], k2: geom[g + 2], k3: geom[g + 3]}
+            props["color"] = color
+            props["stroke_width"] = stroke_width
+            if style_name:
+                props["style"] = style_name
+            shape = {"type": shape_type, "pos": [pos[2 * i], pos[2 * i + 1]], "props": props}
+        if xform is not None:
+            rotation, scale = xform[2 * i], xform[2 * i + 1]
+            if rotation:
+                shape["rotation"] = rotation
+            if scale != 1.0:
+                shape["scale"] = scale
+        return shape
+
+    @staticmethod
+    def _event(top: dict) -> tuple:
+        if "type" not in top:
+            return "symbols", [top]
+        return "shapes", top
+
+    @staticmethod
+    def _table(view, offset, size, code):
+        if sys.byteorder == "little":
+            with view[offset:offset + size] as table:
+                return table.cast(code)
+        # Big-endian hosts need a swapped copy
+        swapped = array(code, view[offset:offset + size])
+        swapped.byteswap()
+        return swapped
+
+    @staticmethod
+    def _read_strings(mm, offset, count):
+        strings = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("<H", mm, offset)
+            offset += 2
+            strings.append(bytes(mm[offset:offset + length]).decode('utf-8'))
+            offset += length
+        return strings
+
+class BinaryColumns:
+    """
+    The node tables of a binary project as NumPy arrays over the mapped
+    file (see BinaryProjectReader.read_columns). DocumentModel takes them
+    over and ColumnFactory builds items from them, without dictionaries.
+    The file stays mapped as long as one of the arrays is referenced.
+
+    Rows are the nodes in file order (pre-order). The symbol definitions
+    come first, the shapes start at row `first`.
+    """
+
+    def __init__(self, width: float, height: float, tables, styles: list, symbol_names: list, has_bounds: bool):
+        self.width = width
+        self.height = height
+        pos, geom, parent, style, kind, xform, points = tables
+        self.pos = pos          # float64 (n, 2)
+        self.geom = geom        # float64 (n, 4), see BinaryFormat
+        self.parent = parent    # int32, row of the parent, -1 at top level
+        self.style = style      # int32, index into `styles`, -1 for groups and instances
+        self.kind = kind        # uint8, index into BinaryFormat.KINDS
+        self.xform = xform      # float64 (n, 2) rotation, scale; None if the file has none
+        self.points = points    # float64 (points, 2); None if the file has no polyline
+        self.styles = styles    # (color, width, name)
+        self.symbol_names = symbol_names  # of the definitions, in row order
+        self.has_bounds = has_bounds
+
+        tops = np.flatnonzero(parent < 0)
+        self.top_rows = tops[kind[tops] != BinaryFormat.KINDS.index("definition")]
+        self.first = int(self.top_rows[0]) if len(self.top_rows) else len(kind)
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def named_styles(self) -> list:
+        """The "styles" entries of a project dictionary"""
+        return [{"name": name, "color": color, "stroke_width": width}
+                for color, width, name in self.styles if name]
+
+    def definitions(self) -> list:
+        """The "symbols" entries of a project dictionary"""
+        return self.shape_dicts(0, self.first)
+
+    def shape_dicts(self, start: int, stop: int) -> list:
+        """
+        to_dict dictionaries of the whole trees in rows [start, stop),
+        for what loaders keep serialized (definitions, lazy group children)
+        """
+        # Plain lists: much cheaper to index per row than arrays
+        tables = (
+            self.pos[start:stop].ravel().tolist(), self.geom[start:stop].ravel().tolist(),
+            self.style[start:stop].tolist(),
+            self.xform[start:stop].ravel().tolist() if self.xform is not None else None,
+            self.points.ravel() if self.points is not None else None,
+            self.has_bounds, self.symbol_names
+        )
+        parent = self.parent[start:stop].tolist()
+        kinds = BinaryFormat.KINDS
+        # Definitions only come first, before any shape
+        names = iter(self.symbol_names)
+        nodes = {}
+        roots = []
+        for i, kind in enumerate(self.kind[start:stop].tolist()):
+            shape_type = kinds[kind]
+            if shape_type == "definition":
+                shape = {"name": next(names), "children": []}
+            else:
+                shape = BinaryProjectReader._node(i, shape_type, tables, self.styles)
+            nodes[start + i] = shape
+            group = nodes.get(parent[i])
+            if group is None:
+                roots.append(shape)
+            else:
+                group["children"].append(shape)
+        return roots
+
+    def depth(self) -> np.ndarray:
+        """Nesting level of every row, 0 at the top level"""
+        # Pointer jumping: every pass doubles the distance climbed
+        up = self.parent.astype(np.int64)
+        depth = (up >= 0).astype(np.int64)
+        linked = np.flatnonzero(up >= 0)
+        while len(linked):
+            above = up[linked]
+            depth[linked] += depth[above]
+            up[linked] = up[above]
+            linked = linked[up[linked] >= 0]
+        return depth
+
+    def subtree_ends(self) -> np.ndarray:
+        """Row following the last descendant of every row"""
+        depth = self.depth()
+        parent = self.parent.astype(np.int64)
+        size = np.ones(len(self), dtype=np.int64)
+        for level in range(int(depth.max(initial=0)), 0, -1):
+            rows = np.flatnonzero(depth == level)
+            np.add.at(size, parent[rows], size[rows])
+        return np.arange(len(self)) + size
@@ -1,5 +1,26 @@
+from array import array
+
+import numpy as np
 from PySide6.QtGui import QUndoCommand
 
+from src.logic.records import RECORDS
+from src.logic.shapes import Shape, Group, SymbolInstance
+from src.logic.styles import STYLES
+from src.logic.symbols import SYMBOLS
+from src.logic.transforms import TransformState
+
+# Ids for mergeable commands (see QUndoCommand.id)
+CHANGE_WIDTH_ID = 1
+CHANGE_POS_ID = 2
+
+class EditGesture:
+    """
+    Token shared by the commands of one continuous edit
+    (e.g. holding a spinbox arrow). Only commands of the same
+    gesture are merged, so separate edits stay separate in history.
+    """
+    pass
+
 class AddShapeCommand(QUndoCommand):
     def __init__(self, scene, item):
         super().__init__()
@@ -22,12 +43,22 @@ class AddShapeCommand(QUndoCommand):
         # Called on Undo
         self.scene.removeItem(self.item)
 
+    def to_journal(self, journal, undone: bool) -> list:
+        if undone:
+            return [journal.delete_record([self.item])]
+        return [journal.add_record([self.item])]
+
+    def memory_cost(self) -> int:
+        # Once undone, the item is only kept alive by the command
+        return 256 + 512
+
 class MoveCommand(QUndoCommand):
     def __init__(self, item, old_pos, new_pos):
         super().__init__()
         self.item = item
         self.old_pos = old_pos
         self.new_pos = new_pos
+        self.uids = RECORDS.uids([item])
         
         self.setText(f"Move {getattr(item, 'type_name', 'Item')}")
 
@@ -37,6 +68,10 @@ class MoveCommand(QUndoCommand):
     def undo(self):
         self.item.setPos(self.old_pos)
 
+    def to_journal(self, journal, undone: bool) -> list:
+        pos = self.old_pos if undone else self.new_pos
+        return [journal.move_record(self.uids, [pos.x(), pos.y()])]
+
 class DeleteCommand(QUndoCommand):
     def __init__(self, scene, item):
         super().__init__()
@@ -51,17 +86,23 @@ class DeleteCommand(QUndoCommand):
     def undo(self):
         self.scene.addItem(self.item)
 
+    def to_journal(self, journal, undone: bool) -> list:
+        if undone:
+            return [journal.add_record([self.item])]
+        return [journal.delete_record([self.item])]
+
+    def memory_cost(self) -> int:
+        # The deleted item stays alive as long as the command does
+        return 256 + 512
+
 class ChangeColorCommand(QUndoCommand):
     def __init__(self, item, new_color):
         super().__init__()
         self.item = item
         self.new_color = new_color
 
-        # Save old color for undo
-        if hasattr(item, "pen"):
-            self.old_color = item.pen().color().name()
-        else:
-            self.old_color = "#000000"
+        # Save old style for undo (shared object, nothing to re-parse)
+        self.old_style = getattr(item, "style", None)
 
         self.setText(f"Change Color to {new_color}")
 
@@ -70,18 +111,24 @@ class ChangeColorCommand(QUndoCommand):
             self.item.set_active_color(self.new_color)
 
     def undo(self):
-        if hasattr(self.item, "set_active_color"):
-            self.item.set_active_color(self.old_color)
+        if self.old_style is not None:
+            self.item.set_style(self.old_style)
+        elif hasattr(self.item, "set_active_color"):
+            self.item.set_active_color("#000000")
+
+    def to_journal(self, journal, undone: bool) -> list:
+        return [journal.style_record(leaf_shapes([self.item]))]
 
 class ChangeWidthCommand(QUndoCommand):
-    def __init__(self, item, new_width):
+    def __init__(self, item, new_width, gesture: EditGesture = None):
         super().__init__()
         self.item = item
         self.new_width = new_width
+        self.gesture = gesture
 
         # Save old width
-        if hasattr(item, "pen"):
-            self.old_width = item.pen().width()
+        if hasattr(item, "style"):
+            self.old_width = item.style.width
         else:
             self.old_width = 1
 
@@ -95,14 +142,33 @@ class ChangeWidthCommand(QUndoCommand):
         if hasattr(self.item, "set_stroke_width"):
             self.item.set_stroke_width(self.old_width)
 
+    def to_journal(self, journal, undone: bool) -> list:
+        return [journal.style_record(leaf_shapes([self.item]))]
+
+    def id(self):
+        return CHANGE_WIDTH_ID
+
+    def can_merge(self, other) -> bool:
+        return self.gesture is not None and other.gesture is self.gesture and other.item is self.item
+
+    def mergeWith(self, other):
+        # Keep our old value, take the newest target
+        if not self.can_merge(other):
+            return False
+        self.new_width = other.new_width
+        self.setText(other.text())
+        return True
+
 class ChangePosCommand(QUndoCommand):
-    def __init__(self, item, new_pos):
+    def __init__(self, item, new_pos, gesture: EditGesture = None):
         super().__init__()
         self.item = item
         self.new_pos = new_pos
+        self.gesture = gesture
 
         # Save old position
         self.old_pos = item.pos()
+        self.uids = RECORDS.uids([item])
 
         self.setText(f"Change Position to {new_pos}")
 
@@ -110,4 +176,431 @@ class ChangePosCommand(QUndoCommand):
         self.item.setPos(self.new_pos)
 
     def undo(self):
-        self.item.setPos(self.old_pos)
\ No newline at end of file
+        self.item.setPos(self.old_pos)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        pos = self.old_pos if undone else self.new_pos
+        return [journal.move_record(self.uids, [pos.x(), pos.y()])]
+
+    def id(self):
+        return CHANGE_POS_ID
+
+    def can_merge(self, other) -> bool:
+        return self.gesture is not None and other.gesture is self.gesture and other.item is self.item
+
+    def mergeWith(self, other):
+        if not self.can_merge(other):
+            return False
+        self.new_pos = other.new_pos
+        self.setText(other.text())
+        return True
+
+# --- Bulk commands ---
+# One command for a whole selection: items and values are kept in
+# parallel arrays instead of one QUndoCommand per item.
+
+def leaf_shapes(items):
+    """Expands groups into the shapes that actually carry a pen"""
+    leaves = []
+    stack = list(reversed(items))
+    while stack:
+        item = stack.pop()
+        if hasattr(item, "pen"):
+            leaves.append(item)
+        else:
+            if getattr(item, "is_lazy", False):
+                item.materialize()
+            stack.extend(reversed(item.childItems()))
+    return leaves
+
+class BulkMoveCommand(QUndoCommand):
+    def __init__(self, items, old_positions, new_positions, gesture: EditGesture = None):
+        """
+        :param old_positions: QPointF per item
+        :param new_positions: QPointF per item
+        """
+        super().__init__()
+        self.items = list(items)
+        self.old_xy = array('d')
+        self.new_xy = array('d')
+        for old, new in zip(old_positions, new_positions):
+            self.old_xy.extend((old.x(), old.y()))
+            self.new_xy.extend((new.x(), new.y()))
+        self.uids = RECORDS.uids(self.items)
+        self.gesture = gesture
+
+        self.setText(f"Move {len(self.items)} Items")
+
+    def _apply(self, xy):
+        for i, item in enumerate(self.items):
+            item.setPos(xy[2 * i], xy[2 * i + 1])
+
+    def redo(self):
+        self._apply(self.new_xy)
+
+    def undo(self):
+        self._apply(self.old_xy)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        xy = self.old_xy if undone else self.new_xy
+        return [journal.move_record(self.uids, xy.tolist())]
+
+    def memory_cost(self) -> int:
+        return 256 + len(self.items) * 48
+
+    def id(self):
+        return CHANGE_POS_ID
+
+    def can_merge(self, other) -> bool:
+        return (self.gesture is not None and getattr(other, "gesture", None) is self.gesture
+                and len(other.items) == len(self.items)
+                and all(a is b for a, b in zip(self.items, other.items)))
+
+    def mergeWith(self, other):
+        if not self.can_merge(other):
+            return False
+        self.new_xy = other.new_xy
+        self.setText(other.text())
+        return True
+
+class BulkDeleteCommand(QUndoCommand):
+    def __init__(self, scene, items):
+        super().__init__()
+        self.scene = scene
+        self.items = list(items)
+
+        self.setText(f"Delete {len(self.items)} Items")
+
+    def redo(self):
+        # Removing a selected item emits selectionChanged each time,
+        # listeners get a single notification at the end instead
+        blocked = self.scene.blockSignals(True)
+        try:
+            for item in self.items:
+                self.scene.removeItem(item)
+        finally:
+            self.scene.blockSignals(blocked)
+        self.scene.selectionChanged.emit()
+
+    def undo(self):
+        blocked = self.scene.blockSignals(True)
+        try:
+            for item in self.items:
+                self.scene.addItem(item)
+        finally:
+            self.scene.blockSignals(blocked)
+        self.scene.selectionChanged.emit()
+
+    def to_journal(self, journal, undone: bool) -> list:
+        if undone:
+            return [journal.add_record(self.items)]
+        return [journal.delete_record(self.items)]
+
+    def memory_cost(self) -> int:
+        # Deleted items stay alive as long as the command does
+        return 256 + len(self.items) * 512
+
+class BulkChangeColorCommand(QUndoCommand):
+    def __init__(self, items, new_color):
+        super().__init__()
+        self.items = leaf_shapes(items)
+        self.new_color = new_color
+        # Shared Style objects, resolved once per distinct old style
+        self.old_styles = [item.style for item in self.items]
+        targets = {}
+        for style in self.old_styles:
+            if style not in targets:
+                targets[style] = STYLES.intern(new_color, style.width)
+        self.new_styles = [targets[style] for style in self.old_styles]
+
+        self.setText(f"Change Color to {new_color}")
+
+    def redo(self):
+        for item, style in zip(self.items, self.new_styles):
+            item.set_style(style)
+
+    def undo(self):
+        for item, style in zip(self.items, self.old_styles):
+            item.set_style(style)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        return [journal.style_record(self.items)]
+
+    def memory_cost(self) -> int:
+        return 256 + len(self.items) * 24
+
+class BulkChangeWidthCommand(QUndoCommand):
+    def __init__(self, items, new_width, gesture: EditGesture = None):
+        super().__init__()
+        self.items = leaf_shapes(items)
+        self.new_width = new_width
+        self.old_styles = [item.style for item in self.items]
+        self.gesture = gesture
+
+        self.setText(f"Change Width to {new_width}")
+
+    def redo(self):
+        targets = {}
+        for item, style in zip(self.items, self.old_styles):
+            target = targets.get(style)
+            if target is None:
+                target = targets[style] = STYLES.intern(style.color, self.new_width)
+            item.set_style(target)
+
+    def undo(self):
+        for item, style in zip(self.items, self.old_styles):
+            item.set_style(style)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        return [journal.style_record(self.items)]
+
+    def memory_cost(self) -> int:
+        return 256 + len(self.items) * 16
+
+    def id(self):
+        return CHANGE_WIDTH_ID
+
+    def can_merge(self, other) -> bool:
+        return (self.gesture is not None and getattr(other, "gesture", None) is self.gesture
+                and len(other.items) == len(self.items)
+                and all(a is b for a, b in zip(self.items, other.items)))
+
+    def mergeWith(self, other):
+        if not self.can_merge(other):
+            return False
+        self.new_width = other.new_width
+        self.setText(other.text())
+        return True
+
+class BulkTransformCommand(QUndoCommand):
+    def __init__(self, items, old_state, new_state, text: str):
+        """
+        :param old_state: TransformState captured before the operation
+        :param new_state: TransformState computed by src.logic.transforms
+        """
+        super().__init__()
+        self.items = list(items)
+        self.old_state = old_state
+        self.new_state = new_state
+        self.uids = RECORDS.uids(self.items)
+
+        self.setText(text)
+
+    def redo(self):
+        self.new_state.apply(self.items)
+
+    def undo(self):
+        self.old_state.apply(self.items)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        state = self.old_state if undone else self.new_state
+        xy = state.xy.ravel().tolist()
+        # Align and distribute only capture positions
+        if state.positions_only:
+            return [journal.move_record(self.uids, xy)]
+        return [journal.transform_record(self.uids, xy, state.scale.tolist(), state.rotation.tolist())]
+
+    def memory_cost(self) -> int:
+        return 256 + len(self.items) * 16 + self.old_state.nbytes + self.new_state.nbytes
+
+
+# --- Grouping ---
+# Items move in and out of groups with setParentItem, in one pass and with
+# scene signals blocked; the group's bounds are computed once at the end.
+# addToGroup / removeFromGroup would recompute them for every item.
+
+def group_items(scene, group, items, state):
+    """
+    Puts top-level items into `group`, with the local transforms of `state`
+    (a TransformState). The group goes on top of the scene and is selected.
+    """
+    blocked = scene.blockSignals(True)
+    try:
+        for item in items:
+            item.setSelected(False)
+        if group.scene() is not scene:
+            scene.addItem(group)
+        for item in items:
+            item.setParentItem(group)
+            item.parent_group = group
+        state.apply(items)
+        group.update_bounds()
+        group.setSelected(True)
+    finally:
+        scene.blockSignals(blocked)
+    scene.selectionChanged.emit()
+
+def ungroup_items(scene, group, items, state):
+    """
+    Moves the children of `group` to the top level, with the transforms of
+    `state`, and takes the group out of the scene. The items are selected.
+    """
+    blocked = scene.blockSignals(True)
+    try:
+        # Out of the scene first: in PySide6 setParentItem(None) hands the
+        # items to Python, addItem gives them back to the scene
+        scene.removeItem(group)
+        for item in items:
+            item.setParentItem(None)
+            item.parent_group = None
+        for item in items:
+            scene.addItem(item)
+        state.apply(items)
+        for item in items:
+            item.setSelected(True)
+        group.update_bounds()
+    finally:
+        scene.blockSignals(blocked)
+    scene.selectionChanged.emit()
+
+class GroupCommand(QUndoCommand):
+    def __init__(self, scene, items):
+        """
+        :param items: Top-level items, in stacking order (bottom first)
+        """
+        super().__init__()
+        self.scene = scene
+        self.items = list(items)
+        # A new group has no transform: the items keep theirs inside it
+        self.group = Group()
+        self.state = TransformState.capture(self.items)
+
+        self.setText(f"Group {len(self.items)} Items")
+
+    def redo(self):
+        group_items(self.scene, self.group, self.items, self.state)
+
+    def undo(self):
+        ungroup_items(self.scene, self.group, self.items, self.state)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        if undone:
+            return [journal.ungroup_record(self.group, self.items)]
+        return [journal.group_record(self.group, self.items)]
+
+    def memory_cost(self) -> int:
+        return 512 + len(self.items) * 40 + self.state.nbytes
+
+class UngroupCommand(QUndoCommand):
+    def __init__(self, scene, groups):
+        """
+        :param groups: Top-level groups, built (see Group.materialize)
+        """
+        super().__init__()
+        self.scene = scene
+        self.groups = list(groups)
+        self.group_state = TransformState.capture(self.groups)
+        # Pixmap caching is turned off while ungrouped and comes back on undo
+        self.render_cached = [group.render_cached for group in self.groups]
+        self.children = []
+        self.inner_states = []  # transforms inside the group
+        self.outer_states = []  # transforms once ungrouped
+        for group in self.groups:
+            children = [item for item in group.childItems() if isinstance(item, Shape)]
+            self.children.append(children)
+            self.inner_states.append(TransformState.capture(children))
+            self.outer_states.append(ungrouped_state(group, children))
+
+        self.setText(f"Ungroup {len(self.groups)} Groups")
+
+    def redo(self):
+        for group, children, state in zip(self.groups, self.children, self.outer_states):
+            group.set_render_cached(False)
+            ungroup_items(self.scene, group, children, state)
+
+    def undo(self):
+        self.group_state.apply(self.groups)
+        for group, children, state, cached in zip(self.groups, self.children, self.inner_states, self.render_cached):
+            group_items(self.scene, group, children, state)
+            # Once the children are back: caching hides them
+            group.set_render_cached(cached)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        if undone:
+            return [journal.group_record(group, children) for group, children in zip(self.groups, self.children)]
+        return [journal.ungroup_record(group, children) for group, children in zip(self.groups, self.children)]
+
+    def memory_cost(self) -> int:
+        count = sum(len(children) for children in self.children)
+        return 512 * len(self.groups) + count * (40 + 2 * 32)
+
+def ungrouped_state(group, children) -> TransformState:
+    """
+    Transforms that keep `children` in place once taken out of `group`.
+    Rotation and uniform scale compose by adding and multiplying, so they
+    stay plain pos / rotation / scale values (to_dict writes nothing else).
+    """
+    n = len(children)
+    xy = np.array([group.mapToScene(item.pos()).toTuple() for item in children], dtype=float).reshape(n, 2)
+    scale = np.fromiter((item.scale() for item in children), float, n) * group.scale()
+    rotation = np.fromiter((item.rotation() for item in children), float, n) + group.rotation()
+    return TransformState(xy, scale, rotation)
+
+def replace_items(scene, old_items, new_items):
+    """Swaps top-level items, the new ones go on top and are selected"""
+    blocked = scene.blockSignals(True)
+    try:
+        for item in old_items:
+            scene.removeItem(item)
+        for item in new_items:
+            scene.addItem(item)
+            item.setSelected(True)
+    finally:
+        scene.blockSignals(blocked)
+    scene.selectionChanged.emit()
+
+def translated(data: dict, dx: float, dy: float) -> dict:
+    """A copy of a to_dict dictionary, moved by (dx, dy) in its parent"""
+    x, y = data.get("pos", (0.0, 0.0))
+    data = {**data, "pos": [x + dx, y + dy]}
+    props = data.get("props")
+    if props is not None and "x" in props:
+        # Rectangles and ellipses repeat their position in their props
+        data["props"] = {**props, "x": props["x"] + dx, "y": props["y"] + dy}
+    return data
+
+class MakeSymbolCommand(QUndoCommand):
+    def __init__(self, scene, groups):
+        """
+        Replaces top-level groups by instances of symbols with their content.
+        Groups with identical children share one definition.
+        """
+        super().__init__()
+        self.scene = scene
+        self.groups = list(groups)
+        self.instances = []
+        self.symbols = []  # definitions this command created
+        for group in self.groups:
+            # Symbol coordinates start at the children's bounds: a new group sits
+            # at the origin, so the same fixture drawn elsewhere would not match
+            offset = group.boundingRect().topLeft()
+            # Lazy groups write their loaded data, nothing is built
+            children = [translated(child, -offset.x(), -offset.y()) for child in group.to_dict()["children"]]
+            symbol = SYMBOLS.find(children)
+            if symbol is None:
+                symbol = SYMBOLS.define(SYMBOLS.unique_name(), children)
+                self.symbols.append(symbol)
+            instance = SymbolInstance(symbol)
+            instance.setPos(group.mapToParent(offset))
+            instance.setRotation(group.rotation())
+            instance.setScale(group.scale())
+            self.instances.append(instance)
+
+        self.setText(f"Make {len(self.symbols)} Symbol(s) from {len(self.groups)} Groups")
+
+    def redo(self):
+        replace_items(self.scene, self.groups, self.instances)
+
+    def undo(self):
+        # Definitions stay in the library for redo, collect() skips unused ones
+        replace_items(self.scene, self.instances, self.groups)
+
+    def to_journal(self, journal, undone: bool) -> list:
+        if undone:
+            return [journal.delete_record(self.instances), journal.add_record(self.groups)]
+        records = [journal.symbols_record(self.symbols)] if self.symbols else []
+        return records + [journal.delete_record(self.groups), journal.add_record(self.instances)]
+
+    def memory_cost(self) -> int:
+        # The removed groups stay alive as long as the command does
+        return 512 + len(self.groups) * (512 + 256)
@@ -0,0 +1,76 @@
+import gzip
+import lzma
+import zlib
+
+class Compression:
+    """
+    Compressed project containers, with the codecs of the standard library.
+    A compressed project is a plain JSON project run through gzip or xz.
+    It is recognized on load by its magic bytes, whatever its file name,
+    and (de)compressed on the fly: the decoded text is never held whole.
+    """
+
+    NONE = "none"
+    GZIP = "gzip"
+    LZMA = "lzma"
+    METHODS = (NONE, GZIP, LZMA)
+
+    MAGIC = {
+        GZIP: b"\x1f\x8b",
+        LZMA: b"\xfd7zXZ\x00",
+    }
+    # Levels run from 0 (fastest) to 9 (smallest). zlib's and xz's defaults:
+    # gzip 9 is barely smaller than 6 and much slower to write
+    DEFAULT_LEVEL = {GZIP: 6, LZMA: 6}
+    # File name suffixes offered by the save dialog
+    SUFFIXES = {".gz": GZIP, ".xz": LZMA}
+    # Raised by the decoders on a damaged or truncated stream
+    ERRORS = (EOFError, zlib.error, gzip.BadGzipFile, lzma.LZMAError)
+
+    @staticmethod
+    def detect(raw) -> str:
+        """Codec of a binary file object, read from its first bytes (position kept)"""
+        start = raw.tell()
+        head = raw.read(max(len(magic) for magic in Compression.MAGIC.values()))
+        raw.seek(start)
+        for method, magic in Compression.MAGIC.items():
+            if head.startswith(magic):
+                return method
+        return Compression.NONE
+
+    @staticmethod
+    def from_suffix(filename: str) -> str:
+        for suffix, method in Compression.SUFFIXES.items():
+            if filename.lower().endswith(suffix):
+                return method
+        return Compression.NONE
+
+    @staticmethod
+    def reader(raw):
+        """Binary file object of the decoded contents of `raw`"""
+        method = Compression.detect(raw)
+        if method == Compression.GZIP:
+            return gzip.GzipFile(fileobj=raw, mode="rb")
+        if method == Compression.LZMA:
+            return lzma.LZMAFile(raw, mode="rb")
+        return raw
+
+    @staticmethod
+    def writer(raw, method: str = NONE, level: int = None):
+        """
+        Binary file object compressing into `raw`. Closing it ends the
+        compressed stream, `raw` itself stays open.
+        :param level: 0 (fastest) to 9 (smallest), None for the codec's default
+        """
+        if method == Compression.NONE:
+            return raw
+        if method not in Compression.METHODS:
+            raise ValueError(f"Unknown compression: {method}")
+        if level is None:
+            level = Compression.DEFAULT_LEVEL[method]
+        if not 0 <= level <= 9:
+            raise ValueError(f"Compression level out of range: {level}")
+        if method == Compression.GZIP:
+            # No timestamp: the same project always gives the same bytes
+            return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level, mtime=0)
+        return lzma.LZMAFile(raw, mode="wb", preset=level)
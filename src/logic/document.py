@@ -0,0 +1,597 @@
+from array import array
+
+import numpy as np
+
+from src.logic.binary_format import BinaryFormat
+from src.logic.io_manager import FileManager
+from src.logic.simplify import pack_points, unpack_points
+from src.logic.symbols import used_symbols
+
+class DocumentModel:
+    """
+    Headless copy of the document: one row per shape, one column per
+    attribute (structure of arrays), no Qt objects.
+
+        kind    uint8      index into BinaryFormat.KINDS
+        parent  int32      row of the parent group, -1 at top level
+        pos     float64 x2 position in the parent
+        geom    float64 x4 the geometry props (see BinaryFormat.GEOMETRY_KEYS),
+                           a polyline's point bounds; its points are in `points`,
+                           a group's saved bounds (NaN when unknown, see Group.set_lazy),
+                           a symbol instance's definition bounds; its name is in `instances`
+        xform   float64 x2 rotation, scale
+        style   int32      index into `styles`
+        uid     int64      the shape's record uid (see src.logic.records)
+        order   int64      stacking order, as in the scene
+
+    The editor keeps it in sync with the scene (EditorCanvas.sync_document):
+    every command is replayed on it as change records, edits without
+    records rebuild it. Serializers and batch tools can run from the model
+    alone, without building any graphics item:
+
+        model = DocumentModel.load("big.vecb")
+        JsonSaveStrategy().write("big.json", model.to_data())
+
+    Rows are only appended, so a group always comes before its children.
+    Deleted rows are marked dead, re-adding a deleted shape (undo) revives
+    its rows on top. Dead rows are dropped when new rows are appended while
+    they outnumber the live ones twice.
+    """
+
+    KINDS = BinaryFormat.KINDS
+    GEOMETRY_KEYS = BinaryFormat.GEOMETRY_KEYS
+
+    # Column name -> (array typecode, values per row)
+    COLUMNS = {
+        "uid": ('q', 1), "kind": ('B', 1), "parent": ('i', 1), "depth": ('i', 1),
+        "alive": ('B', 1), "style": ('i', 1), "order": ('q', 1),
+        "pos": ('d', 2), "geom": ('d', 4), "xform": ('d', 2),
+    }
+
+    # Dead rows are never compacted away below this count
+    COMPACT_MIN_ROWS = 4096
+
+    def __init__(self):
+        self.listeners = []  # called with the applied records, None after a reset
+        self._clear()
+
+    def _clear(self):
+        # Append-only columns: array.append is cheap, NumPy views are
+        # taken per operation (a live view would block appends)
+        for name, (code, _) in self.COLUMNS.items():
+            setattr(self, "_" + name, array(code))
+        self.points = {}     # row -> array('d') of a polyline
+        self.instances = {}  # row -> symbol name of an instance
+        self.symbols = {}    # symbol name -> definition tree (to_dict dictionaries)
+        self._symbol_bounds = {}
+        self.rows = {}       # uid -> row
+        self.styles = []     # (color, width, name)
+        self._style_ids = {}
+        self.named_styles = []
+        self.width = 800
+        self.height = 600
+        self.dead = 0
+        self.next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._kind) - self.dead
+
+    # --- Building ---
+    def reset(self, data: dict = None):
+        """Replaces the whole content (a project dictionary, see SaveStrategy.collect)"""
+        self._clear()
+        if data is not None:
+            self._load(data)
+        self._notify(None)
+
+    @staticmethod
+    def from_data(data: dict) -> "DocumentModel":
+        model = DocumentModel()
+        model._load(data)
+        return model
+
+    @staticmethod
+    def load(filename: str) -> "DocumentModel":
+        """Reads a project file (JSON or binary) straight into columns"""
+        model = DocumentModel()
+        columns = FileManager.project_columns(filename)
+        if columns is not None:
+            model.add_columns(columns)
+            return model
+        for key, value in FileManager.stream_project(filename):
+            model.add_event(key, value)
+        return model
+
+    def _load(self, data: dict):
+        for key in ("scene", "styles", "symbols"):
+            if key in data:
+                self.add_event(key, data[key])
+        for shape in data.get("shapes", []):
+            self.add_shape(shape)
+
+    def add_event(self, key, value):
+        """Applies one (key, value) project event, as the loader does on the scene"""
+        if key == "scene":
+            self.width = value.get("width", 800)
+            self.height = value.get("height", 600)
+        elif key == "styles":
+            for style in value:
+                self._named(style["name"], style.get("color", "black"), style.get("stroke_width", 2))
+        elif key == "symbols":
+            for symbol in value:
+                self.define_symbol(symbol["name"], symbol.get("children", []))
+        elif key == "shapes":
+            self.add_shape(value)
+
+    def add_shape(self, data: dict):
+        """Appends a shape tree (a to_dict dictionary) as top-level rows"""
+        kind_ids = {name: i for i, name in enumerate(self.KINDS)}
+
+        # Explicit stack instead of recursion: nested groups can be deep
+        stack = [(data, -1)]
+        while stack:
+            shape, parent = stack.pop()
+            shape_type = shape.get("type")
+            if shape_type not in kind_ids:
+                raise ValueError(f"Unknown type: {shape_type}")
+
+            row = len(self._kind)
+            uid = shape.get("uid", 0)
+            if uid:
+                self.rows[uid] = row
+            self._uid.append(uid)
+            self._kind.append(kind_ids[shape_type])
+            self._parent.append(parent)
+            self._depth.append(self._depth[parent] + 1 if parent >= 0 else 0)
+            self._alive.append(1)
+            self._order.append(self.next_order)
+            self.next_order += 1
+            self._pos.extend(shape.get("pos", [0, 0]))
+            self._xform.extend((shape.get("rotation", 0.0), shape.get("scale", 1.0)))
+
+            if shape_type == "group":
+                self._style.append(-1)
+                self._geom.extend(shape.get("bounds") or BinaryFormat.NO_BOUNDS)
+                for child in reversed(shape.get("children", [])):
+                    stack.append((child, row))
+                continue
+            if shape_type == "symbol":
+                self._style.append(-1)
+                self.instances[row] = shape["symbol"]
+                self._geom.extend(self.symbol_bounds(shape["symbol"]))
+                continue
+
+            props = shape.get("props", {})
+            self._style.append(self._style_id(props.get("color", "black"), props.get("stroke_width", 2),
+                                              props.get("style", "")))
+            if shape_type == "polyline":
+                points = unpack_points(props["points"])
+                self.points[row] = points
+                xs, ys = points[0::2], points[1::2]
+                self._geom.extend((min(xs), min(ys), max(xs), max(ys)) if points else (0.0, 0.0, 0.0, 0.0))
+            else:
+                self._geom.extend(props[k] for k in self.GEOMETRY_KEYS[shape_type])
+
+    def add_columns(self, columns, first_uid: int = 0) -> int:
+        """
+        Takes over the tables of a binary project (see BinaryColumns): one
+        copy per column, no dictionary per shape. Its shapes get the uids
+        first_uid, first_uid + 1, ... in row order (no uids if 0).
+        Returns the row of the first shape.
+        """
+        self.width = columns.width
+        self.height = columns.height
+        for style in columns.named_styles():
+            self._named(style["name"], style["color"], style["stroke_width"])
+        for symbol in columns.definitions():
+            self.define_symbol(symbol["name"], symbol["children"])
+
+        start = columns.first
+        count = len(columns) - start
+        base = len(self._kind)
+        kind = columns.kind[start:]
+        parent = columns.parent[start:].astype(np.int64)
+        style_ids = np.array([self._style_id(*style) for style in columns.styles] or [0], dtype=np.int32)
+        style = columns.style[start:]
+        # The geometry of polylines, symbols and groups saved without bounds is rewritten below
+        geom = columns.geom[start:].copy()
+
+        # Group bounds are only in newer files, zeros otherwise
+        groups = np.flatnonzero(kind == self.KINDS.index("group"))
+        if not columns.has_bounds:
+            geom[groups] = np.nan
+
+        polylines = np.flatnonzero(kind == self.KINDS.index("polyline"))
+        if len(polylines):
+            points = columns.points
+            ranges = geom[polylines, :2].astype(np.int64)
+            for row, (first, size) in zip(polylines.tolist(), ranges.tolist()):
+                xy = points[first:first + size]
+                self.points[base + row] = array('d', xy.tobytes())
+                geom[row] = (tuple(xy.min(axis=0)) + tuple(xy.max(axis=0))) if size else (0.0, 0.0, 0.0, 0.0)
+
+        instances = np.flatnonzero(kind == self.KINDS.index("symbol"))
+        for row, definition in zip(instances.tolist(), geom[instances, 0].astype(np.int64).tolist()):
+            name = columns.symbol_names[definition]
+            self.instances[base + row] = name
+            geom[row] = self.symbol_bounds(name)
+
+        depth = columns.depth()[start:]
+        self._kind.frombytes(kind.tobytes())
+        self._parent.frombytes(np.where(parent >= 0, parent - start + base, -1).astype(np.int32).tobytes())
+        self._depth.frombytes(depth.astype(np.int32).tobytes())
+        self._alive.frombytes(np.ones(count, dtype=np.uint8).tobytes())
+        self._style.frombytes(np.where(style >= 0, style_ids[np.maximum(style, 0)], -1).astype(np.int32).tobytes())
+        self._order.frombytes(np.arange(self.next_order, self.next_order + count, dtype=np.int64).tobytes())
+        self.next_order += count
+        self._pos.frombytes(columns.pos[start:].tobytes())
+        self._geom.frombytes(geom.tobytes())
+        if columns.xform is not None:
+            self._xform.frombytes(columns.xform[start:].tobytes())
+        else:
+            self._xform.frombytes(np.tile([0.0, 1.0], count).tobytes())
+
+        uids = np.arange(first_uid, first_uid + count, dtype=np.int64) if first_uid else np.zeros(count, dtype=np.int64)
+        self._uid.frombytes(uids.tobytes())
+        if first_uid:
+            self.rows.update(zip(uids.tolist(), range(base, base + count)))
+        return base
+
+    def _style_id(self, color: str, width: int, name: str) -> int:
+        key = (color, width, name or "")
+        style_id = self._style_ids.get(key)
+        if style_id is None:
+            style_id = self._style_ids[key] = len(self.styles)
+            self.styles.append(key)
+            if name:
+                self._named(name, color, width)
+        return style_id
+
+    def define_symbol(self, name: str, children: list):
+        self.symbols[name] = children
+        self._symbol_bounds.pop(name, None)
+
+    def symbol_bounds(self, name: str) -> tuple:
+        """left, top, right, bottom of a definition in symbol coordinates, pens included"""
+        bounds = self._symbol_bounds.get(name)
+        if bounds is None:
+            if name not in self.symbols:
+                raise ValueError(f"Unknown symbol: {name}")
+            # The definition as a document of its own, nested symbols included
+            tree = DocumentModel()
+            tree.symbols = self.symbols
+            tree._symbol_bounds = self._symbol_bounds
+            for child in self.symbols[name]:
+                tree.add_shape(child)
+            _, rects = tree.top_level_bounds()
+            bounds = (tuple(rects[:, :2].min(axis=0)) + tuple(rects[:, 2:].max(axis=0))) if len(rects) \
+                else (0.0, 0.0, 0.0, 0.0)
+            self._symbol_bounds[name] = bounds = tuple(float(value) for value in bounds)
+        return bounds
+
+    def _named(self, name: str, color: str, width: int):
+        if all(style["name"] != name for style in self.named_styles):
+            self.named_styles.append({"name": name, "color": color, "stroke_width": width})
+
+    # --- Sync ---
+    def apply(self, records: list):
+        """Replays change records (see src.logic.records) on the columns"""
+        for record in records:
+            self._apply(record)
+        self._notify(records)
+
+    def _notify(self, records):
+        for listener in self.listeners:
+            listener(records)
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        if op == "symbols":
+            self.add_event("symbols", record["symbols"])
+            return
+        if op == "add":
+            if self.dead > max(self.COMPACT_MIN_ROWS, 2 * len(self)) and any(
+                    shape.get("uid") not in self.rows for shape in record["shapes"]):
+                self.compact()
+            revived = []
+            for shape in record["shapes"]:
+                old = self.rows.get(shape.get("uid"))
+                if old is None:
+                    self.add_shape(shape)
+                elif not self._alive[old]:
+                    # Shapes out of the scene cannot change: same rows, put on top
+                    revived.append(old)
+                else:
+                    self._kill([old])
+                    self.add_shape(shape)
+            if revived:
+                self._revive(revived)
+            return
+
+        rows = [self.rows.get(uid) for uid in record["uids"]]
+        if any(row is None for row in rows):
+            print(f"Document record '{op}' refers to unknown shapes, skipped")
+            return
+
+        if op == "delete":
+            self._kill(rows)
+        elif op in ("move", "transform"):
+            pos = self.column("pos")
+            pos[rows] = np.asarray(record["xy"], dtype=float).reshape(-1, 2)
+            if op == "transform":
+                xform = self.column("xform")
+                xform[rows, 0] = record["rotation"]
+                xform[rows, 1] = record["scale"]
+        elif op == "style":
+            style = self.column("style")
+            old = style[rows].tolist()
+            new = [self._style_id(color, width, name) for color, width, name in record["styles"]]
+            style[rows] = new
+            resized = [row for row, a, b in zip(rows, old, new) if self.styles[a][1] != self.styles[b][1]]
+            if resized:
+                self._drop_bounds(resized)
+        elif op == "group":
+            self._group(record, rows)
+        elif op == "ungroup":
+            self._ungroup(record, rows)
+        else:
+            print(f"Unknown document record '{op}', skipped")
+
+    def _group(self, record: dict, rows: list):
+        """The trees at `rows` move into a group, rebuilt as new rows on top"""
+        children = self._subtrees(rows, record)
+        x, y, rotation, scale = record["transform"]
+        group = {"type": "group", "uid": record["group"], "bounds": record["bounds"], "children": children}
+        self._set_transform(group, x, y, rotation, scale)
+        old = self.rows.get(record["group"])
+        self._kill(rows if old is None else rows + [old])
+        self.add_shape(group)
+
+    def _ungroup(self, record: dict, rows: list):
+        """The trees at `rows` leave their group for the top level, the group dies"""
+        children = self._subtrees(rows, record)
+        self._kill([self.rows[record["group"]]])
+        for child in children:
+            self.add_shape(child)
+
+    def _subtrees(self, rows: list, record: dict) -> list:
+        """Dictionaries of the trees at `rows`, with the transforms of a transform record"""
+        parent = self.column("parent")
+        alive = self.column("alive") == 1
+        tree = [np.asarray(rows, dtype=np.int64)]
+        while len(tree[-1]):
+            tree.append(np.nonzero(np.isin(parent, tree[-1]) & alive)[0])
+        tree = np.concatenate(tree)
+        tree = tree[np.argsort(self.column("order")[tree], kind="stable")]
+
+        nodes = self._build(tree.tolist(), uids=True)
+        children = [nodes[row] for row in rows]
+        xy = record["xy"]
+        for i, (child, rotation, scale) in enumerate(zip(children, record["rotation"], record["scale"])):
+            self._set_transform(child, xy[2 * i], xy[2 * i + 1], rotation, scale)
+        return children
+
+    @staticmethod
+    def _set_transform(shape: dict, x: float, y: float, rotation: float, scale: float):
+        shape["pos"] = [x, y]
+        shape.pop("rotation", None)
+        shape.pop("scale", None)
+        if rotation:
+            shape["rotation"] = rotation
+        if scale != 1.0:
+            shape["scale"] = scale
+
+    def _drop_bounds(self, rows):
+        """A pen width changed: the saved bounds of the enclosing groups are stale"""
+        geom = self.column("geom")
+        parent = self.column("parent")
+        groups = parent[np.asarray(rows, dtype=np.int64)]
+        groups = np.unique(groups[groups >= 0])
+        while len(groups):
+            geom[groups] = np.nan
+            groups = parent[groups]
+            groups = np.unique(groups[groups >= 0])
+
+    def _kill(self, rows):
+        """Marks rows and everything they contain as dead"""
+        alive = self.column("alive")
+        parent = self.column("parent")
+        rows = np.asarray(rows, dtype=np.int64)
+        while len(rows):
+            rows = rows[alive[rows] == 1]
+            alive[rows] = 0
+            self.dead += len(rows)
+            children = np.isin(parent, rows) & (alive == 1)
+            rows = np.nonzero(children)[0]
+
+    def _revive(self, roots: list):
+        """Brings dead shape trees back, stacked on top in the given order"""
+        alive = self.column("alive")
+        parent = self.column("parent")
+        order = self.column("order")
+
+        # Every row of a tree takes the rank of its root
+        rank = np.full(len(alive), -1, dtype=np.int64)
+        rows = np.asarray(roots, dtype=np.int64)
+        rank[rows] = np.arange(len(rows))
+        while len(rows):
+            rows = np.nonzero(np.isin(parent, rows))[0]
+            rank[rows] = rank[parent[rows]]
+        tree = np.nonzero(rank >= 0)[0]
+        # By root, then by row: rows are in pre-order, children keep following their group
+        tree = tree[np.lexsort((tree, rank[tree]))]
+
+        alive[tree] = 1
+        self.dead -= len(tree)
+        order[tree] = np.arange(self.next_order, self.next_order + len(tree))
+        self.next_order += len(tree)
+
+    def compact(self):
+        """Drops the dead rows (row numbers change, uids stay)"""
+        data = self.to_data(uids=True)
+        self._clear()
+        self._load(data)
+
+    # --- Columns ---
+    def column(self, name: str) -> np.ndarray:
+        """
+        NumPy view of a column, writable in place. Only valid until the
+        next shape is added: keep it local, or copy it.
+        """
+        code, per_row = self.COLUMNS[name]
+        view = np.frombuffer(getattr(self, "_" + name), dtype=code)
+        return view.reshape(-1, per_row) if per_row > 1 else view
+
+    def live_rows(self) -> np.ndarray:
+        return np.nonzero(self.column("alive"))[0]
+
+    def top_level_bounds(self):
+        """
+        Scene bounds of the live top-level shapes, pen included.
+        Returns (uids int64 (n,), float64 (n, 4) left, top, right, bottom).
+        """
+        n = len(self._kind)
+        kind = self.column("kind")
+        parent = self.column("parent")
+        depth = self.column("depth")
+        pos = self.column("pos")
+        geom = self.column("geom")
+        xform = self.column("xform")
+        live = self.column("alive") == 1
+
+        # Item transform of every row: scale and rotate, then translate by pos
+        theta = np.radians(xform[:, 0])
+        scale = xform[:, 1]
+        m = np.empty((n, 6))
+        m[:, 0] = np.cos(theta) * scale   # x' = m0 x + m2 y + m4
+        m[:, 1] = np.sin(theta) * scale   # y' = m1 x + m3 y + m5
+        m[:, 2] = -m[:, 1]
+        m[:, 3] = m[:, 0]
+        m[:, 4:] = pos
+        root = np.arange(n)
+
+        # Compose with the parents, one nesting level at a time
+        for level in range(1, int(depth.max(initial=0)) + 1):
+            rows = np.nonzero(depth == level)[0]
+            p = m[parent[rows]]
+            c = m[rows]
+            m[rows] = np.stack([
+                p[:, 0] * c[:, 0] + p[:, 2] * c[:, 1], p[:, 1] * c[:, 0] + p[:, 3] * c[:, 1],
+                p[:, 0] * c[:, 2] + p[:, 2] * c[:, 3], p[:, 1] * c[:, 2] + p[:, 3] * c[:, 3],
+                p[:, 0] * c[:, 4] + p[:, 2] * c[:, 5] + p[:, 4], p[:, 1] * c[:, 4] + p[:, 3] * c[:, 5] + p[:, 5],
+            ], axis=1)
+            root[rows] = root[parent[rows]]
+
+        # Local bounds of the shapes that draw something
+        local = geom.copy()
+        box = (kind == self.KINDS.index("rect")) | (kind == self.KINDS.index("ellipse"))
+        local[box, 0:2] = 0.0
+        local[box, 2:4] = geom[box, 2:4]
+        line = kind == self.KINDS.index("line")
+        local[line] = np.stack([np.minimum(geom[line, 0], geom[line, 2]), np.minimum(geom[line, 1], geom[line, 3]),
+                                np.maximum(geom[line, 0], geom[line, 2]), np.maximum(geom[line, 1], geom[line, 3])],
+                               axis=1)
+        widths = np.array([width for _, width, _ in self.styles] or [0], dtype=float)
+        half_pen = widths[self.column("style")] / 2
+        # A symbol's bounds include its pens already
+        half_pen[kind == self.KINDS.index("symbol")] = 0.0
+        local += np.stack([-half_pen, -half_pen, half_pen, half_pen], axis=1)
+
+        leaves = np.nonzero(live & (kind != self.KINDS.index("group")))[0]
+        ml, lb = m[leaves], local[leaves]
+        xs = [ml[:, 0] * lb[:, cx] + ml[:, 2] * lb[:, cy] + ml[:, 4] for cx, cy in ((0, 1), (2, 1), (0, 3), (2, 3))]
+        ys = [ml[:, 1] * lb[:, cx] + ml[:, 3] * lb[:, cy] + ml[:, 5] for cx, cy in ((0, 1), (2, 1), (0, 3), (2, 3))]
+
+        # Reduce the leaves onto their top-level shape
+        bounds = np.full((n, 4), np.inf)
+        bounds[:, 2:] = -np.inf
+        owner = root[leaves]
+        np.minimum.at(bounds[:, 0], owner, np.minimum.reduce(xs))
+        np.minimum.at(bounds[:, 1], owner, np.minimum.reduce(ys))
+        np.maximum.at(bounds[:, 2], owner, np.maximum.reduce(xs))
+        np.maximum.at(bounds[:, 3], owner, np.maximum.reduce(ys))
+
+        # Empty groups have no bounds
+        top = np.nonzero(live & (parent == -1) & np.isfinite(bounds[:, 0]))[0]
+        return self.column("uid")[top].copy(), bounds[top]
+
+    def query(self, left: float, top: float, right: float, bottom: float) -> np.ndarray:
+        """uids of the top-level shapes whose bounds intersect the rectangle"""
+        uids, bounds = self.top_level_bounds()
+        hit = (bounds[:, 0] <= right) & (bounds[:, 2] >= left) & (bounds[:, 1] <= bottom) & (bounds[:, 3] >= top)
+        return uids[hit]
+
+    # --- Export ---
+    def to_data(self, uids: bool = False) -> dict:
+        """The project dictionary, as SaveStrategy.collect builds it from the scene"""
+        data = {
+            "version": "1.0",
+            "scene": {"width": self.width, "height": self.height},
+        }
+        if self.named_styles:
+            data["styles"] = [dict(style) for style in self.named_styles]
+
+        # Stacking order; within one add, rows are in pre-order so children follow their group
+        live = self.live_rows()
+        rows = live[np.argsort(self.column("order")[live], kind="stable")].tolist()
+        # Plain lists: much cheaper to index per row than arrays
+        columns = [getattr(self, f"_{name}").tolist()
+                   for name in ("kind", "parent", "style", "uid", "pos", "geom", "xform")]
+        nodes = self._build(rows, uids, columns)
+        parent = columns[1]
+        shapes = [nodes[row] for row in rows if parent[row] < 0]
+        # Definitions no instance places anymore are not written, as in collect()
+        used = used_symbols(shapes, self.symbols) if self.symbols else []
+        if used:
+            data["symbols"] = [{"name": name, "children": self.symbols[name]} for name in used]
+        data["shapes"] = shapes
+        return data
+
+    def _build(self, rows: list, uids: bool, columns=None) -> dict:
+        """
+        Shape dictionaries of whole trees, `rows` listing parents before children.
+        Returns row -> dictionary, with the children filled in.
+        """
+        kind, parent, style, uid, pos, geom, xform = columns or (
+            self._kind, self._parent, self._style, self._uid, self._pos, self._geom, self._xform)
+        kinds = self.KINDS
+        keys = self.GEOMETRY_KEYS
+        nodes = {}
+        for row in rows:
+            shape_type = kinds[kind[row]]
+            x, y = pos[2 * row], pos[2 * row + 1]
+            shape = {"type": shape_type, "pos": [x, y]}
+            rotation, scale = xform[2 * row], xform[2 * row + 1]
+            if rotation:
+                shape["rotation"] = rotation
+            if scale != 1.0:
+                shape["scale"] = scale
+
+            g = list(geom[4 * row:4 * row + 4])
+            if shape_type == "group":
+                if g[0] == g[0]:  # NaN: unknown
+                    shape["bounds"] = g
+                shape["children"] = []
+            elif shape_type == "symbol":
+                shape["symbol"] = self.instances[row]
+            else:
+                if shape_type == "polyline":
+                    props = {"points": pack_points(self.points[row])}
+                elif shape_type == "line":
+                    props = dict(zip(keys[shape_type], g))
+                else:
+                    # Rectangles and ellipses write their position as x, y
+                    props = {"x": x, "y": y, "w": g[2], "h": g[3]}
+                color, width, name = self.styles[style[row]]
+                props["color"] = color
+                props["stroke_width"] = width
+                if name:
+                    props["style"] = name
+                shape["props"] = props
+
+            if uids and uid[row]:
+                shape["uid"] = uid[row]
+            nodes[row] = shape
+            if parent[row] in nodes:
+                nodes[parent[row]]["children"].append(shape)
+        return nodes
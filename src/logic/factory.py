@@ -1,4 +1,12 @@
-from src.logic.shapes import Rectangle, Line, Ellipse, Group
+from array import array
+
+from PySide6.QtCore import QRectF
+
+from src.logic.binary_format import BinaryFormat
+from src.logic.shapes import Rectangle, Line, Ellipse, Polyline, Group, SymbolInstance
+from src.logic.styles import STYLES
+from src.logic.symbols import SYMBOLS
+from src.logic.simplify import unpack_points
 
 class ShapeFactory:
     @staticmethod
@@ -27,38 +35,75 @@ class ShapeFactory:
         else:
             raise ValueError(f"Unknown shape type: {shape_type}")
 
+    @staticmethod
+    def create_polyline(points, color: str):
+        """Creates a freehand stroke from flat x, y scene points"""
+        if len(points) < 4:
+            raise ValueError("A polyline needs at least two points")
+        return Polyline(points, color)
+
     @staticmethod
     def from_dict(data: dict):
         """Recursively restores object tree"""
         shape_type = data.get("type")
 
         if shape_type == "group":
-            return ShapeFactory._create_group(data)
-        elif shape_type in ["rect", "line", "ellipse"]:
-            return ShapeFactory._create_primitive(data)
+            obj = ShapeFactory._create_group(data)
+        elif shape_type in ["rect", "line", "ellipse", "polyline"]:
+            obj = ShapeFactory._create_primitive(data)
+        elif shape_type == "symbol":
+            obj = ShapeFactory._create_instance(data)
         else:
             raise ValueError(f"Unknown type: {shape_type}")
 
+        # Optional, absent in files without transforms
+        if "rotation" in data:
+            obj.setRotation(data["rotation"])
+        if "scale" in data:
+            obj.setScale(data["scale"])
+        return obj
+
     @staticmethod
     def _create_primitive(data: dict):
         props = data.get("props", {})
         shape_type = data.get("type")
 
+        color = props.get("color", "black")
+        stroke_width = props.get("stroke_width", 2)
+
         if shape_type == "rect":
-            color = props.get("color", "black")
-            obj = Rectangle(props['x'], props['y'], props['w'], props['h'], color)
+            obj = Rectangle(props['x'], props['y'], props['w'], props['h'], color, stroke_width)
         elif shape_type == "line":
-            color = props.get("color", "black")
-            obj = Line(props['x1'], props['y1'], props['x2'], props['y2'], color)
+            obj = Line(props['x1'], props['y1'], props['x2'], props['y2'], color, stroke_width)
         elif shape_type == "ellipse":
-             color = props.get("color", "black")
-             obj = Ellipse(props['x'], props['y'], props['w'], props['h'], color)
+            obj = Ellipse(props['x'], props['y'], props['w'], props['h'], color, stroke_width)
+        elif shape_type == "polyline":
+            obj = Polyline(unpack_points(props['points']), color, stroke_width)
+
+        style_name = props.get("style")
+        if style_name:
+            obj.set_style(ShapeFactory.named_style(style_name, color, stroke_width))
 
         if "pos" in data:
             obj.setPos(data["pos"][0], data["pos"][1])
 
         return obj
 
+    @staticmethod
+    def named_style(name: str, color: str, stroke_width: int):
+        """The style of a loaded shape: the document's own if defined, else defined from the shape"""
+        return STYLES.get(name) or STYLES.define(name, color, stroke_width)
+
+    @staticmethod
+    def _create_instance(data: dict):
+        symbol = SYMBOLS.get(data.get("symbol"))
+        if symbol is None:
+            raise ValueError(f"Unknown symbol: {data.get('symbol')}")
+        obj = SymbolInstance(symbol)
+        x, y = data.get("pos", [0, 0])
+        obj.setPos(x, y)
+        return obj
+
     @staticmethod
     def _create_group(data: dict):
         group = Group()
@@ -67,12 +112,146 @@ class ShapeFactory:
         group.setPos(x, y)
 
         children_data = data.get("children", [])
+        bounds = data.get("bounds")
+        if bounds and children_data:
+            # Saved with its bounds: the children are built on first use
+            left, top, right, bottom = bounds
+            group.set_lazy(children_data, QRectF(left, top, right - left, bottom - top))
+            return group
+
         for child_dict in children_data:
             child_item = ShapeFactory.from_dict(child_dict)
+            # setParentItem keeps the local position and transform. addToGroup
+            # would map them from the scene, and Qt's childrenBoundingRect()
+            # keeps that mapping even once the position is set back
+            child_item.setParentItem(group)
+            child_item.parent_group = group
+        group.update_bounds()
+
+        return group
+
+class ColumnFactory:
+    """
+    Builds shape items straight from the tables of a binary project (see
+    BinaryColumns), without the dictionaries from_dict goes through.
+    One top-level tree per build(), so loaders can slice the work.
+    The children of groups saved with their bounds stay serialized, as
+    from_dict leaves them (see Group.set_lazy).
+    """
+
+    def __init__(self, columns, first_uid: int = 0):
+        """
+        :param first_uid: journal uid of the first shape row, the next rows
+            count up from it, as in DocumentModel.add_columns (0: no uids)
+        """
+        self.columns = columns
+        self.first_uid = first_uid
+        # Plain lists: much cheaper to index per row than arrays
+        self.kind = columns.kind.tolist()
+        self.parent = columns.parent.tolist()
+        self.style = columns.style.tolist()
+        self.pos = columns.pos.ravel().tolist()
+        self.geom = columns.geom.ravel().tolist()
+        self.xform = columns.xform.ravel().tolist() if columns.xform is not None else None
+        self.ends = columns.subtree_ends().tolist()
+        # Per style table entry: color, width, and the named style if any
+        self.styles = [(color, width, ShapeFactory.named_style(name, color, width) if name else None)
+                       for color, width, name in columns.styles]
+        # (row, group) of the groups of the last build() whose bounds the file did not have
+        self.unbounded = []
+
+    def uid(self, row: int) -> int:
+        return self.first_uid + row - self.columns.first
 
-            group.addToGroup(child_item)
+    def build(self, row: int):
+        """The item tree of the top-level shape at `row`"""
+        group_kind = BinaryFormat.KINDS.index("group")
+        self.unbounded = []
+        if self.kind[row] != group_kind:
+            # Most top-level shapes are single items
+            item = self._item(row)
+            if self.first_uid:
+                item.journal_uid = self.uid(row)
+            return item
 
-            if "pos" in child_dict:
-                child_item.setPos(child_dict["pos"][0], child_dict["pos"][1])
+        geom = self.geom
+        items = {}
+        groups = []
+
+        i = row
+        end = self.ends[row]
+        while i < end:
+            item = self._item(i)
+            items[i] = item
+            group = items.get(self.parent[i])
+            if group is not None:
+                # setParentItem keeps the local position and transform,
+                # addToGroup would map them from the scene
+                item.setParentItem(group)
+                item.parent_group = group
+            if self.first_uid:
+                item.journal_uid = self.uid(i)
+
+            stop = i + 1
+            if self.kind[i] == group_kind:
+                g = 4 * i
+                left, top, right, bottom = geom[g:g + 4]
+                saved = self.columns.has_bounds and left == left  # NaN: saved without bounds
+                if saved and self.ends[i] > stop:
+                    # Saved with its bounds: the children are built on first use
+                    stop = self.ends[i]
+                    item.set_lazy(self.columns.shape_dicts(i + 1, stop), QRectF(left, top, right - left, bottom - top))
+                    if self.first_uid:
+                        item.lazy_uids = list(range(self.uid(i + 1), self.uid(stop)))
+                else:
+                    groups.append((i, item))
+                    if not saved:
+                        self.unbounded.append((i, item))
+            i = stop
+
+        # Nested groups first: their bounds are part of their parent's
+        for _, group in reversed(groups):
+            group.update_bounds()
+        return items[row]
+
+    def _item(self, i: int):
+        shape_type = BinaryFormat.KINDS[self.kind[i]]
+        geom = self.geom
+        g = 4 * i
+        placed = (0.0, 0.0)
+
+        if shape_type == "group":
+            item = Group()
+        elif shape_type == "symbol":
+            name = self.columns.symbol_names[int(geom[g])]
+            symbol = SYMBOLS.get(name)
+            if symbol is None:
+                raise ValueError(f"Unknown symbol: {name}")
+            item = SymbolInstance(symbol)
+        else:
+            color, stroke_width, named = self.styles[self.style[i]]
+            if shape_type == "rect":
+                item = Rectangle(geom[g], geom[g + 1], geom[g + 2], geom[g + 3], color, stroke_width)
+                placed = (geom[g], geom[g + 1])
+            elif shape_type == "ellipse":
+                item = Ellipse(geom[g], geom[g + 1], geom[g + 2], geom[g + 3], color, stroke_width)
+                placed = (geom[g], geom[g + 1])
+            elif shape_type == "line":
+                item = Line(geom[g], geom[g + 1], geom[g + 2], geom[g + 3], color, stroke_width)
+            else:
+                first, count = int(geom[g]), int(geom[g + 1])
+                points = array('d', self.columns.points[first:first + count].tobytes())
+                item = Polyline(points, color, stroke_width)
+            if named is not None:
+                item.set_style(named)
 
-        return group
\ No newline at end of file
+        x, y = self.pos[2 * i], self.pos[2 * i + 1]
+        if (x, y) != placed:
+            item.setPos(x, y)
+        if self.xform is not None:
+            rotation, scale = self.xform[2 * i], self.xform[2 * i + 1]
+            if rotation:
+                item.setRotation(rotation)
+            if scale != 1.0:
+                item.setScale(scale)
+        return item
@@ -0,0 +1,236 @@
+from collections import deque
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QAction, QUndoCommand
+
+from src.logic.instrumentation import PROFILER
+
+# Rough size of a command wrapper (Python object + C++ QUndoCommand)
+COMMAND_BASE_COST = 256
+
+def command_cost(command) -> int:
+    """Estimated memory held by a command, in bytes"""
+    if hasattr(command, "memory_cost"):
+        return command.memory_cost()
+    return COMMAND_BASE_COST
+
+class MacroCommand(QUndoCommand):
+    """
+    Commands pushed between beginMacro() and endMacro().
+    Children are kept in a Python list and replayed in order.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.commands = []
+
+    def redo(self):
+        for command in self.commands:
+            command.redo()
+
+    def undo(self):
+        for command in reversed(self.commands):
+            command.undo()
+
+    def memory_cost(self) -> int:
+        return COMMAND_BASE_COST + sum(command_cost(c) for c in self.commands)
+
+    def can_merge(self, other) -> bool:
+        # Two macros merge when each child merges with its counterpart
+        if not isinstance(other, MacroCommand) or len(self.commands) != len(other.commands):
+            return False
+        return all(
+            a.id() != -1 and a.id() == b.id() and hasattr(a, "can_merge") and a.can_merge(b)
+            for a, b in zip(self.commands, other.commands)
+        )
+
+    def mergeWith(self, other) -> bool:
+        if not self.can_merge(other):
+            return False
+        for a, b in zip(self.commands, other.commands):
+            a.mergeWith(b)
+        return True
+
+class UndoStack(QObject):
+    """
+    Replacement for QUndoStack with a memory budget instead of a command count.
+
+    QUndoStack can only limit the number of commands, and the limit cannot
+    change once commands exist. Here the oldest commands are dropped as soon
+    as the estimated memory of the history exceeds the budget. Mergeable
+    commands (id() != -1 and mergeWith) are merged with the top command, and
+    so are whole macros whose children all merge.
+    """
+
+    DEFAULT_BUDGET = 32 * 1024 * 1024
+
+    indexChanged = Signal(int)
+    canUndoChanged = Signal(bool)
+    canRedoChanged = Signal(bool)
+    undoTextChanged = Signal(str)
+    redoTextChanged = Signal(str)
+    # A command ran: (command, True if it was undone)
+    commandApplied = Signal(object, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Deques: the budget drops the oldest commands from the left
+        self.commands = deque()
+        self._costs = deque()
+        self._index = 0
+        self._macros = []
+        self.memory_budget = self.DEFAULT_BUDGET
+        self.memory_used = 0
+
+    # --- Introspection ---
+    def count(self) -> int:
+        return len(self.commands)
+
+    def index(self) -> int:
+        return self._index
+
+    def canUndo(self) -> bool:
+        return not self._macros and self._index > 0
+
+    def canRedo(self) -> bool:
+        return not self._macros and self._index < len(self.commands)
+
+    def undoText(self) -> str:
+        return self.commands[self._index - 1].text() if self.canUndo() else ""
+
+    def redoText(self) -> str:
+        return self.commands[self._index].text() if self.canRedo() else ""
+
+    def set_memory_budget(self, budget: int):
+        self.memory_budget = budget
+        self._enforce_budget()
+        self._emit_state()
+
+    # --- Editing ---
+    def push(self, command):
+        self._run("push", command, command.redo)
+        self.commandApplied.emit(command, False)
+
+        if self._macros:
+            self._macros[-1].commands.append(command)
+            return
+
+        self._append(command)
+
+    def beginMacro(self, text: str):
+        macro = MacroCommand(text)
+        if self._macros:
+            self._macros[-1].commands.append(macro)
+        self._macros.append(macro)
+        if len(self._macros) == 1:
+            self._emit_state()
+
+    def endMacro(self):
+        if not self._macros:
+            raise RuntimeError("endMacro() without beginMacro()")
+
+        macro = self._macros.pop()
+        if not self._macros:
+            # Children already ran when they were pushed
+            if macro.commands:
+                self._append(macro)
+            else:
+                self._emit_state()
+
+    def undo(self):
+        if not self.canUndo():
+            return
+        self._index -= 1
+        command = self.commands[self._index]
+        self._run("undo", command, command.undo)
+        self.commandApplied.emit(command, True)
+        self._emit_state()
+
+    def redo(self):
+        if not self.canRedo():
+            return
+        command = self.commands[self._index]
+        self._run("redo", command, command.redo)
+        self.commandApplied.emit(command, False)
+        self._index += 1
+        self._emit_state()
+
+    def clear(self):
+        self.commands.clear()
+        self._costs.clear()
+        self._macros.clear()
+        self._index = 0
+        self.memory_used = 0
+        self._emit_state()
+
+    # --- Actions ---
+    def createUndoAction(self, parent, prefix: str = "Undo") -> QAction:
+        return self._create_action(parent, prefix, self.canUndoChanged,
+                                   self.undoTextChanged, self.canUndo, self.undoText, self.undo)
+
+    def createRedoAction(self, parent, prefix: str = "Redo") -> QAction:
+        return self._create_action(parent, prefix, self.canRedoChanged,
+                                   self.redoTextChanged, self.canRedo, self.redoText, self.redo)
+
+    def _create_action(self, parent, prefix, enabled_signal, text_signal, enabled, text, slot):
+        action = QAction(prefix, parent)
+
+        def set_text(value):
+            action.setText(f"{prefix} {value}" if value else prefix)
+
+        action.setEnabled(enabled())
+        set_text(text())
+        enabled_signal.connect(action.setEnabled)
+        text_signal.connect(set_text)
+        action.triggered.connect(slot)
+        return action
+
+    # --- Internals ---
+    @staticmethod
+    def _run(name: str, command, run):
+        if not PROFILER.enabled:
+            return run()
+        # The span arguments are only built while profiling
+        with PROFILER.span(name, "history", {"command": command.text()}):
+            run()
+
+    def _append(self, command):
+        # A new command discards everything that could be redone
+        while len(self.commands) > self._index:
+            self.commands.pop()
+            self.memory_used -= self._costs.pop()
+
+        top = self.commands[-1] if self.commands else None
+        if top is not None and self._try_merge(top, command):
+            cost = command_cost(top)
+            self.memory_used += cost - self._costs[-1]
+            self._costs[-1] = cost
+        else:
+            cost = command_cost(command)
+            self.commands.append(command)
+            self._costs.append(cost)
+            self.memory_used += cost
+            self._index += 1
+
+        self._enforce_budget()
+        self._emit_state()
+
+    @staticmethod
+    def _try_merge(top, command) -> bool:
+        if isinstance(top, MacroCommand):
+            return top.mergeWith(command)
+        return top.id() != -1 and top.id() == command.id() and top.mergeWith(command)
+
+    def _enforce_budget(self):
+        # The newest command is always kept, however large it is
+        while self.memory_used > self.memory_budget and self._index > 1:
+            self.memory_used -= self._costs.popleft()
+            self.commands.popleft()
+            self._index -= 1
+
+    def _emit_state(self):
+        self.indexChanged.emit(self._index)
+        self.canUndoChanged.emit(self.canUndo())
+        self.canRedoChanged.emit(self.canRedo())
+        self.undoTextChanged.emit(self.undoText())
+        self.redoTextChanged.emit(self.redoText())
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from src.logic.io_manager import FileManager
+
+class _NullSpan:
+    """Returned while profiling is off: entering and leaving it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("profiler", "name", "cat", "args", "start")
+
+    def __init__(self, profiler, name: str, cat: str, args: dict):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.cat, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+class Profiler:
+    """
+    Timing spans, counters and samples for the whole application.
+
+        with PROFILER.span("undo", "history"):
+            ...
+
+    Disabled by default. While disabled, span() returns a shared no-op
+    object and count()/sample() return at once, so instrumented code
+    only pays one attribute check. Spans may be recorded from any thread.
+    """
+
+    # Oldest trace events are dropped past this many
+    MAX_EVENTS = 200_000
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.origin = time.perf_counter()
+            self.events = deque(maxlen=self.MAX_EVENTS)
+            self.stats = {}     # span name -> [count, total seconds, max seconds, last seconds]
+            self.counters = {}  # counter name -> running total
+            self.samples = {}   # sample name -> last value
+
+    def set_enabled(self, enabled: bool):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    # --- Recording ---
+    def span(self, name: str, cat: str = "app", args: dict = None):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def record(self, name: str, cat: str, start: float, duration: float, args: dict = None):
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = [0, 0.0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += duration
+            stat[2] = max(stat[2], duration)
+            stat[3] = duration
+            self.events.append(("X", name, cat, start, duration, threading.get_ident(), args))
+
+    def count(self, name: str, value: int = 1):
+        """Adds to a running total (e.g. hover hit tests)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample(self, name: str, value):
+        """Records a value over time (e.g. items per paint)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.samples[name] = value
+            self.events.append(("C", name, "sample", time.perf_counter(), 0.0, threading.get_ident(), value))
+
+    # --- Reporting ---
+    def span_stats(self) -> dict:
+        """name -> (count, average ms, max ms, last ms)"""
+        with self._lock:
+            return {
+                name: (count, total * 1000 / count, peak * 1000, last * 1000)
+                for name, (count, total, peak, last) in self.stats.items()
+            }
+
+    def export_chrome_trace(self, filename: str):
+        """Writes the events in the Chrome trace format (chrome://tracing, Perfetto)"""
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            origin = self.origin
+
+        pid = os.getpid()
+        trace = []
+        for phase, name, cat, start, duration, tid, args in events:
+            event = {"name": name, "cat": cat, "ph": phase, "pid": pid, "tid": tid,
+                     "ts": round((start - origin) * 1e6, 3)}
+            if phase == "X":
+                event["dur"] = round(duration * 1e6, 3)
+                if args:
+                    event["args"] = args
+            else:
+                event["args"] = {name: args}
+            trace.append(event)
+
+        data = {"traceEvents": trace, "displayTimeUnit": "ms", "otherData": {"counters": counters}}
+        with FileManager.atomic_path(filename) as tmp_name:
+            with open(tmp_name, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+
+# Shared by the whole application
+PROFILER = Profiler()
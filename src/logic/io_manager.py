@@ -1,5 +1,19 @@
+import io
 import json
 import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+from src.logic.binary_format import BinaryFormat, BinaryProjectReader
+from src.logic.compression import Compression
+from src.logic.json_format import JsonFormat, JsonProjectReader
+from src.logic.svg_format import SvgFormat
+
+# Read once at import: os.umask() can only be queried by setting it,
+# which would race with files created by other threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 class FileManager:
     """
@@ -8,16 +22,100 @@ class FileManager:
     """
 
     @staticmethod
-    def save_json(filename: str, data: dict):
+    def save_json(filename: str, data: dict, compression: str = Compression.NONE, level: int = None):
+        """
+        Writes a dictionary to a JSON file, optionally compressed (see Compression).
+        """
+        try:
+            with FileManager.atomic_path(filename) as tmp_name:
+                with FileManager.open_text_writer(tmp_name, compression, level) as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+        except OSError as e:
+            raise IOError(f"Failed to write file: {e}")
+
+    @staticmethod
+    def save_project_json(filename: str, data: dict, precision: int = None,
+                          compression: str = Compression.NONE, level: int = None):
+        """
+        Streams a project dictionary to a compact (version 2.0) JSON file.
+        :param precision: Decimals kept on coordinates, None for exact values
+        :param compression: Compression method, the chunks are compressed as they are written
+        :param level: Compression level, 0 (fastest) to 9 (smallest)
+        """
+        try:
+            with FileManager.atomic_path(filename) as tmp_name:
+                with FileManager.open_text_writer(tmp_name, compression, level) as f:
+                    for chunk in JsonFormat.encode(data, precision):
+                        f.write(chunk)
+        except OSError as e:
+            raise IOError(f"Failed to write file: {e}")
+
+    @staticmethod
+    @contextmanager
+    def open_text_writer(filename: str, compression: str = Compression.NONE, level: int = None):
+        """Yields a UTF-8 text file, compressed on the fly"""
+        with open(filename, 'wb') as raw:
+            # Closing the text layer ends the compressed stream, before raw is closed
+            with io.TextIOWrapper(Compression.writer(raw, compression, level), encoding='utf-8') as f:
+                yield f
+
+    @staticmethod
+    def save_binary(filename: str, data: dict):
+        """
+        Writes a project dictionary in the binary container format.
+        """
+        try:
+            with FileManager.atomic_path(filename) as tmp_name:
+                with open(tmp_name, 'wb') as f:
+                    for block in BinaryFormat.encode(data):
+                        f.write(block)
+        except OSError as e:
+            raise IOError(f"Failed to write file: {e}")
+
+    @staticmethod
+    def save_svg(filename: str, data: dict, precision: int = 3, background: str = None):
         """
-        Writes a dictionary to a JSON file.
+        Streams a project dictionary to an SVG file.
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            with FileManager.atomic_path(filename) as tmp_name:
+                with open(tmp_name, 'w', encoding='utf-8') as f:
+                    for chunk in SvgFormat.encode(data, precision, background):
+                        f.write(chunk)
         except OSError as e:
             raise IOError(f"Failed to write file: {e}")
 
+    @staticmethod
+    @contextmanager
+    def atomic_path(filename: str):
+        """
+        Yields a temporary path next to `filename` and renames it over
+        `filename` once the block succeeds. Readers never see a partial file.
+        """
+        directory = os.path.dirname(os.path.abspath(filename))
+        mode = FileManager._file_mode(filename)
+        fd, tmp_name = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+        os.close(fd)
+        try:
+            yield tmp_name
+            with open(tmp_name, 'rb') as f:
+                os.fsync(f.fileno())
+            # mkstemp creates the file 0600
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, filename)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+
+    @staticmethod
+    def _file_mode(filename: str) -> int:
+        """Permissions of the file being replaced, or those open() would give a new file"""
+        try:
+            return stat.S_IMODE(os.stat(filename).st_mode)
+        except FileNotFoundError:
+            return 0o666 & ~_UMASK
+
     @staticmethod
     def load_json(filename: str) -> dict:
         """
@@ -26,9 +124,195 @@ class FileManager:
         if not os.path.exists(filename):
             raise FileNotFoundError(f"File not found: {filename}")
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+            with open(filename, 'rb') as raw:
+                with io.TextIOWrapper(Compression.reader(raw), encoding='utf-8') as f:
+                    return json.load(f)
+        except (json.JSONDecodeError, *Compression.ERRORS):
             raise ValueError("File is corrupted or has invalid format")
         except OSError as e:
-            raise IOError(f"Failed to read file: {e}")
\ No newline at end of file
+            raise IOError(f"Failed to read file: {e}")
+
+    @staticmethod
+    def load_project(filename: str) -> dict:
+        """
+        Reads a whole project file (any JSON version, or binary) into the
+        dictionary SaveStrategy.collect builds.
+        """
+        data = {}
+        for key, value in FileManager.stream_project(filename):
+            if key == "shapes":
+                data.setdefault("shapes", []).append(value)
+            elif key in ("styles", "symbols"):
+                data.setdefault(key, []).extend(value)
+            else:
+                data[key] = value
+        data.setdefault("shapes", [])
+        return data
+
+    @staticmethod
+    def stream_json(filename: str, stream_key: str = "shapes") -> "JsonStreamReader":
+        """
+        Opens a JSON document for incremental reading.
+        See JsonStreamReader for the produced events.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"File not found: {filename}")
+        return JsonStreamReader(filename, stream_key)
+
+    @staticmethod
+    def stream_project(filename: str):
+        """
+        Opens a project for incremental reading, detecting
+        the binary container by its magic bytes.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"File not found: {filename}")
+        if BinaryFormat.is_binary(filename):
+            return BinaryProjectReader(filename)
+        return JsonProjectReader(JsonStreamReader(filename))
+
+    @staticmethod
+    def project_columns(filename: str):
+        """
+        The tables of a binary project as arrays (see BinaryColumns),
+        None for JSON files, which are read through stream_project.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"File not found: {filename}")
+        if BinaryFormat.is_binary(filename):
+            return BinaryProjectReader(filename).read_columns()
+        return None
+
+class JsonStreamReader:
+    """
+    Incremental reader for a top-level JSON object.
+
+    Iterating yields (key, value) pairs in file order. The array stored
+    under `stream_key` is not decoded at once: each of its elements is
+    yielded separately as (stream_key, element), so the caller can start
+    using the first elements before the rest of the file has been read.
+    Compressed files (see Compression) are decompressed chunk by chunk,
+    bytes_read counts compressed bytes.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, filename: str, stream_key: str = "shapes"):
+        self.filename = filename
+        self.stream_key = stream_key
+        self.total_bytes = os.path.getsize(filename)
+        self.bytes_read = 0
+
+        self._decoder = json.JSONDecoder()
+        self._raw = None
+        self._file = None
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        try:
+            with open(self.filename, 'rb') as raw:
+                with io.TextIOWrapper(Compression.reader(raw), encoding='utf-8') as f:
+                    self._raw = raw
+                    self._file = f
+                    yield from self._parse_document()
+        except Compression.ERRORS:
+            self._fail()
+        except OSError as e:
+            raise IOError(f"Failed to read file: {e}")
+        finally:
+            self._raw = None
+            self._file = None
+            self._buf = ""
+
+    # --- Parsing ---
+    def _parse_document(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+
+        while True:
+            key = self._decode_value()
+            if not isinstance(key, str):
+                self._fail()
+            self._expect(":")
+
+            if key == self.stream_key and self._peek() == "[":
+                self._pos += 1
+                yield from self._parse_array(key)
+            else:
+                yield key, self._decode_value()
+
+            sep = self._peek()
+            self._pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                self._fail()
+
+    def _parse_array(self, key):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield key, self._decode_value()
+
+            sep = self._peek()
+            self._pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                self._fail()
+
+    # --- Buffer helpers ---
+    def _read_more(self) -> bool:
+        if self._eof:
+            return False
+
+        # Grow reads with the pending data so one huge value
+        # is re-scanned a logarithmic number of times only
+        pending = len(self._buf) - self._pos
+        chunk = self._file.read(max(self.CHUNK_SIZE, pending))
+        if not chunk:
+            self._eof = True
+            return False
+
+        self.bytes_read = min(self._raw.tell(), self.total_bytes)
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skips whitespace and returns the next character ('' at EOF)"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read_more():
+                return ""
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            self._fail()
+        self._pos += 1
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number cut at the buffer end would decode "successfully"
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    self._fail()
+            self._read_more()
+
+    def _fail(self):
+        raise ValueError("File is corrupted or has invalid format")
@@ -0,0 +1,359 @@
+import json
+import os
+
+import numpy as np
+from PySide6.QtCore import QObject, QTimer
+
+from src.logic.io_manager import FileManager
+from src.logic.factory import ShapeFactory
+from src.logic.commands import group_items, ungroup_items
+from src.logic.loader import apply_event
+from src.logic.save_worker import SaveWorker
+from src.logic.shapes import Shape, Group
+from src.logic.records import RECORDS
+from src.logic.strategies import SaveStrategy, JsonSaveStrategy
+from src.logic.styles import STYLES
+from src.logic.transforms import TransformState
+from src.logic.instrumentation import PROFILER
+
+class EditJournal(QObject):
+    """
+    Crash-safe autosave: an append-only log of the executed commands,
+    written next to the project file.
+
+        <project>.autosave.json   full snapshot (a valid project file) + uids
+        <project>.journal         JSON lines: edits made after that snapshot
+
+    Every command that is done, undone or redone appends the change records
+    the document model was updated with (see src.logic.records and the
+    to_journal() methods in commands.py), so an autosave costs as
+    much as the edit, not the document. The journal is compacted into a new
+    snapshot once it grows past COMPACT_BYTES, or when an edit that cannot
+    be journaled happened. After a crash, snapshot + journal are replayed.
+
+    Compaction writes the snapshot on the save pool. Until it lands, the
+    previous journal is kept as <project>.journal.prev, so the previous
+    snapshot + both journals still describe the document.
+    """
+
+    SNAPSHOT_SUFFIX = ".autosave.json"
+    JOURNAL_SUFFIX = ".journal"
+    PREV_SUFFIX = ".journal.prev"
+
+    FLUSH_INTERVAL_MS = 1000
+    COMPACT_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, scene, document, pool, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.pool = pool
+
+        self.project = None
+        self.generation = 0
+        self.unsaved = False   # edits since the project file was written
+        self.dirty = False     # an edit that only a snapshot can capture
+
+        self._file = None
+        self._pending = []
+        self._compacting = None  # running SaveWorker
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+
+        document.listeners.append(self.record_changes)
+
+    # --- Paths ---
+    @classmethod
+    def paths(cls, project: str) -> tuple:
+        return (project + cls.SNAPSHOT_SUFFIX, project + cls.JOURNAL_SUFFIX, project + cls.PREV_SUFFIX)
+
+    @classmethod
+    def has_recovery(cls, project: str) -> bool:
+        snapshot, journal, _ = cls.paths(project)
+        return os.path.exists(snapshot) and os.path.exists(journal)
+
+    @classmethod
+    def discard_files(cls, project: str):
+        for path in cls.paths(project):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # --- Lifecycle ---
+    def start(self, project: str, keep_files: bool = False):
+        """
+        Starts journaling for a project whose file matches the scene
+        (just opened or saved). Stale autosave files are replaced.
+        """
+        self.close()
+
+        self.project = project
+        self.unsaved = False
+        self.dirty = False
+        self._pending.clear()
+
+        if not keep_files:
+            self.discard_files(project)
+        self.compact()
+        self._timer.start()
+
+    def close(self):
+        """Stops journaling. The files are kept only if they hold unsaved edits."""
+        if self.project is None:
+            return
+
+        self._timer.stop()
+        if self.unsaved:
+            self.flush()
+        self._close_file()
+        if self._compacting is not None:
+            self.pool.waitForDone()
+            self._compacting = None
+        if not self.unsaved:
+            self.discard_files(self.project)
+
+        self.project = None
+        self.generation = 0
+
+    def mark_dirty(self):
+        """For edits that bypass the undo stack: the next flush takes a snapshot"""
+        if self.project is not None:
+            self.dirty = True
+            self.unsaved = True
+
+    # --- Recording ---
+    def record_changes(self, records):
+        """Document model listener: records of one edit, None if it has none"""
+        if self.project is None:
+            return
+
+        self.unsaved = True
+        if records is None:
+            self.dirty = True
+        elif not self.dirty:
+            # Once dirty, records would apply to a state no snapshot has:
+            # the next snapshot captures these edits instead
+            self._pending.extend(records)
+
+    # --- Writing ---
+    def flush(self):
+        if self.project is None:
+            return
+
+        with PROFILER.span("journal.flush", "io"):
+            self._write_pending()
+        if self._compacting is None and (self.dirty or self._file.tell() > self.COMPACT_BYTES):
+            self.compact()
+
+    def compact(self):
+        """Starts a new journal and writes the matching snapshot in the background"""
+        if self._compacting is not None:
+            return
+        snapshot_path, journal_path, prev_path = self.paths(self.project)
+
+        self._write_pending()
+        self._close_file()
+        if os.path.exists(journal_path):
+            os.replace(journal_path, prev_path)
+
+        # The new journal starts exactly where the snapshot is taken
+        self.generation += 1
+        self.dirty = False
+        with PROFILER.span("journal.snapshot", "io"):
+            data = SaveStrategy.collect(self.scene, RECORDS.shape_dict)
+        data["journal_generation"] = self.generation
+        self._open_file(journal_path)
+
+        worker = SaveWorker(JsonSaveStrategy(), snapshot_path, data)
+        worker.signals.finished.connect(self._on_compacted)
+        worker.signals.failed.connect(self._on_compact_failed)
+        self._compacting = worker
+        self.pool.start(worker)
+
+    def _write_pending(self):
+        if self._pending and self._file is not None:
+            lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in self._pending)
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending.clear()
+
+    def _on_compacted(self, filename: str):
+        self._compacting = None
+        prev_path = filename[:-len(self.SNAPSHOT_SUFFIX)] + self.PREV_SUFFIX
+        if os.path.exists(prev_path):
+            os.remove(prev_path)
+
+    def _on_compact_failed(self, filename: str, error: str):
+        self._compacting = None
+        print(f"Autosave snapshot failed: {error}")
+        if self.project is None or filename != self.paths(self.project)[0]:
+            return
+
+        # The old snapshot is still the valid one: fold the new journal
+        # back into the previous one and retry at the next flush
+        _, journal_path, prev_path = self.paths(self.project)
+        self.dirty = True
+        if not os.path.exists(prev_path):
+            return
+
+        self._write_pending()
+        self._close_file()
+        with open(journal_path, "r", encoding="utf-8") as f:
+            f.readline()  # "begin" of the failed generation
+            records = f.read()
+        with open(prev_path, "a", encoding="utf-8") as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(prev_path, journal_path)
+
+        self.generation -= 1
+        self._file = open(journal_path, "a", encoding="utf-8")
+
+    def _open_file(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"op": "begin", "generation": self.generation}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Recovery ---
+    def recover(self, project: str) -> int:
+        """
+        Rebuilds the scene from the last snapshot and replays the journals
+        written after it. Returns the number of replayed records.
+        """
+        self.close()
+        snapshot_path, journal_path, prev_path = self.paths(project)
+        data = FileManager.load_project(snapshot_path)
+        base = data.get("journal_generation", 0)
+
+        shapes = {}
+        for key in ("scene", "styles", "symbols"):
+            if key in data:
+                apply_event(self.scene, key, data[key])
+        for shape_data in data.get("shapes", []):
+            self._restore(shape_data, shapes)
+
+        replayed = 0
+        for path in (prev_path, journal_path):
+            if os.path.exists(path):
+                replayed += self._replay(path, base, shapes)
+
+        RECORDS.reserve(max(shapes, default=0))
+
+        # Make the recovered state durable before the old files go away
+        data = SaveStrategy.collect(self.scene, RECORDS.shape_dict)
+        FileManager.save_project_json(snapshot_path, data)
+        if os.path.exists(prev_path):
+            os.remove(prev_path)
+        os.remove(journal_path)
+
+        self.start(project, keep_files=True)
+        self.unsaved = True  # The project file does not have these edits
+        return replayed
+
+    def _replay(self, path: str, base: int, shapes: dict) -> int:
+        replayed = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from the crash
+                    print(f"Journal {path} ends with a partial record")
+                    break
+
+                if record["op"] == "begin":
+                    if record["generation"] < base:
+                        return 0  # Already contained in the snapshot
+                    continue
+                self._apply(record, shapes)
+                replayed += 1
+        return replayed
+
+    def _restore(self, data: dict, shapes: dict):
+        item = ShapeFactory.from_dict(data)
+        if isinstance(item, Group):
+            # Later records may refer to any shape of the tree
+            item.materialize_tree()
+        self._assign_uids(item, data, shapes)
+        self.scene.addItem(item)
+
+    def _regroup(self, record: dict, items: list, shapes: dict):
+        state = TransformState(np.asarray(record["xy"], dtype=float).reshape(-1, 2),
+                               np.asarray(record["scale"], dtype=float), np.asarray(record["rotation"], dtype=float))
+        group = shapes.get(record["group"])
+        if record["op"] == "ungroup":
+            if group is None:
+                print("Journal record 'ungroup' refers to an unknown group, skipped")
+                return
+            ungroup_items(self.scene, group, items, state)
+            return
+
+        if group is None:
+            group = Group()
+            group.journal_uid = record["group"]
+            shapes[record["group"]] = group
+        x, y, rotation, scale = record["transform"]
+        group.setPos(x, y)
+        group.setRotation(rotation)
+        group.setScale(scale)
+        group_items(self.scene, group, items, state)
+
+    def _assign_uids(self, item, data: dict, shapes: dict):
+        if "uid" in data:
+            item.journal_uid = data["uid"]
+            shapes[data["uid"]] = item
+        children = [child for child in item.childItems() if isinstance(child, Shape)]
+        for child, child_data in zip(children, data.get("children", [])):
+            self._assign_uids(child, child_data, shapes)
+
+    def _apply(self, record: dict, shapes: dict):
+        op = record["op"]
+        if op == "symbols":
+            apply_event(self.scene, "symbols", record["symbols"])
+            return
+        if op == "add":
+            for shape_data in record["shapes"]:
+                item = shapes.get(shape_data.get("uid"))
+                if item is not None and item.scene() is None:
+                    # Deleted earlier, the item is still the same shape
+                    self.scene.addItem(item)
+                else:
+                    self._restore(shape_data, shapes)
+            return
+
+        items = [shapes.get(uid) for uid in record["uids"]]
+        if any(item is None for item in items):
+            print(f"Journal record '{op}' refers to unknown shapes, skipped")
+            return
+
+        if op == "delete":
+            for item in items:
+                self.scene.removeItem(item)
+        elif op == "move":
+            xy = record["xy"]
+            for i, item in enumerate(items):
+                item.setPos(xy[2 * i], xy[2 * i + 1])
+        elif op == "transform":
+            xy = record["xy"]
+            for i, item in enumerate(items):
+                item.setPos(xy[2 * i], xy[2 * i + 1])
+                item.setScale(record["scale"][i])
+                item.setRotation(record["rotation"][i])
+        elif op in ("group", "ungroup"):
+            self._regroup(record, items, shapes)
+        elif op == "style":
+            for item, (color, width, name) in zip(items, record["styles"]):
+                style = None
+                if name:
+                    style = STYLES.get(name) or STYLES.define(name, color, width)
+                item.set_style(style or STYLES.intern(color, width))
+        else:
+            print(f"Unknown journal record '{op}', skipped")
@@ -0,0 +1,224 @@
+import json
+
+class JsonFormat:
+    """
+    Compact JSON project encoding (version 2.0), minified.
+    Decoupled from Qt logic, like BinaryFormat: encodes the dictionaries of
+    SaveStrategy.collect, and decodes back to them, so everything past the
+    reader (factory, document model, journal) only sees version 1.0 shapes.
+
+        {"version": "2.0", "scene": {...},
+         "palette": [[color, width], [color, width, name], ...],
+         "symbols": [{"name": ..., "children": [shape, ...]}],
+         "shapes": [shape, ...]}
+
+    Every style is written once in the palette, named styles included, and
+    shapes refer to it by index. Shapes use short keys:
+
+        t  type                 p  pos, omitted at the origin
+        s  palette index        r  rotation      k  scale
+        g  geometry: w, h (rect, ellipse) or x1, y1, x2, y2 (line)
+        d  packed points (polyline)
+        b  bounds   c  children (group)
+        n  symbol name (symbol instance)
+        u  uid (autosave snapshots)
+
+    A rectangle's props.x/y, always equal to its position, are not written.
+    """
+
+    VERSION = "2.0"
+
+    # --- Encoding ---
+    @staticmethod
+    def encode(data: dict, precision: int = None):
+        """
+        Yields the file contents as a sequence of strings. Two passes over
+        the shapes: styles, then shapes, one JSON value per top-level shape.
+        :param precision: Decimals kept on coordinates, None for exact values
+        """
+        if precision is None:
+            num = float
+        else:
+            def num(value):
+                value = round(value, precision)
+                whole = int(value)
+                return whole if whole == value else value
+
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        shapes = data.get("shapes", [])
+        symbols = data.get("symbols", [])
+        palette = JsonFormat._palette(data.get("styles", []),
+                                      shapes + [child for symbol in symbols for child in symbol.get("children", [])])
+
+        yield '{"version":' + dumps(JsonFormat.VERSION)
+        yield ',"scene":' + dumps(data.get("scene", {}))
+        yield ',"palette":' + dumps([list(key) if key[2] else list(key[:2]) for key in palette])
+        for key, value in data.items():
+            if key not in ("version", "scene", "styles", "symbols", "shapes"):
+                yield f",{dumps(key)}:{dumps(value)}"
+
+        if symbols:
+            yield ',"symbols":' + dumps([
+                {"name": symbol["name"], "children": [JsonFormat.encode_shape(child, palette, num)
+                                                      for child in symbol.get("children", [])]}
+                for symbol in symbols])
+
+        yield ',"shapes":['
+        for i, shape in enumerate(shapes):
+            yield ("," if i else "") + dumps(JsonFormat.encode_shape(shape, palette, num))
+        yield "]}\n"
+
+    @staticmethod
+    def _palette(named: list, shapes: list) -> dict:
+        """(color, width, name) -> index, named styles first"""
+        palette = {}
+        for style in named:
+            palette.setdefault((style.get("color", "black"), style.get("stroke_width", 2), style["name"]), len(palette))
+        stack = list(shapes)
+        while stack:
+            shape = stack.pop()
+            if "children" in shape:
+                stack.extend(shape["children"])
+            elif "props" in shape:
+                props = shape["props"]
+                key = (props.get("color", "black"), props.get("stroke_width", 2), props.get("style", ""))
+                if key not in palette:
+                    palette[key] = len(palette)
+        return palette
+
+    @staticmethod
+    def encode_shape(shape: dict, palette: dict, num=float) -> dict:
+        """Compact form of a to_dict dictionary (whole tree)"""
+        root = {}
+        # Explicit stack instead of recursion: nested groups can be deep
+        stack = [(shape, root)]
+        while stack:
+            shape, out = stack.pop()
+            shape_type = shape.get("type")
+            out["t"] = shape_type
+            x, y = shape.get("pos", (0.0, 0.0))
+            if x or y:
+                out["p"] = [num(x), num(y)]
+            if "rotation" in shape:
+                out["r"] = num(shape["rotation"])
+            if "scale" in shape:
+                out["k"] = num(shape["scale"])
+            if "uid" in shape:
+                out["u"] = shape["uid"]
+
+            if shape_type == "group":
+                if "bounds" in shape:
+                    out["b"] = [num(value) for value in shape["bounds"]]
+                children = out["c"] = [{} for _ in shape.get("children", ())]
+                stack.extend(zip(shape.get("children", ()), children))
+                continue
+            if shape_type == "symbol":
+                out["n"] = shape["symbol"]
+                continue
+
+            props = shape.get("props", {})
+            out["s"] = palette[(props.get("color", "black"), props.get("stroke_width", 2), props.get("style", ""))]
+            if shape_type in ("rect", "ellipse"):
+                out["g"] = [num(props["w"]), num(props["h"])]
+            elif shape_type == "line":
+                out["g"] = [num(props["x1"]), num(props["y1"]), num(props["x2"]), num(props["y2"])]
+            elif shape_type == "polyline":
+                out["d"] = props["points"]
+            else:
+                raise ValueError(f"Unknown type: {shape_type}")
+        return root
+
+    # --- Decoding ---
+    @staticmethod
+    def decode_palette(entries: list) -> list:
+        """Palette entries -> (color, width, name)"""
+        return [(entry[0], entry[1], entry[2] if len(entry) > 2 else "") for entry in entries]
+
+    @staticmethod
+    def decode_shape(shape: dict, palette: list) -> dict:
+        """The to_dict dictionary of a compact shape (whole tree)"""
+        root = {}
+        stack = [(shape, root)]
+        while stack:
+            shape, out = stack.pop()
+            shape_type = shape["t"]
+            out["type"] = shape_type
+            x, y = out["pos"] = shape.get("p", [0.0, 0.0])
+            if "r" in shape:
+                out["rotation"] = shape["r"]
+            if "k" in shape:
+                out["scale"] = shape["k"]
+            if "u" in shape:
+                out["uid"] = shape["u"]
+
+            if shape_type == "group":
+                if "b" in shape:
+                    out["bounds"] = shape["b"]
+                children = out["children"] = [{} for _ in shape.get("c", ())]
+                stack.extend(zip(shape.get("c", ()), children))
+                continue
+            if shape_type == "symbol":
+                out["symbol"] = shape["n"]
+                continue
+
+            if shape_type in ("rect", "ellipse"):
+                w, h = shape["g"]
+                props = {"x": x, "y": y, "w": w, "h": h}
+            elif shape_type == "line":
+                x1, y1, x2, y2 = shape["g"]
+                props = {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+            elif shape_type == "polyline":
+                props = {"points": shape["d"]}
+            else:
+                raise ValueError(f"Unknown type: {shape_type}")
+            color, width, name = palette[shape["s"]]
+            props["color"] = color
+            props["stroke_width"] = width
+            if name:
+                props["style"] = name
+            out["props"] = props
+        return root
+
+class JsonProjectReader:
+    """
+    Project events of a JSON stream (see JsonStreamReader), whatever its
+    version: compact shapes are decoded to to_dict dictionaries, one at a
+    time, and the palette's named styles are announced as "styles".
+    The version announced is that of the decoded dictionaries, 1.0.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.total_bytes = stream.total_bytes
+
+    @property
+    def bytes_read(self) -> int:
+        return self._stream.bytes_read
+
+    def __iter__(self):
+        palette = None
+        for key, value in self._stream:
+            if key == "version":
+                # Decoded shapes are those of version 1.0, as for binary files
+                yield key, "1.0"
+                continue
+            if palette is None:
+                if key == "palette":
+                    palette = JsonFormat.decode_palette(value)
+                    named = [{"name": name, "color": color, "stroke_width": width}
+                             for color, width, name in palette if name]
+                    if named:
+                        yield "styles", named
+                    continue
+                # Version 1.0: the shapes are to_dict dictionaries already
+                yield key, value
+                continue
+
+            if key == "shapes":
+                yield key, JsonFormat.decode_shape(value, palette)
+            elif key == "symbols":
+                yield key, [{"name": symbol["name"],
+                             "children": [JsonFormat.decode_shape(child, palette) for child in symbol["children"]]}
+                            for symbol in value]
+            else:
+                yield key, value
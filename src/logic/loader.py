@@ -0,0 +1,198 @@
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from src.logic.io_manager import FileManager
+from src.logic.factory import ShapeFactory, ColumnFactory
+from src.logic.records import RECORDS
+from src.logic.styles import STYLES
+from src.logic.symbols import SYMBOLS
+from src.logic.instrumentation import PROFILER
+
+class ProjectLoader(QObject):
+    """
+    Loads a project into a scene without blocking the GUI thread.
+
+    The file is parsed incrementally and shapes are inserted in
+    time-sliced batches, giving control back to the event loop
+    between batches so the window keeps repainting.
+    A document model, if given, is filled from the same events.
+    Binary files skip the events: see load_columns.
+    """
+
+    progress = Signal(int, int)  # bytes read and total bytes; shapes built and total for binary files
+    finished = Signal(int)       # number of loaded shapes
+    failed = Signal(str)
+    canceled = Signal()
+
+    def __init__(self, scene, filename: str, time_budget_ms: int = 12, parent=None, document=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.document = document
+        self.filename = filename
+        self.time_budget = time_budget_ms / 1000.0
+        self.loaded = 0
+
+        self._reader = None
+        self._columns = None
+        self._built = 0
+        self._steps = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._process_batch)
+
+    def is_running(self) -> bool:
+        return self._timer.isActive()
+
+    def start(self):
+        try:
+            self._columns = FileManager.project_columns(self.filename)
+            if self._columns is not None:
+                self._steps = load_columns(self.scene, self._columns, self.document)
+            else:
+                self._reader = FileManager.stream_project(self.filename)
+                self._steps = self._apply_events()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        self._timer.start()
+
+    def cancel(self):
+        if not self.is_running():
+            return
+
+        self._stop()
+        self.canceled.emit()
+
+    def _stop(self):
+        self._timer.stop()
+        if self._steps is not None:
+            self._steps.close()
+            self._steps = None
+
+    def _process_batch(self):
+        with PROFILER.span("load.batch", "io"):
+            self._load_until_deadline()
+
+    def _load_until_deadline(self):
+        deadline = time.perf_counter() + self.time_budget
+
+        try:
+            while time.perf_counter() < deadline:
+                if next(self._steps):
+                    self.loaded += 1
+                self._built += 1
+        except StopIteration:
+            self._stop()
+            _, total = self._progress()
+            self.progress.emit(total, total)
+            self.finished.emit(self.loaded)
+            return
+        except Exception as e:
+            self._stop()
+            self.failed.emit(str(e))
+            return
+
+        self.progress.emit(*self._progress())
+
+    def _progress(self) -> tuple:
+        if self._columns is not None:
+            return self._built, len(self._columns.top_rows)
+        return self._reader.bytes_read, self._reader.total_bytes
+
+    def _apply_events(self):
+        for key, value in self._reader:
+            yield apply_event(self.scene, key, value, self.document)
+
+def apply_event(scene, key, value, document=None) -> bool:
+    """
+    Applies one (key, value) project event to the scene,
+    and to the document model if given.
+    Returns True if a shape was added.
+    """
+    if key == "scene":
+        w = value.get("width", 800)
+        h = value.get("height", 600)
+        scene.setSceneRect(0, 0, w, h)
+    elif key == "styles":
+        for style in value:
+            STYLES.define(style["name"], style.get("color", "black"), style.get("stroke_width", 2))
+    elif key == "symbols":
+        for symbol in value:
+            SYMBOLS.define(symbol["name"], symbol.get("children", []))
+    elif key == "shapes":
+        try:
+            shape_obj = ShapeFactory.from_dict(value)
+            scene.addItem(shape_obj)
+        except Exception as e:
+            print(f"Skipping corrupt shape: {e}")
+            return False
+        if document is not None:
+            if value.get("type") == "group" and "bounds" not in value:
+                # Older file: the model takes the bounds of the built groups
+                value = shape_obj.to_dict()
+            # Rows and items share their uids, later records find both
+            RECORDS.tag(shape_obj, value)
+            document.add_shape(value)
+        return True
+
+    if document is not None:
+        document.add_event(key, value)
+    return False
+
+def load_columns(scene, columns, document=None):
+    """
+    Loads the tables of a binary project (see BinaryColumns) into the scene,
+    and into the document model if given, without a dictionary per shape.
+    A generator, for time slicing: yields once per top-level shape, True if
+    it was added.
+    """
+    scene.setSceneRect(0, 0, columns.width, columns.height)
+    for style in columns.named_styles():
+        STYLES.define(style["name"], style["color"], style["stroke_width"])
+    for symbol in columns.definitions():
+        SYMBOLS.define(symbol["name"], symbol["children"])
+
+    first_uid = 0
+    if document is not None:
+        # Rows and items share their uids, later records find both
+        first_uid = RECORDS.next_uid
+        RECORDS.reserve(first_uid + len(columns) - columns.first - 1)
+        first_row = document.add_columns(columns, first_uid)
+    factory = ColumnFactory(columns, first_uid)
+
+    for row in columns.top_rows.tolist():
+        try:
+            item = factory.build(row)
+        except Exception as e:
+            print(f"Skipping corrupt shape: {e}")
+            if document is not None:
+                document.apply([{"op": "delete", "uids": [factory.uid(row)]}])
+            yield False
+            continue
+        scene.addItem(item)
+
+        if document is not None and factory.unbounded:
+            # Older file: the model takes the bounds of the built groups
+            geom = document.column("geom")
+            for group_row, group in factory.unbounded:
+                b = group.boundingRect()
+                geom[first_row + group_row - columns.first] = (b.left(), b.top(), b.right(), b.bottom())
+        yield True
+
+def load_scene(scene, filename: str) -> int:
+    """Loads a project synchronously, for headless use"""
+    scene.setSceneRect(0, 0, 800, 600)
+    loaded = 0
+    with PROFILER.span("load", "io", {"file": filename}):
+        columns = FileManager.project_columns(filename)
+        if columns is not None:
+            steps = load_columns(scene, columns)
+        else:
+            steps = (apply_event(scene, key, value) for key, value in FileManager.stream_project(filename))
+        for added in steps:
+            if added:
+                loaded += 1
+    return loaded
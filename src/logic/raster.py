@@ -0,0 +1,171 @@
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtGui import QImage, QPainter, QPicture, QColor
+from PySide6.QtCore import QRectF
+
+class PngStreamWriter:
+    """
+    Minimal PNG encoder (8-bit RGBA) that accepts the image row by row,
+    so the full image never has to exist in memory.
+    """
+
+    SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+    def __init__(self, f, width: int, height: int, dpi: float = None, level: int = 6):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+
+        f.write(self.SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        if dpi:
+            ppm = int(round(dpi / 0.0254))
+            self._chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+    def write_rows(self, rows):
+        """Each row is width * 4 bytes of non-premultiplied RGBA"""
+        data = bytearray()
+        for row in rows:
+            data += b"\x00"  # Filter type: None
+            data += row
+            self.rows_written += 1
+
+        compressed = self._compressor.compress(bytes(data))
+        if compressed:
+            self._chunk(b"IDAT", compressed)
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"Expected {self.height} rows, got {self.rows_written}")
+        self._chunk(b"IDAT", self._compressor.flush())
+        self._chunk(b"IEND", b"")
+
+    def _chunk(self, tag: bytes, payload: bytes):
+        self.f.write(struct.pack(">I", len(payload)))
+        self.f.write(tag)
+        self.f.write(payload)
+        self.f.write(struct.pack(">I", zlib.crc32(payload, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+class Tile:
+    """One tile of the output: its pixel rect and the recorded drawing"""
+
+    def __init__(self, x: int, y: int, w: int, h: int, picture: bytes):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.picture = picture
+
+class TiledRender:
+    """
+    Splits an export into tiles.
+
+    record() runs on the GUI thread and stores, per tile, a QPicture of
+    the scene items intersecting it (vector commands, no pixels).
+    Tiles are then rasterized in parallel on a thread pool, one band
+    (row of tiles) at a time, so peak pixel memory is one band of tiles.
+    """
+
+    def __init__(self, bands, width: int, height: int, bg_color: str):
+        self.bands = bands
+        self.width = width
+        self.height = height
+        self.bg_color = bg_color
+
+    @staticmethod
+    def record(scene, source: QRectF, scale: float, tile_size: int, bg_color: str) -> "TiledRender":
+        width = max(1, int(source.width() * scale))
+        height = max(1, int(source.height() * scale))
+
+        bands = []
+        for y in range(0, height, tile_size):
+            band = []
+            h = min(tile_size, height - y)
+            for x in range(0, width, tile_size):
+                w = min(tile_size, width - x)
+
+                picture = QPicture()
+                painter = QPainter(picture)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                # Only items intersecting the tile are recorded (BSP lookup)
+                tile_source = QRectF(source.x() + x / scale, source.y() + y / scale,
+                                     w / scale, h / scale)
+                scene.render(painter, QRectF(0, 0, w, h), tile_source)
+                painter.end()
+
+                band.append(Tile(x, y, w, h, bytes(picture.data())))
+            bands.append(band)
+
+        return TiledRender(bands, width, height, bg_color)
+
+    def rasterize(self, tile: Tile) -> QImage:
+        """Thread-safe: every call works on its own picture and image"""
+        picture = QPicture()
+        picture.setData(tile.picture)
+
+        image = QImage(tile.w, tile.h, QImage.Format.Format_ARGB32_Premultiplied)
+        if self.bg_color == "transparent":
+            image.fill(QColor(0, 0, 0, 0))
+        else:
+            image.fill(QColor(self.bg_color))
+
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.drawPicture(0, 0, picture)
+        painter.end()
+
+        return image
+
+    def iter_bands(self, workers: int = None):
+        """Yields the rasterized tiles band by band, top to bottom"""
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = None
+            for band in self.bands:
+                # Next band renders while the previous one is consumed
+                future = [pool.submit(self.rasterize, tile) for tile in band]
+                if pending is not None:
+                    yield pending[0], [f.result() for f in pending[1]]
+                pending = (band, future)
+            if pending is not None:
+                yield pending[0], [f.result() for f in pending[1]]
+
+    def write_png(self, f, dpi: float = None, workers: int = None):
+        writer = PngStreamWriter(f, self.width, self.height, dpi)
+
+        for band, images in self.iter_bands(workers):
+            rgba = [image.convertToFormat(QImage.Format.Format_RGBA8888) for image in images]
+            bits = [image.constBits() for image in rgba]
+
+            rows = []
+            for row in range(band[0].h):
+                parts = []
+                for tile, image, data in zip(band, rgba, bits):
+                    start = row * image.bytesPerLine()
+                    parts.append(data[start:start + tile.w * 4])
+                rows.append(b"".join(parts))
+            writer.write_rows(rows)
+
+        writer.close()
+
+    def assemble(self, workers: int = None) -> QImage:
+        """
+        Composes all tiles into one image, for encoders that cannot stream.
+        Memory is then bounded by the canvas again, only rendering is parallel.
+        """
+        image = QImage(self.width, self.height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(QColor(0, 0, 0, 0))
+
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        for band, images in self.iter_bands(workers):
+            for tile, tile_image in zip(band, images):
+                painter.drawImage(tile.x, tile.y, tile_image)
+        painter.end()
+
+        return image
@@ -0,0 +1,152 @@
+from src.logic.history import MacroCommand
+from src.logic.shapes import Shape
+
+class ChangeRecords:
+    """
+    Describes edits as plain records (JSON-ready dicts), built by the
+    to_journal() methods in commands.py. The same records feed the edit
+    journal and the document model.
+
+    Every shape gets a uid the first time it appears in a record (stored
+    on the item as journal_uid), so records refer to shapes by number.
+    """
+
+    def __init__(self):
+        self.next_uid = 1
+
+    def reserve(self, last_uid: int):
+        """Makes sure new uids are above `last_uid` (after restoring tagged shapes)"""
+        self.next_uid = max(self.next_uid, last_uid + 1)
+
+    def command_records(self, command, undone: bool):
+        """Records of a command that was just done or undone, None if it has none"""
+        if isinstance(command, MacroCommand):
+            records = []
+            children = reversed(command.commands) if undone else command.commands
+            for child in children:
+                child_records = self.command_records(child, undone)
+                if child_records is None:
+                    return None
+                records.extend(child_records)
+            return records
+
+        if not hasattr(command, "to_journal"):
+            return None
+        return command.to_journal(self, undone)
+
+    def uid(self, item) -> int:
+        uid = getattr(item, "journal_uid", None)
+        if uid is None:
+            uid = item.journal_uid = self._new_uid()
+        return uid
+
+    def _new_uid(self) -> int:
+        uid = self.next_uid
+        self.next_uid += 1
+        return uid
+
+    def shape_dict(self, item) -> dict:
+        """item.to_dict() with the uid of every shape of the tree"""
+        data = item.to_dict()
+        self.tag(item, data)
+        return data
+
+    def tag(self, item, data: dict):
+        """Writes the uids of a shape tree into its dictionary"""
+        data["uid"] = self.uid(item)
+        if "children" not in data:
+            return
+        if getattr(item, "lazy_children", None) is not None:
+            data["children"] = self._tag_lazy(item, data["children"])
+            return
+        children = [child for child in item.childItems() if isinstance(child, Shape)]
+        for child, child_data in zip(children, data.get("children", [])):
+            self.tag(child, child_data)
+
+    def _tag_lazy(self, group, children: list) -> list:
+        """
+        Tagged copies of the serialized children of a lazy group.
+        Their uids are kept on the group (lazy_uids, in pre-order) and handed
+        to the items once they are built; the loaded dictionaries are not changed.
+        """
+        fresh = group.lazy_uids is None
+        if fresh:
+            group.lazy_uids = []
+        uids = iter(group.lazy_uids)
+
+        tagged = [dict(data) for data in children]
+        stack = list(reversed(tagged))
+        while stack:
+            data = stack.pop()
+            if fresh:
+                data["uid"] = self._new_uid()
+                group.lazy_uids.append(data["uid"])
+            else:
+                data["uid"] = next(uids)
+            if "children" in data:
+                data["children"] = [dict(child) for child in data["children"]]
+                stack.extend(reversed(data["children"]))
+        return tagged
+
+    # --- Record builders, used by the commands ---
+    def add_record(self, items) -> dict:
+        return {"op": "add", "shapes": [self.shape_dict(item) for item in items]}
+
+    def delete_record(self, items) -> dict:
+        return {"op": "delete", "uids": [self.uid(item) for item in items]}
+
+    def uids(self, items) -> list:
+        """uids of items, taken once by the commands that record them"""
+        try:
+            # Edited shapes almost always have one already
+            return [item.journal_uid for item in items]
+        except AttributeError:
+            return [self.uid(item) for item in items]
+
+    def move_record(self, uids: list, xy: list) -> dict:
+        """
+        :param uids: from uids(), shared by every record of a command
+        :param xy: flat x, y list of the new positions
+        """
+        return {"op": "move", "uids": uids, "xy": xy}
+
+    def transform_record(self, uids: list, xy: list, scale: list, rotation: list) -> dict:
+        return {"op": "transform", "uids": uids, "xy": xy, "scale": scale, "rotation": rotation}
+
+    def _item_transforms(self, items) -> dict:
+        xy = []
+        for item in items:
+            xy.extend((item.x(), item.y()))
+        return self.transform_record(self.uids(items), xy, [item.scale() for item in items],
+                                     [item.rotation() for item in items])
+
+    def group_record(self, group, items) -> dict:
+        """`items` moved into `group`, with their transforms inside it"""
+        record = self._item_transforms(items)
+        record["op"] = "group"
+        record["group"] = self.uid(group)
+        record["transform"] = [group.x(), group.y(), group.rotation(), group.scale()]
+        bounds = group.boundingRect()
+        record["bounds"] = [bounds.left(), bounds.top(), bounds.right(), bounds.bottom()]
+        return record
+
+    def ungroup_record(self, group, items) -> dict:
+        """`items` moved out of `group` to the top level, the group is gone"""
+        record = self._item_transforms(items)
+        record["op"] = "ungroup"
+        record["group"] = self.uid(group)
+        return record
+
+    def symbols_record(self, symbols) -> dict:
+        """Symbol definitions, recorded before the instances that refer to them"""
+        return {"op": "symbols", "symbols": [symbol.to_dict() for symbol in symbols]}
+
+    def style_record(self, shapes) -> dict:
+        return {
+            "op": "style",
+            "uids": [self.uid(shape) for shape in shapes],
+            "styles": [[shape.style.color, shape.style.width, shape.style.name] for shape in shapes]
+        }
+
+# Shared by the whole application: uids must be unique across consumers
+RECORDS = ChangeRecords()
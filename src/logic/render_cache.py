@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+class RenderCache:
+    """
+    Shared memory budget for the pixmaps of cached groups.
+
+    Groups register their pixmap when they render it and touch it on
+    every paint. Once the total exceeds the budget, the least recently
+    painted groups drop their pixmap and re-render on their next paint.
+    """
+
+    DEFAULT_BUDGET = 64 * 1024 * 1024
+
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.budget = budget
+        self.memory_used = 0
+        self._entries = OrderedDict()  # group -> bytes, least recent first
+
+    def store(self, group, cost: int):
+        self.discard(group)
+        self._entries[group] = cost
+        self.memory_used += cost
+        self._evict(keep=group)
+
+    def touch(self, group):
+        if group in self._entries:
+            self._entries.move_to_end(group)
+
+    def discard(self, group):
+        cost = self._entries.pop(group, None)
+        if cost is not None:
+            self.memory_used -= cost
+
+    def set_budget(self, budget: int):
+        self.budget = budget
+        self._evict()
+
+    def clear(self):
+        for group in list(self._entries):
+            group.drop_render_cache()
+        self._entries.clear()
+        self.memory_used = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, keep=None):
+        # The pixmap being painted right now is kept, however large it is
+        while self.memory_used > self.budget and self._entries:
+            group, cost = next(iter(self._entries.items()))
+            if group is keep:
+                break
+            self._entries.popitem(last=False)
+            self.memory_used -= cost
+            group.drop_render_cache()
+
+# Shared by all groups of all scenes
+RENDER_CACHE = RenderCache()
@@ -0,0 +1,34 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from src.logic.instrumentation import PROFILER
+
+class SaveSignals(QObject):
+    """QRunnable is not a QObject, so signals live in a companion object"""
+    finished = Signal(str)       # filename
+    failed = Signal(str, str)    # filename, error message
+
+class SaveWorker(QRunnable):
+    """
+    Runs the write phase of a SaveStrategy on a pool thread.
+    The snapshot must already have been taken on the GUI thread.
+    """
+
+    def __init__(self, strategy, filename: str, snapshot):
+        super().__init__()
+        self.strategy = strategy
+        self.filename = filename
+        self.snapshot = snapshot
+        self.signals = SaveSignals()
+        # Lifetime is managed from Python by the caller
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            with PROFILER.span("save.write", "io", {"strategy": type(self.strategy).__name__}):
+                self.strategy.write(self.filename, self.snapshot)
+        except Exception as e:
+            self.signals.failed.emit(self.filename, str(e))
+        else:
+            self.signals.finished.emit(self.filename)
+        finally:
+            self.snapshot = None
@@ -0,0 +1,208 @@
+from collections import Counter
+
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, QRectF, Signal
+
+from src.logic.commands import (leaf_shapes, AddShapeCommand, DeleteCommand, BulkDeleteCommand,
+                                 ChangeColorCommand, ChangeWidthCommand, BulkChangeColorCommand,
+                                 BulkChangeWidthCommand, MoveCommand, ChangePosCommand, BulkMoveCommand,
+                                 BulkTransformCommand, GroupCommand, UngroupCommand, MakeSymbolCommand)
+from src.logic.history import MacroCommand
+from src.logic.transforms import scene_bounds
+
+# What an edit changes in the aggregates of the items that stay selected.
+# Items entering or leaving the selection are reported by the shapes.
+STYLE_COMMANDS = (ChangeColorCommand, ChangeWidthCommand, BulkChangeColorCommand, BulkChangeWidthCommand)
+WIDTH_COMMANDS = (ChangeWidthCommand, BulkChangeWidthCommand)
+MOVE_COMMANDS = (MoveCommand, ChangePosCommand, BulkMoveCommand, BulkTransformCommand)
+STRUCTURE_COMMANDS = (AddShapeCommand, DeleteCommand, BulkDeleteCommand, GroupCommand, UngroupCommand,
+                      MakeSymbolCommand)
+
+class SelectionTracker(QObject):
+    """
+    The selection of a scene as a maintained set, with its aggregate
+    properties (styles, types, combined bounds).
+
+    The shapes report their own selection changes from itemChange (see
+    src.logic.shapes.report_selection); the tracker queues them and applies
+    them at most once per frame, so the set and the aggregates are only
+    updated from the items that were added or removed. The scene's
+    selection list is never read back.
+    Edits only refresh what they change (command_applied): the styles after
+    a style command, the bounds (recomputed when next asked) after a move.
+    """
+
+    FRAME_MS = 16
+
+    # Aggregates are up to date: True if the set of items changed
+    updated = Signal(bool)
+
+    def __init__(self, scene, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.items = set()
+        self._pending = {}          # item -> selected, reported since the last refresh
+
+        self._leaf_styles = {}      # item -> its Style, or the styles of a group's leaves
+        self._styles = Counter()    # Style -> selected leaves using it
+        self._types = Counter()     # type name -> selected items
+        self._bounds = None         # [left, top, right, bottom], None if unknown
+        self._stale = False
+        self._restyle = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FRAME_MS)
+        self._timer.timeout.connect(self.refresh)
+
+        scene.selection_tracker = self
+
+    # --- Scheduling ---
+    def schedule(self):
+        self._stale = True
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def item_selected(self, item, selected: bool):
+        """Reported by a shape of the scene, applied at the next refresh"""
+        self._pending[item] = selected
+        if not self._stale:
+            self.schedule()
+
+    def command_applied(self, command, undone: bool):
+        """An edit ran (or was undone): updates the aggregates it changed"""
+        self._edited(command, undone)
+        self.schedule()
+
+    def _edited(self, command, undone: bool):
+        if isinstance(command, MacroCommand):
+            for child in command.commands:
+                self._edited(child, undone)
+        elif isinstance(command, STYLE_COMMANDS):
+            self._restyle = True
+            if isinstance(command, WIDTH_COMMANDS):
+                # The pen is part of the bounding rect
+                self._bounds = None
+        elif isinstance(command, MOVE_COMMANDS):
+            self._moved(command, undone)
+        elif not isinstance(command, STRUCTURE_COMMANDS):
+            self._restyle = True
+            self._bounds = None
+
+    def _moved(self, command, undone: bool):
+        """
+        Shifts the bounds when the whole selection moved by one offset (the
+        X / Y fields of the properties panel). After any other move they are
+        recomputed when next asked.
+        """
+        if (self._bounds is None or self._pending or not isinstance(command, BulkMoveCommand)
+                or not self.items or len(command.items) != len(self.items)):
+            self._bounds = None
+            return
+        delta = np.frombuffer(command.new_xy) - np.frombuffer(command.old_xy)
+        dx, dy = delta[0::2], delta[1::2]
+        # Children of groups move in the coordinates of their group
+        if (not ((dx == dx[0]).all() and (dy == dy[0]).all()) or not self.items.issuperset(command.items)
+                or any(item.parent_group is not None for item in command.items)):
+            self._bounds = None
+            return
+        dx, dy = (-dx[0], -dy[0]) if undone else (dx[0], dy[0])
+        left, top, right, bottom = self._bounds
+        self._bounds = [left + dx, top + dy, right + dx, bottom + dy]
+
+    def reset(self):
+        """The scene was cleared: its items were deleted without reporting it"""
+        self._pending.clear()
+        self._clear()
+        self.schedule()
+
+    def flush(self):
+        """Applies a pending refresh now, for callers that act on the selection"""
+        if self._stale:
+            self._timer.stop()
+            self.refresh()
+
+    # --- Refresh ---
+    def refresh(self):
+        self._stale = False
+        pending, self._pending = self._pending, {}
+        # An item may have been selected and deselected since the last refresh
+        added = [item for item, selected in pending.items() if selected and item not in self.items]
+        removed = [item for item, selected in pending.items() if not selected and item in self.items]
+
+        if removed:
+            # What the items contributed when they were added: they may have
+            # been regrouped or deleted since
+            self._styles -= Counter(self._expand(self._leaf_styles.pop(item) for item in removed))
+            self._types -= Counter(item.type_name for item in removed)
+
+        if added:
+            self._leaf_styles.update(self._contributions(added))
+            self._styles += Counter(self._expand(self._leaf_styles[item] for item in added))
+            self._types += Counter(item.type_name for item in added)
+
+        self.items.difference_update(removed)
+        self.items.update(added)
+        if self._restyle:
+            self._restyle = False
+            self._leaf_styles = dict(self._contributions(self.items))
+            self._styles = Counter(self._expand(self._leaf_styles.values()))
+
+        if removed or not self.items:
+            # A union cannot be shrunk, it is recomputed when needed
+            self._bounds = None
+        elif added and self._bounds is not None:
+            bounds = scene_bounds(added)
+            self._bounds = [min(self._bounds[0], bounds[:, 0].min()), min(self._bounds[1], bounds[:, 1].min()),
+                            max(self._bounds[2], bounds[:, 2].max()), max(self._bounds[3], bounds[:, 3].max())]
+        self.updated.emit(bool(added or removed))
+
+    @staticmethod
+    def _contributions(items):
+        """(item, the style of a shape or the styles of a group's leaves)"""
+        for item in items:
+            try:
+                yield item, item.style
+            except AttributeError:
+                yield item, [leaf.style for leaf in leaf_shapes([item])]
+
+    @staticmethod
+    def _expand(contributions):
+        for styles in contributions:
+            if isinstance(styles, list):
+                yield from styles
+            else:
+                yield styles
+
+    def _clear(self):
+        self.items.clear()
+        self._leaf_styles.clear()
+        self._styles.clear()
+        self._types.clear()
+        self._bounds = None
+
+    # --- Aggregates ---
+    def bounds_known(self) -> bool:
+        """False when bounds() has to measure the selection again"""
+        return self._bounds is not None or not self.items
+
+    def count(self) -> int:
+        return len(self.items)
+
+    def styles(self) -> list:
+        """Distinct styles of the selected leaf shapes"""
+        return list(self._styles)
+
+    def types(self) -> list:
+        """Distinct type names of the selected items"""
+        return list(self._types)
+
+    def bounds(self) -> QRectF:
+        """Combined scene bounding rect of the selection"""
+        if not self.items:
+            return QRectF()
+        if self._bounds is None:
+            bounds = scene_bounds(list(self.items))
+            self._bounds = [bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max()]
+        left, top, right, bottom = (float(value) for value in self._bounds)
+        return QRectF(left, top, right - left, bottom - top)
@@ -1,7 +1,21 @@
-from PySide6.QtWidgets import QGraphicsPathItem, QGraphicsItemGroup
-from PySide6.QtGui import QPen, QColor, QPainterPath
+import math
+from array import array
+
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsPathItem, QGraphicsItemGroup, QStyle, QStyleOptionGraphicsItem
+from PySide6.QtGui import QPainterPath, QPainter, QPixmap, QPen
+from PySide6.QtCore import Qt, QRectF, QTimer
+
+from src.logic.styles import STYLES, Style
+from src.logic.render_cache import RENDER_CACHE
+from src.logic.simplify import pack_points
 
 class Shape:
+    # The Group holding this shape, None at the top level. Kept on the Python
+    # side: in PySide6, child.parentItem() and child.topLevelItem() make the
+    # returned group a Python child of `child`, and the group is then deleted
+    # along with its wrapper at the next garbage collection.
+    parent_group = None
+
     @property
     def type_name(self) -> str:
         raise NotImplementedError
@@ -18,64 +32,512 @@ class Shape:
     def set_stroke_width(self, width: int):
         pass
 
+    def _transform_props(self) -> dict:
+        """Rotation and scale, written only when they are not the identity"""
+        props = {}
+        rotation = self.rotation()
+        if rotation:
+            props["rotation"] = rotation
+        scale = self.scale()
+        if scale != 1.0:
+            props["scale"] = scale
+        return props
+
+# Level of detail, in on-screen pixels of the item's largest side
+LOD_CULL_PIXELS = 1.0   # smaller items are not painted at all
+LOD_PROXY_PIXELS = 4.0  # smaller items are painted as a simple proxy
+
+# Outline of selected items that Qt's native paint does not draw
+SELECTION_PEN = QPen(Qt.GlobalColor.black, 0, Qt.PenStyle.DashLine)
+
+# Flags of every new shape, set in one call: loading sets them on every
+# item, and each setFlag() call costs as much as building a rectangle's path.
+# No ItemSendsGeometryChanges: every position change would reach itemChange
+SHAPE_FLAGS = QGraphicsItem.GraphicsItemFlag.ItemIsSelectable | QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+GROUP_FLAGS = (QGraphicsItem.GraphicsItemFlag.ItemIsSelectable | QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+               | QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+SELECTED_CHANGE = QGraphicsItem.GraphicsItemChange.ItemSelectedHasChanged
+SCENE_CHANGE = QGraphicsItem.GraphicsItemChange.ItemSceneChange
+
+def report_selection(item, change, value):
+    """
+    Feeds the SelectionTracker of the item's scene (src.logic.selection)
+    from itemChange. Qt takes selected items out of the selection when they
+    leave the scene, and back in when they return, with a scene change only.
+    """
+    if change == SELECTED_CHANGE:
+        tracker = getattr(item.scene(), "selection_tracker", None)
+        if tracker is not None:
+            tracker.item_selected(item, bool(value))
+    elif change == SCENE_CHANGE and item.isSelected():
+        # `value` is the new scene, the item is still in the old one
+        tracker = getattr(item.scene(), "selection_tracker", None)
+        if tracker is not None:
+            tracker.item_selected(item, False)
+        tracker = getattr(value, "selection_tracker", None)
+        if tracker is not None:
+            tracker.item_selected(item, True)
+
 class VectorShape(QGraphicsPathItem, Shape):
     def __init__(self, color: str = "black", stroke_width: int = 2):
         super().__init__() 
-        self.color = color
-        self.stroke_width = stroke_width
+        self.style = None
 
-        self._setup_pen()
+        self.set_style(STYLES.intern(color, stroke_width))
         self._setup_flags()
 
-    def _setup_pen(self):
-        pen = QPen(QColor(self.color))
-        pen.setWidth(self.stroke_width)
-        self.setPen(pen)
+    @property
+    def color(self) -> str:
+        return self.style.color
+
+    @property
+    def stroke_width(self) -> int:
+        return self.style.width
+
+    def set_style(self, style: Style):
+        """Switches to a shared style, the pen is reused, not rebuilt"""
+        if self.style is not None and self.style.shapes is not None:
+            self.style.shapes.discard(self)
+        if style.shapes is not None:
+            style.shapes.add(self)
+
+        self.style = style
+        self.refresh_style()
+
+    def refresh_style(self):
+        self.setPen(self.style.pen)
+        self._invalidate_group_caches()
+
+    def setPath(self, path):
+        super().setPath(path)
+        self._invalidate_group_caches()
+
+    def setPos(self, *args):
+        super().setPos(*args)
+        self._invalidate_group_caches()
+
+    def _invalidate_group_caches(self):
+        """Drops the pixmap of every cached group this shape is drawn into, and their bounds"""
+        # Walks Shape.parent_group: parentItem() would hand the group to Python
+        group = self.parent_group
+        while group is not None:
+            group.invalidate_bounds()
+            if group.render_cached:
+                group.invalidate_render_cache()
+            group = group.parent_group
 
     def _setup_flags(self):
-        self.setFlag(QGraphicsPathItem.GraphicsItemFlag.ItemIsSelectable)
-        self.setFlag(QGraphicsPathItem.GraphicsItemFlag.ItemIsMovable)
-        self.setFlag(QGraphicsPathItem.GraphicsItemFlag.ItemSendsGeometryChanges)
+        self.setFlags(SHAPE_FLAGS)
+
+    def itemChange(self, change, value):
+        # Called a few times for every item built (flags, scene): kept cheap
+        report_selection(self, change, value)
+        return value
         
+    def paint_with_lod(self, painter, option, widget=None):
+        """
+        Level-of-detail paint, opted into by shapes with expensive paths
+        (paint = VectorShape.paint_with_lod). Rectangles, ellipses and lines
+        keep Qt's native paint: with 50k of them, a Python paint override made
+        every frame 2-5x slower, even at zooms where it culls most of them.
+        """
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        rect = self.boundingRect()
+        size = max(rect.width(), rect.height()) * lod
+
+        if size < LOD_PROXY_PIXELS:
+            if size >= LOD_CULL_PIXELS:
+                # A few pixels wide: a hairline proxy looks the same and is far cheaper
+                antialiased = painter.testRenderHint(QPainter.RenderHint.Antialiasing)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+                painter.setPen(STYLES.pen(self.style.color, 0))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                self.paint_proxy(painter)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing, antialiased)
+            # Culled or not, a selected item stays visible
+            if option.state & QStyle.StateFlag.State_Selected:
+                painter.setPen(SELECTION_PEN)
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.drawRect(rect)
+            return
+
+        QGraphicsPathItem.paint(self, painter, option, widget)
+
+    def paint_proxy(self, painter):
+        painter.drawRect(self.path().boundingRect())
+
     def set_active_color(self, color: str):
-        self.color = color
-        self._setup_pen()
+        self.set_style(STYLES.intern(color, self.style.width))
 
     def set_stroke_width(self, width: int):
-        self.stroke_width = width
-        self._setup_pen()
+        self.set_style(STYLES.intern(self.style.color, width))
+
+    def _style_props(self) -> dict:
+        props = {"color": self.style.color, "stroke_width": self.style.width}
+        if self.style.name:
+            props["style"] = self.style.name
+        return props
+
+# Cached groups re-render when the zoom crosses one of these steps per octave
+RENDER_CACHE_STEPS = 2
+# Larger pixmaps are not cached, the children are painted as vectors instead
+RENDER_CACHE_MAX_SIDE = 4096
 
 class Group(QGraphicsItemGroup, Shape):
     def __init__(self):
         super().__init__()
-        self.setFlag(QGraphicsItemGroup.GraphicsItemFlag.ItemIsSelectable, True)
-        self.setFlag(QGraphicsItemGroup.GraphicsItemFlag.ItemIsMovable, True)
+        self.setFlags(GROUP_FLAGS)
         self.setHandlesChildEvents(True)
 
+        self.render_cached = False
+        self._cache_pixmap = None
+        self._cache_rect = None
+        self._cache_step = None
+
+        # Bounds of the children in group coordinates, kept by this class
+        # (QGraphicsItemGroup only tracks children added through addToGroup)
+        self._bounds = QRectF()
+        self._bounds_dirty = False
+
+        # Lazy groups: serialized children, built on first use
+        self.lazy_children = None
+        self.lazy_uids = None  # pre-order uids of the lazy tree, see src.logic.records
+        self._materialize_queued = False
+
+    def boundingRect(self) -> QRectF:
+        if self._bounds_dirty:
+            self._bounds_dirty = False
+            self._bounds = self.childrenBoundingRect()
+        return self._bounds
+
+    def _set_bounds(self, rect: QRectF):
+        self.prepareGeometryChange()
+        self._bounds = rect
+        self._bounds_dirty = False
+
+    def update_bounds(self):
+        """Recomputes the bounds from the children, once after changing many of them"""
+        self._set_bounds(self.childrenBoundingRect())
+
+    def invalidate_bounds(self):
+        """A child changed its geometry: the bounds are recomputed when next queried"""
+        if not self._bounds_dirty:
+            self.prepareGeometryChange()
+            self._bounds_dirty = True
+
+    # --- Lazy children ---
+    def set_lazy(self, children: list, bounds: QRectF):
+        """
+        Turns the group into a placeholder for `children` (to_dict dictionaries),
+        whose bounds are known. The child items are built by materialize(),
+        called once the group is painted, selected or ungrouped.
+        Until then to_dict() writes the children back as they were.
+        """
+        self.lazy_children = children
+        self._set_bounds(bounds)
+
+    @property
+    def is_lazy(self) -> bool:
+        return self.lazy_children is not None
+
+    def materialize(self):
+        """Builds the child items of a lazy group (nested groups stay lazy)"""
+        children = self.lazy_children
+        if children is None:
+            return
+        # The factory builds shapes of this module
+        from src.logic.factory import ShapeFactory
+
+        self.lazy_children = None
+        uids = iter(self.lazy_uids) if self.lazy_uids is not None else None
+        self.lazy_uids = None
+
+        for data in children:
+            item = ShapeFactory.from_dict(data)
+            # setParentItem keeps the local position and transform,
+            # addToGroup would map them from the scene
+            item.setParentItem(self)
+            item.parent_group = self
+            if self.render_cached:
+                item.setFlag(QGraphicsItem.GraphicsItemFlag.ItemHasNoContents, True)
+                self._set_children_hidden(item, True)
+            if uids is not None:
+                self._adopt_uids(item, data, uids)
+        self.update_bounds()
+        self.invalidate_render_cache()
+        self.update()
+
+    @staticmethod
+    def _adopt_uids(item, data: dict, uids):
+        """Gives a built tree the uids its dictionaries were recorded with"""
+        item.journal_uid = next(uids)
+        if data.get("type") != "group":
+            return
+        if item.is_lazy:
+            item.lazy_uids = [next(uids) for _ in range(Group.count_nodes(data["children"]))]
+            return
+        children = [child for child in item.childItems() if isinstance(child, Shape)]
+        for child, child_data in zip(children, data["children"]):
+            Group._adopt_uids(child, child_data, uids)
+
+    @staticmethod
+    def count_nodes(children: list) -> int:
+        count = 0
+        stack = list(children)
+        while stack:
+            data = stack.pop()
+            count += 1
+            stack.extend(data.get("children", ()))
+        return count
+
+    def materialize_tree(self):
+        """Builds every lazy group of the tree, for exports and recovery"""
+        stack = [self]
+        while stack:
+            group = stack.pop()
+            group.materialize()
+            stack.extend(child for child in group.childItems() if isinstance(child, Group))
+
+    def _materialize_later(self):
+        # Deferred out of paint(): the scene cannot change while it draws
+        self._materialize_queued = False
+        try:
+            self.materialize()
+        except RuntimeError:
+            pass  # Deleted with its scene in the meantime
+
+    def itemChange(self, change, value):
+        # Called for every child added while loading: kept cheap, and the
+        # base implementation only returns the value
+        if change == SELECTED_CHANGE and value:
+            self.materialize()
+        report_selection(self, change, value)
+        return value
+
+    # --- Render cache ---
+    def set_render_cached(self, enabled: bool):
+        """
+        Opt-in pixmap cache: the group paints all of its children from one
+        pixmap, re-rendered only when a child changes or the zoom crosses a step.
+        The children themselves are then skipped by the scene (ItemHasNoContents).
+        """
+        if enabled == self.render_cached:
+            return
+        # The cached pixmap is painted from the whole tree
+        self.materialize_tree()
+        self.render_cached = enabled
+        self._set_children_hidden(self, enabled)
+        self.invalidate_render_cache()
+        self.update()
+
+    @staticmethod
+    def _set_children_hidden(group, hidden: bool):
+        for child in group.childItems():
+            child.setFlag(QGraphicsItem.GraphicsItemFlag.ItemHasNoContents, hidden)
+            # A nested cached group keeps its own children hidden
+            if isinstance(child, Group) and child.render_cached:
+                continue
+            Group._set_children_hidden(child, hidden)
+
+    def invalidate_render_cache(self):
+        if self._cache_pixmap is not None:
+            RENDER_CACHE.discard(self)
+            self.drop_render_cache()
+            self.update()
+
+    def drop_render_cache(self):
+        """Called by RENDER_CACHE on eviction"""
+        self._cache_pixmap = None
+        self._cache_step = None
+
+    def addToGroup(self, item):
+        self.materialize()
+        super().addToGroup(item)
+        item.parent_group = self
+        self._set_bounds(self.boundingRect().united(item.mapRectToParent(item.boundingRect() | item.childrenBoundingRect())))
+        if self.render_cached:
+            item.setFlag(QGraphicsItem.GraphicsItemFlag.ItemHasNoContents, True)
+            self._set_children_hidden(item, True)
+            self.invalidate_render_cache()
+
+    def removeFromGroup(self, item):
+        if self.render_cached:
+            item.setFlag(QGraphicsItem.GraphicsItemFlag.ItemHasNoContents, False)
+            self._set_children_hidden(item, False)
+            self.invalidate_render_cache()
+        super().removeFromGroup(item)
+        item.parent_group = None
+        self.update_bounds()
+
+    def paint(self, painter, option, widget=None):
+        if self.lazy_children is not None:
+            if not self._materialize_queued:
+                self._materialize_queued = True
+                QTimer.singleShot(0, self._materialize_later)
+            # Until the next frame: the outline of what is coming
+            painter.setPen(STYLES.pen("#808080", 0))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRect(self._bounds)
+        elif self.render_cached:
+            if widget is None:
+                # Exports and offscreen renders stay vector
+                self._paint_children(painter)
+            else:
+                self._paint_cached(painter, option)
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            # Not super().paint(): it outlines only what went through addToGroup
+            painter.setPen(SELECTION_PEN)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRect(self.boundingRect())
+
+    def _paint_cached(self, painter, option):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod <= 0:
+            return
+        step = round(math.log2(lod) * RENDER_CACHE_STEPS)
+        scale = 2 ** (step / RENDER_CACHE_STEPS)
+
+        if self._cache_pixmap is None or step != self._cache_step:
+            rect = self.childrenBoundingRect()
+            if max(rect.width(), rect.height()) * scale > RENDER_CACHE_MAX_SIDE:
+                self.invalidate_render_cache()
+                self._paint_children(painter, option.exposedRect)
+                return
+            self._render_cache(rect, scale, step)
+        else:
+            RENDER_CACHE.touch(self)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(self._cache_rect, self._cache_pixmap, QRectF(self._cache_pixmap.rect()))
+        painter.restore()
+
+    def _render_cache(self, rect: QRectF, scale: float, step: int):
+        pixmap = QPixmap(max(1, math.ceil(rect.width() * scale)), max(1, math.ceil(rect.height() * scale)))
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(scale, scale)
+        painter.translate(-rect.topLeft())
+        self._paint_children(painter)
+        painter.end()
+
+        self._cache_pixmap = pixmap
+        self._cache_rect = QRectF(rect.x(), rect.y(), pixmap.width() / scale, pixmap.height() / scale)
+        self._cache_step = step
+        RENDER_CACHE.store(self, pixmap.width() * pixmap.height() * 4)
+
+    def _paint_children(self, painter, exposed: QRectF = None):
+        """Paints every leaf shape in group coordinates, bypassing the scene"""
+        option = QStyleOptionGraphicsItem()
+        stack = list(reversed(self.childItems()))
+        while stack:
+            item = stack.pop()
+            if not item.isVisible():
+                continue
+            if isinstance(item, SymbolInstance):
+                painter.save()
+                painter.setTransform(item.itemTransform(self)[0], True)
+                item.symbol.paint(painter)
+                painter.restore()
+                continue
+            if not isinstance(item, VectorShape):
+                stack.extend(reversed(item.childItems()))
+                continue
+
+            transform = item.itemTransform(self)[0]
+            if exposed is not None and not transform.mapRect(item.boundingRect()).intersects(exposed):
+                continue
+            painter.save()
+            painter.setTransform(transform, True)
+            QGraphicsPathItem.paint(item, painter, option, None)
+            painter.restore()
+
     @property
     def type_name(self) -> str:
         return "group"
 
     def to_dict(self) -> dict:
+        if self.lazy_children is not None:
+            # Never built: the loaded data is still exact
+            children = self.lazy_children
+        else:
+            children = [item.to_dict() for item in self.childItems() if isinstance(item, Shape)]
+        b = self.boundingRect()
         return {
             "type": self.type_name,
-            "pos": [self.pos().x(), self.pos().y()],
-            "children": [item.to_dict() for item in self.childItems() if isinstance(item, Shape)]
+            "pos": [self.x(), self.y()],
+            **self._transform_props(),
+            # Lets the next load skip building the children
+            "bounds": [b.left(), b.top(), b.right(), b.bottom()],
+            "children": children
         }
 
     def set_geometry(self):
         pass  # Group geometry is managed by its children
 
     def set_active_color(self, color: str):
+        self.materialize()
         for item in self.childItems():
             if isinstance(item, Shape):
                 item.set_active_color(color)
 
     def set_stroke_width(self, width):
+        self.materialize()
         for item in self.childItems():
             if isinstance(item, Shape):
                 item.set_stroke_width(width)
 
+class SymbolInstance(QGraphicsItem, Shape):
+    """
+    One placement of a symbol (see src.logic.symbols): a transform and a
+    reference to the shared definition, without child items. Paints the
+    paths the definition has cached.
+    """
+
+    def __init__(self, symbol):
+        super().__init__()
+        self.symbol = symbol
+        self.setFlags(SHAPE_FLAGS)
+
+    def itemChange(self, change, value):
+        report_selection(self, change, value)
+        return value
+
+    def boundingRect(self) -> QRectF:
+        return self.symbol.bounds
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        rect = self.symbol.bounds
+        size = max(rect.width(), rect.height()) * lod
+        if size >= LOD_CULL_PIXELS:
+            if size < LOD_PROXY_PIXELS:
+                painter.setPen(STYLES.pen("#808080", 0))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.drawRect(rect)
+            else:
+                self.symbol.paint(painter)
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.setPen(SELECTION_PEN)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRect(rect)
+
+    @property
+    def type_name(self) -> str:
+        return "symbol"
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type_name,
+            "pos": [self.x(), self.y()],
+            **self._transform_props(),
+            "symbol": self.symbol.name
+        }
+
 class Rectangle(VectorShape):
     def __init__(self, x, y, w, h, color="black", stroke_width=2):
         super().__init__(color, stroke_width)
@@ -103,14 +565,15 @@ class Rectangle(VectorShape):
         return "rect"
 
     def to_dict(self) -> dict:
+        x, y = self.x(), self.y()
         return {
             "type": self.type_name,
-            "pos": [self.pos().x(), self.pos().y()],
+            "pos": [x, y],
+            **self._transform_props(),
             "props": {
-                "x": self.pos().x(), "y": self.pos().y(), 
+                "x": x, "y": y,
                 "w": self.w, "h": self.h,
-                "color": self.pen().color().name(),
-                "stroke_width": self.pen().width()
+                **self._style_props()
             }
         }
 
@@ -140,14 +603,15 @@ class Ellipse(VectorShape):
         return "ellipse"
 
     def to_dict(self) -> dict:
+        x, y = self.x(), self.y()
         return {
             "type": self.type_name,
-            "pos": [self.pos().x(), self.pos().y()],
+            "pos": [x, y],
+            **self._transform_props(),
             "props": {
-                "x": self.pos().x(), "y": self.pos().y(), 
+                "x": x, "y": y,
                 "w": self.w, "h": self.h,
-                "color": self.pen().color().name(),
-                "stroke_width": self.pen().width()
+                **self._style_props()
             }
         }
 
@@ -180,11 +644,53 @@ class Line(VectorShape):
     def to_dict(self) -> dict:
         return {
             "type": self.type_name,
-            "pos": [self.pos().x(), self.pos().y()],
+            "pos": [self.x(), self.y()],
+            **self._transform_props(),
             "props": {
                 "x1": self.x1, "y1": self.y1,
                 "x2": self.x2, "y2": self.y2,
-                "color": self.pen().color().name(),
-                "stroke_width": self.pen().width()
+                **self._style_props()
+            }
+        }
+
+class Polyline(VectorShape):
+    """
+    Freehand stroke. The points live in one flat array('d') (x0, y0, x1, y1, ...),
+    8 bytes per coordinate instead of a Python object per point, and are
+    saved as the same bytes, base64 encoded.
+    """
+
+    def __init__(self, points, color="black", stroke_width=2):
+        super().__init__(color, stroke_width)
+        self.points = array('d', points)
+        self._create_geometry()
+
+    # Long strokes are worth the level-of-detail paint
+    paint = VectorShape.paint_with_lod
+
+    def _create_geometry(self):
+        points = self.points
+        path = QPainterPath()
+        if points:
+            path.moveTo(points[0], points[1])
+        for i in range(2, len(points), 2):
+            path.lineTo(points[i], points[i + 1])
+        self.setPath(path)
+
+    def set_geometry(self, start_point, end_point):
+        pass
+
+    @property
+    def type_name(self) -> str:
+        return "polyline"
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type_name,
+            "pos": [self.x(), self.y()],
+            **self._transform_props(),
+            "props": {
+                "points": pack_points(self.points),
+                **self._style_props()
             }
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,123 @@
+import base64
+import sys
+from array import array
+
+# --- Packing ---
+# Point arrays are saved as little-endian float64 bytes, base64 encoded
+
+def pack_points(points: array) -> str:
+    if sys.byteorder != "little":
+        points = array('d', points)
+        points.byteswap()
+    return base64.b64encode(points.tobytes()).decode("ascii")
+
+def unpack_points(data: str) -> array:
+    points = array('d', base64.b64decode(data))
+    if sys.byteorder != "little":
+        points.byteswap()
+    return points
+
+# --- Simplification ---
+
+def _segment_distance(px, py, ax, ay, bx, by) -> float:
+    """Distance from (px, py) to the segment a-b"""
+    dx = bx - ax
+    dy = by - ay
+    length2 = dx * dx + dy * dy
+    if length2 == 0.0:
+        return ((px - ax) ** 2 + (py - ay) ** 2) ** 0.5
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+    return ((px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2) ** 0.5
+
+def simplify(points: array, tolerance: float) -> array:
+    """
+    Ramer-Douglas-Peucker on a flat x, y array.
+    Iterative (explicit stack), so long strokes cannot hit the recursion limit.
+    """
+    count = len(points) // 2
+    if count < 3:
+        return array('d', points)
+
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[2 * first], points[2 * first + 1]
+        bx, by = points[2 * last], points[2 * last + 1]
+
+        index = -1
+        farthest = tolerance
+        for i in range(first + 1, last):
+            d = _segment_distance(points[2 * i], points[2 * i + 1], ax, ay, bx, by)
+            if d > farthest:
+                index = i
+                farthest = d
+
+        if index != -1:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+
+    result = array('d')
+    for i in range(count):
+        if keep[i]:
+            result.append(points[2 * i])
+            result.append(points[2 * i + 1])
+    return result
+
+class StreamingSimplifier:
+    """
+    Decimates pointer samples while they arrive.
+
+    Samples closer than the tolerance to the previous one are dropped.
+    The others collect in a window after the last kept point (the anchor);
+    as soon as a sample in the window strays more than the tolerance from
+    the chord anchor -> newest sample, the previous sample is kept and
+    becomes the new anchor. finish() runs a full RDP pass over the kept
+    points, which are already few.
+    """
+
+    # Longest window checked per sample, bounds the cost of long straight runs
+    MAX_WINDOW = 64
+
+    def __init__(self, tolerance: float):
+        self.tolerance = tolerance
+        self.points = array('d')  # kept points, flat x, y
+        self._window = array('d')  # samples after the anchor, flat x, y
+
+    def add(self, x: float, y: float):
+        if not self.points:
+            self.points.extend((x, y))
+            return
+
+        if self._window:
+            lx, ly = self._window[-2], self._window[-1]
+        else:
+            lx, ly = self.points[-2], self.points[-1]
+        if (x - lx) ** 2 + (y - ly) ** 2 < self.tolerance ** 2:
+            return
+
+        ax, ay = self.points[-2], self.points[-1]
+        window = self._window
+        for i in range(0, len(window), 2):
+            if _segment_distance(window[i], window[i + 1], ax, ay, x, y) > self.tolerance:
+                self._keep_last()
+                break
+        else:
+            if len(window) >= 2 * self.MAX_WINDOW:
+                self._keep_last()
+        self._window.extend((x, y))
+
+    def _keep_last(self):
+        self.points.extend(self._window[-2:])
+        self._window = array('d')
+
+    def tail(self) -> array:
+        """The newest sample not kept yet (empty if none), for previews"""
+        return self._window[-2:]
+
+    def finish(self) -> array:
+        if self._window:
+            self._keep_last()
+        return simplify(self.points, self.tolerance)
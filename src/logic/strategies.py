@@ -1,20 +1,52 @@
 from abc import ABC, abstractmethod
 from PySide6.QtGui import QImage, QPainter, QColor
 from PySide6.QtCore import QRectF
+from src.logic.compression import Compression
 from src.logic.io_manager import FileManager
+from src.logic.raster import TiledRender
+from src.logic.shapes import Group
+from src.logic.styles import STYLES
+from src.logic.symbols import SYMBOLS, used_symbols
 
 class SaveStrategy(ABC):
-    @abstractmethod
+    """
+    Saving runs in two phases so the slow part can leave the GUI thread:
+    snapshot() copies what is needed out of the scene (GUI thread only),
+    write() encodes that snapshot and writes it (safe in a worker thread).
+    """
+
     def save(self, filename: str, scene):
         """
-        Abstract interface for saving.
+        Saves synchronously.
         :param filename: Path to save
         :param scene: QGraphicsScene source
         """
+        self.write(filename, self.snapshot(scene))
+
+    @abstractmethod
+    def snapshot(self, scene):
+        """
+        Captures the scene state. Must not be mutated afterwards.
+        :param scene: QGraphicsScene source
+        """
         pass
 
-class JsonSaveStrategy(SaveStrategy):
-    def save(self, filename: str, scene):
+    @abstractmethod
+    def write(self, filename: str, snapshot):
+        """
+        Encodes a snapshot to disk without touching the scene.
+        :param filename: Path to save
+        :param snapshot: Value returned by snapshot()
+        """
+        pass
+
+    @staticmethod
+    def collect(scene, shape_dict=None) -> dict:
+        """
+        Builds the project dictionary shared by the document formats
+        :param shape_dict: Optional replacement for item.to_dict()
+        """
+        shape_dict = shape_dict or (lambda item: item.to_dict())
         data = {
             "version": "1.0",
             "scene": {
@@ -24,24 +56,108 @@ class JsonSaveStrategy(SaveStrategy):
             "shapes": []
         }
 
+        named = STYLES.named_styles()
+        if named:
+            # Written before the shapes so streaming readers see them first
+            data["styles"] = [
+                {"name": s.name, "color": s.color, "stroke_width": s.width} for s in named
+            ]
+            data["shapes"] = data.pop("shapes")
+
         items = scene.items()[::-1]
 
         for item in items:
-            # Only save our custom shapes (ignore helper items)
-            if hasattr(item, "to_dict"):
-                data["shapes"].append(item.to_dict())
+            # Only save our custom shapes (ignore helper items).
+            # Group children are written by their group (see Shape.parent_group).
+            if hasattr(item, "to_dict") and item.parent_group is None:
+                data["shapes"].append(shape_dict(item))
+
+        symbols = SYMBOLS.symbols()
+        if symbols:
+            # Each definition once, instances refer to it by name. The library
+            # keeps definitions no instance uses anymore (undo, deletes): not written
+            definitions = {symbol.name: symbol.children for symbol in symbols}
+            used = used_symbols(data["shapes"], definitions)
+            if used:
+                data["symbols"] = [SYMBOLS.get(name).to_dict() for name in used]
+                data["shapes"] = data.pop("shapes")
+
+        return data
+
+class JsonSaveStrategy(SaveStrategy):
+    def __init__(self, precision=None, compression=Compression.NONE, level=None):
+        """
+        :param precision: Decimals kept on coordinates, None for exact values
+        :param compression: Compression.GZIP or LZMA for a compressed file
+        :param level: Compression level, 0 (fastest) to 9 (smallest), None for the default
+        """
+        self.precision = precision
+        self.compression = compression
+        self.level = level
+
+    def snapshot(self, scene):
+        return self.collect(scene)
+
+    def write(self, filename: str, snapshot):
+        FileManager.save_project_json(filename, snapshot, self.precision, self.compression, self.level)
+
+class BinarySaveStrategy(SaveStrategy):
+    def snapshot(self, scene):
+        return self.collect(scene)
+
+    def write(self, filename: str, snapshot):
+        FileManager.save_binary(filename, snapshot)
+
+class SvgSaveStrategy(SaveStrategy):
+    def __init__(self, bg_color="transparent", precision=3):
+        """
+        :param precision: Decimals kept on coordinates
+        """
+        self.bg_color = bg_color
+        self.precision = precision
 
-        FileManager.save_json(filename, data)
+    def snapshot(self, scene):
+        # Lazy groups are written from their data, nothing is built
+        return self.collect(scene)
+
+    def write(self, filename: str, snapshot):
+        background = None if self.bg_color == "transparent" else self.bg_color
+        FileManager.save_svg(filename, snapshot, self.precision, background)
 
 class ImageSaveStrategy(SaveStrategy):
-    def __init__(self, fmt="PNG", bg_color="transparent"):
+    BASE_DPI = 96
+    # Above this many output pixels the export is rendered in tiles
+    TILED_THRESHOLD = 4096 * 4096
+
+    def __init__(self, fmt="PNG", bg_color="transparent", scale=1.0, tile_size=None):
+        """
+        :param scale: Output pixels per scene unit (DPI = 96 * scale)
+        :param tile_size: Force tiled rendering with this tile edge in pixels
+        """
         self.fmt = fmt
         self.bg_color = bg_color
+        self.scale = scale
+        self.tile_size = tile_size
 
-    def save(self, filename: str, scene):
+    @property
+    def dpi(self) -> float:
+        return self.BASE_DPI * self.scale
+
+    def snapshot(self, scene):
+        # Rendering reads the items, so it has to stay on the GUI thread
         rect = scene.sceneRect()
+        # Lazy groups only paint an outline until they are built
+        for item in scene.items():
+            if isinstance(item, Group) and item.is_lazy:
+                item.materialize_tree()
+
+        width = int(rect.width() * self.scale)
+        height = int(rect.height() * self.scale)
+        if self.tile_size or width * height > self.TILED_THRESHOLD:
+            # Only vector commands are recorded here, pixels come later
+            return TiledRender.record(scene, rect, self.scale, self.tile_size or 1024, self.bg_color)
 
-        image = QImage(int(rect.width()), int(rect.height()), QImage.Format.Format_ARGB32)
+        image = QImage(width, height, QImage.Format.Format_ARGB32)
 
         if self.bg_color == "transparent":
             image.fill(QColor(0, 0, 0, 0))
@@ -54,4 +170,22 @@ class ImageSaveStrategy(SaveStrategy):
         scene.render(painter, QRectF(image.rect()), rect)
         painter.end()
 
-        image.save(filename, self.fmt)
\ No newline at end of file
+        return image
+
+    def write(self, filename: str, snapshot):
+        # Image encoding is the expensive part and needs no scene access
+        with FileManager.atomic_path(filename) as tmp_name:
+            if isinstance(snapshot, TiledRender) and self.fmt.upper() == "PNG":
+                with open(tmp_name, 'wb') as f:
+                    snapshot.write_png(f, dpi=self.dpi)
+                return
+
+            if isinstance(snapshot, TiledRender):
+                # No streaming encoder for other formats
+                snapshot = snapshot.assemble()
+
+            dots_per_meter = int(round(self.dpi / 0.0254))
+            snapshot.setDotsPerMeterX(dots_per_meter)
+            snapshot.setDotsPerMeterY(dots_per_meter)
+            if not snapshot.save(tmp_name, self.fmt):
+                raise IOError(f"Failed to write image: {filename}")
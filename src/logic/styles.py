@@ -0,0 +1,94 @@
+import weakref
+
+from PySide6.QtGui import QPen, QColor
+
+class Style:
+    """
+    Stroke style shared by many shapes (flyweight).
+
+    Anonymous styles are interned per (color, width) and never change.
+    Named styles can be retargeted: every shape using one is restyled.
+    """
+
+    __slots__ = ("name", "color", "width", "pen", "shapes")
+
+    def __init__(self, color: str, width: int, pen: QPen, name: str = None):
+        self.name = name
+        self.color = color
+        self.width = width
+        self.pen = pen
+        # Only named styles track their users, anonymous ones never change
+        self.shapes = weakref.WeakSet() if name else None
+
+    def __repr__(self):
+        label = f"{self.name}: " if self.name else ""
+        return f"Style({label}{self.color}, {self.width})"
+
+class StyleRegistry:
+    def __init__(self):
+        self._color_names = {}  # any color spelling -> "#rrggbb"
+        self._pens = {}         # (color, width) -> QPen
+        self._interned = {}     # (color, width) -> anonymous Style
+        self._named = {}        # name -> named Style
+
+    def color_name(self, color: str) -> str:
+        """Normalizes a color string, parsing each spelling only once"""
+        name = self._color_names.get(color)
+        if name is None:
+            name = QColor(color).name()
+            self._color_names[color] = name
+        return name
+
+    def pen(self, color: str, width: int) -> QPen:
+        """Cached pen; QPen is implicitly shared, so setPen() does not copy it"""
+        key = (self.color_name(color), width)
+        pen = self._pens.get(key)
+        if pen is None:
+            pen = QPen(QColor(key[0]))
+            pen.setWidth(width)
+            self._pens[key] = pen
+        return pen
+
+    def intern(self, color: str, width: int) -> Style:
+        color = self.color_name(color)
+        style = self._interned.get((color, width))
+        if style is None:
+            style = Style(color, width, self.pen(color, width))
+            self._interned[(color, width)] = style
+        return style
+
+    # --- Named styles ---
+    def define(self, name: str, color: str, width: int) -> Style:
+        """Creates a named style, or retargets it if it already exists"""
+        if name in self._named:
+            return self.retarget(name, color, width)
+
+        color = self.color_name(color)
+        style = Style(color, width, self.pen(color, width), name)
+        self._named[name] = style
+        return style
+
+    def get(self, name: str) -> Style:
+        return self._named.get(name)
+
+    def named_styles(self) -> list:
+        return list(self._named.values())
+
+    def retarget(self, name: str, color: str = None, width: int = None) -> Style:
+        """Changes a named style and restyles all of its shapes in one pass"""
+        style = self._named[name]
+        if color is not None:
+            style.color = self.color_name(color)
+        if width is not None:
+            style.width = width
+        style.pen = self.pen(style.color, style.width)
+
+        for shape in list(style.shapes):
+            shape.refresh_style()
+        return style
+
+    def clear_named(self):
+        self._named.clear()
+
+# Shared by all scenes and serializers
+STYLES = StyleRegistry()
@@ -0,0 +1,182 @@
+from xml.sax.saxutils import escape, quoteattr
+
+from src.logic.simplify import unpack_points
+
+class SvgFormat:
+    """
+    SVG export of a project dictionary (the one of SaveStrategy.collect).
+    Decoupled from Qt logic, like BinaryFormat.
+
+    Each (color, width) style is written once, as a CSS class. Groups
+    become <g> elements. Consecutive shapes of one group sharing a style
+    are merged into a single <path>: only the translation is baked into
+    their coordinates, rotated or scaled shapes keep their own element and
+    transform, since the pen scales with them.
+
+    Symbols are written once, as <g> elements in <defs>, and every
+    instance is a <use> of it.
+
+    Strokes match the editor's QPen: square caps, bevel joins, no fill;
+    width 0 is a one pixel cosmetic pen.
+    """
+
+    HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+              'width="{w}" height="{h}" viewBox="0 0 {w} {h}">\n')
+
+    # Subpaths per merged <path>, keeps the lines and the pending run short
+    MAX_RUN = 1000
+
+    @staticmethod
+    def encode(data: dict, precision: int = 3, background: str = None):
+        """
+        Yields the file contents as a sequence of strings.
+        Two passes over the shapes: styles, then elements. Linear in the shape count.
+        :param precision: Decimals kept on coordinates
+        :param background: Fill color of the page, None for transparent
+        """
+        def num(value) -> str:
+            text = f"{value:.{precision}f}".rstrip("0").rstrip(".")
+            return "0" if text in ("-0", "") else text
+
+        scene = data.get("scene", {})
+        width, height = num(scene.get("width", 800)), num(scene.get("height", 600))
+        yield SvgFormat.HEADER.format(w=width, h=height)
+
+        symbols = data.get("symbols", [])
+        # Names are free text, ids are generated
+        ids = {symbol["name"]: f"sym{i}" for i, symbol in enumerate(symbols)}
+        classes = SvgFormat._classes(data.get("shapes", []) + [child for symbol in symbols
+                                                               for child in symbol.get("children", [])])
+        yield "<style>\n"
+        yield "path{fill:none;stroke-linecap:square;stroke-linejoin:bevel}\n"
+        for (color, stroke_width), name in classes.items():
+            if stroke_width:
+                yield f".{name}{{stroke:{escape(color)};stroke-width:{stroke_width}}}\n"
+            else:
+                yield f".{name}{{stroke:{escape(color)};stroke-width:1;vector-effect:non-scaling-stroke}}\n"
+        yield "</style>\n"
+
+        if symbols:
+            yield "<defs>\n"
+            for symbol in symbols:
+                yield f'<g id="{ids[symbol["name"]]}">\n'
+                yield from SvgFormat._elements(symbol.get("children", []), classes, ids, num)
+                yield "</g>\n"
+            yield "</defs>\n"
+
+        if background:
+            yield f'<rect width="{width}" height="{height}" fill={quoteattr(background)}/>\n'
+
+        yield from SvgFormat._elements(data.get("shapes", []), classes, ids, num)
+        yield "</svg>\n"
+
+    @staticmethod
+    def _style_key(shape: dict) -> tuple:
+        props = shape.get("props", {})
+        return props.get("color", "black"), props.get("stroke_width", 2)
+
+    @staticmethod
+    def _classes(shapes: list) -> dict:
+        """(color, width) -> class name, in order of first use"""
+        classes = {}
+        stack = list(shapes)
+        while stack:
+            shape = stack.pop()
+            if shape.get("type") == "group":
+                stack.extend(shape.get("children", ()))
+                continue
+            if shape.get("type") == "symbol":
+                continue
+            key = SvgFormat._style_key(shape)
+            if key not in classes:
+                classes[key] = f"s{len(classes)}"
+        return classes
+
+    @staticmethod
+    def _elements(shapes: list, classes: dict, ids: dict, num):
+        # Explicit stack instead of recursion: nested groups can be deep
+        stack = [iter(shapes)]
+        run_class, run = None, []
+        while stack:
+            shape = next(stack[-1], None)
+
+            if (shape is None or shape.get("type") in ("group", "symbol") or SvgFormat._has_transform(shape)
+                    or len(run) >= SvgFormat.MAX_RUN):
+                # A run never spans group boundaries, and is written before any
+                # element with its own transform to keep the stacking order
+                if run:
+                    yield f'<path class="{run_class}" d="{"".join(run)}"/>\n'
+                    run_class, run = None, []
+            if shape is None:
+                stack.pop()
+                if stack:
+                    yield "</g>\n"
+                continue
+
+            transform = SvgFormat._transform(shape, num)
+            if shape.get("type") == "group":
+                yield f'<g transform="{transform}">\n' if transform else "<g>\n"
+                stack.append(iter(shape.get("children", ())))
+                continue
+            if shape.get("type") == "symbol":
+                transform = f' transform="{transform}"' if transform else ""
+                yield f'<use xlink:href="#{ids[shape["symbol"]]}"{transform}/>\n'
+                continue
+
+            name = classes[SvgFormat._style_key(shape)]
+            if SvgFormat._has_transform(shape):
+                d = SvgFormat._path_data(shape, 0.0, 0.0, num)
+                yield f'<path class="{name}" transform="{transform}" d="{d}"/>\n'
+                continue
+
+            if name != run_class and run:
+                yield f'<path class="{run_class}" d="{"".join(run)}"/>\n'
+                run = []
+            run_class = name
+            x, y = shape.get("pos", (0.0, 0.0))
+            run.append(SvgFormat._path_data(shape, x, y, num))
+
+    @staticmethod
+    def _has_transform(shape: dict) -> bool:
+        """Rotated or scaled: the shape cannot be merged into a run"""
+        return bool(shape.get("rotation")) or shape.get("scale", 1.0) != 1.0
+
+    @staticmethod
+    def _transform(shape: dict, num) -> str:
+        """Same order as QGraphicsItem: scale and rotate about the origin, then translate"""
+        x, y = shape.get("pos", (0.0, 0.0))
+        parts = []
+        if x or y:
+            parts.append(f"translate({num(x)} {num(y)})")
+        if shape.get("rotation"):
+            parts.append(f"rotate({num(shape['rotation'])})")
+        if shape.get("scale", 1.0) != 1.0:
+            parts.append(f"scale({num(shape['scale'])})")
+        return " ".join(parts)
+
+    @staticmethod
+    def _path_data(shape: dict, x: float, y: float, num) -> str:
+        """Path data of a leaf shape, its local geometry offset by (x, y)"""
+        shape_type = shape.get("type")
+        props = shape.get("props", {})
+        if shape_type == "rect":
+            w, h = props["w"], props["h"]
+            return f"M{num(x)} {num(y)}h{num(w)}v{num(h)}h{num(-w)}Z"
+        if shape_type == "ellipse":
+            rx, ry = props["w"] / 2, props["h"] / 2
+            left, right, cy = num(x), num(x + 2 * rx), num(y + ry)
+            radii = f"{num(rx)} {num(ry)}"
+            return f"M{right} {cy}A{radii} 0 1 0 {left} {cy}A{radii} 0 1 0 {right} {cy}Z"
+        if shape_type == "line":
+            return (f"M{num(x + props['x1'])} {num(y + props['y1'])}"
+                    f"L{num(x + props['x2'])} {num(y + props['y2'])}")
+        if shape_type == "polyline":
+            points = unpack_points(props["points"])
+            if not points:
+                return ""
+            coords = [f"{num(x + points[i])} {num(y + points[i + 1])}" for i in range(0, len(points), 2)]
+            if len(coords) == 1:
+                return f"M{coords[0]}"
+            return f"M{coords[0]}L{' '.join(coords[1:])}"
+        raise ValueError(f"Unknown type: {shape_type}")
@@ -0,0 +1,163 @@
+import json
+
+from PySide6.QtGui import QPainterPath
+from PySide6.QtCore import Qt, QRectF
+
+class SymbolDefinition:
+    """
+    A shape tree placed many times by SymbolInstance items (see shapes.py).
+
+    The tree is kept as to_dict dictionaries, in symbol coordinates. It is
+    built once, on first paint, only to extract the paths of its leaf shapes:
+    consecutive leaves sharing a style and placed by a plain translation are
+    merged into one path. Every instance paints these same paths.
+    """
+
+    def __init__(self, name: str, children: list):
+        self.name = name
+        self.children = children
+        self._runs = None    # [(Style, QPainterPath, QTransform or None)]
+        self._bounds = None
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "children": self.children}
+
+    @property
+    def runs(self) -> list:
+        if self._runs is None:
+            self._build()
+        return self._runs
+
+    @property
+    def bounds(self) -> QRectF:
+        """Bounds of the tree in symbol coordinates, pens included"""
+        if self._bounds is None:
+            self._build()
+        return self._bounds
+
+    def _build(self):
+        # The factory builds the shapes of this tree, and instances of this module
+        from src.logic.factory import ShapeFactory
+        from src.logic.shapes import VectorShape, SymbolInstance, Group
+
+        runs = []
+        bounds = QRectF()
+        for data in self.children:
+            root = ShapeFactory.from_dict(data)
+            if isinstance(root, Group):
+                root.materialize_tree()
+            stack = [root]
+            while stack:
+                item = stack.pop()
+                if isinstance(item, SymbolInstance):
+                    # A nested symbol keeps its own paths
+                    transform = item.sceneTransform()
+                    bounds = bounds.united(transform.mapRect(item.boundingRect()))
+                    runs.extend((style, path, transform if nested is None else nested * transform)
+                                for style, path, nested in item.symbol.runs)
+                    continue
+                if not isinstance(item, VectorShape):
+                    stack.extend(reversed(item.childItems()))
+                    continue
+
+                # Out of any scene: relative to the root of the tree
+                transform = item.sceneTransform()
+                bounds = bounds.united(transform.mapRect(item.boundingRect()))
+                if transform.isRotating() or transform.isScaling():
+                    # The pen scales with the shape, it keeps its own transform
+                    runs.append((item.style, item.path(), transform))
+                    continue
+                path = item.path().translated(transform.dx(), transform.dy())
+                if runs and runs[-1][0] is item.style and runs[-1][2] is None:
+                    runs[-1][1].addPath(path)
+                else:
+                    runs.append((item.style, QPainterPath(path), None))
+
+        self._runs = runs
+        self._bounds = bounds
+
+    def invalidate(self):
+        """The tree changed: paths and bounds are rebuilt on next use"""
+        self._runs = None
+        self._bounds = None
+
+    def paint(self, painter):
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        for style, path, transform in self.runs:
+            # Named styles can be retargeted: the pen is read at paint time
+            painter.setPen(style.pen)
+            if transform is None:
+                painter.drawPath(path)
+            else:
+                painter.save()
+                painter.setTransform(transform, True)
+                painter.drawPath(path)
+                painter.restore()
+
+class SymbolLibrary:
+    """
+    Symbol definitions of the document, by name. Serialized once, before
+    the shapes, like named styles: instances only refer to them by name.
+    """
+
+    def __init__(self):
+        self._symbols = {}  # name -> SymbolDefinition
+        self._by_tree = {}  # canonical JSON of a tree -> SymbolDefinition
+
+    def define(self, name: str, children: list) -> SymbolDefinition:
+        """Creates a symbol, or replaces the tree of an existing one"""
+        symbol = self._symbols.get(name)
+        if symbol is None:
+            symbol = self._symbols[name] = SymbolDefinition(name, children)
+        elif symbol.children != children:
+            self._by_tree.pop(self._key(symbol.children), None)
+            symbol.children = children
+            symbol.invalidate()
+        self._by_tree.setdefault(self._key(children), symbol)
+        return symbol
+
+    def get(self, name: str) -> SymbolDefinition:
+        return self._symbols.get(name)
+
+    def symbols(self) -> list:
+        return list(self._symbols.values())
+
+    def find(self, children: list) -> SymbolDefinition:
+        """The symbol with exactly this tree, None if there is none"""
+        return self._by_tree.get(self._key(children))
+
+    def unique_name(self, base: str = "symbol") -> str:
+        index = len(self._symbols) + 1
+        while f"{base}{index}" in self._symbols:
+            index += 1
+        return f"{base}{index}"
+
+    def clear(self):
+        self._symbols.clear()
+        self._by_tree.clear()
+
+    @staticmethod
+    def _key(children: list) -> str:
+        return json.dumps(children, sort_keys=True, separators=(",", ":"))
+
+def used_symbols(shapes: list, definitions: dict) -> list:
+    """
+    Names of the definitions (name -> children) that `shapes`, to_dict
+    dictionaries, place: directly or nested in another used definition.
+    In the order of `definitions`.
+    """
+    used = set()
+    stack = list(shapes)
+    while stack:
+        shape = stack.pop()
+        if shape.get("type") == "symbol":
+            name = shape["symbol"]
+            if name not in used and name in definitions:
+                used.add(name)
+                stack.extend(definitions[name])
+        else:
+            stack.extend(shape.get("children", ()))
+    return [name for name in definitions if name in used]
+
+# Shared by all scenes and serializers
+SYMBOLS = SymbolLibrary()
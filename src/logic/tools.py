@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
 from PySide6.QtWidgets import QGraphicsView
-from PySide6.QtCore import Qt, QPointF
+from PySide6.QtCore import Qt, QPointF, QRectF, QLineF, QTimer
+from PySide6.QtGui import QPainterPath
 
 from src.logic.factory import ShapeFactory
-from src.logic.commands import AddShapeCommand, MoveCommand
+from src.logic.commands import AddShapeCommand, BulkMoveCommand
+from src.logic.styles import STYLES
+from src.logic.simplify import StreamingSimplifier
+from src.logic.instrumentation import PROFILER
 
 class Tool(ABC):
     def __init__(self, view: QGraphicsView, undo_stack):
@@ -20,11 +24,31 @@ class Tool(ABC):
     @abstractmethod
     def mouse_release(self, event): pass
 
+    def draw_overlay(self, painter, rect):
+        """Paints tool feedback above the scene (scene coordinates)"""
+        pass
+
 class SelectionTool(Tool):
+    # Hover feedback is refreshed at most once per frame (~60 Hz)
+    HOVER_INTERVAL_MS = 16
+
     def __init__(self, view: QGraphicsView, undo_stack):
         super().__init__(view, undo_stack)
         self.item_positions = {}
 
+        # Hover hit-test cache: last item under the pointer and its scene bounds
+        self._hover_item = None
+        self._hover_bounds = QRectF()
+        self._hover_pos = None
+
+        self._hover_timer = QTimer()
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(self.HOVER_INTERVAL_MS)
+        self._hover_timer.timeout.connect(self._update_hover)
+
+        # Anything changing in the scene may move items under the pointer
+        self.scene.changed.connect(self.invalidate_hover)
+
     def mouse_press(self, event):
         # Delegate to standard Qt logic (selection/moving)
         QGraphicsView.mousePressEvent(self.view, event)
@@ -41,74 +65,214 @@ class SelectionTool(Tool):
     def mouse_move(self, event):
         QGraphicsView.mouseMoveEvent(self.view, event)
 
-        # Hover feedback logic
+        # Hover feedback logic, coalesced to one hit test per frame
         if not (event.buttons() & Qt.MouseButton.LeftButton):
-            item = self.view.itemAt(event.pos())
+            PROFILER.count("hover.events")
+            self._hover_pos = event.pos()
+            if not self._hover_timer.isActive():
+                self._hover_timer.start()
+
+    def invalidate_hover(self, *args):
+        self._hover_item = None
+
+    def _update_hover(self):
+        if self._hover_pos is None:
+            return
+
+        with PROFILER.span("SelectionTool.hover", "tool"):
+            self._hit_test_hover()
+
+    def _hit_test_hover(self):
+        scene_pos = self.view.mapToScene(self._hover_pos)
+        item = self._hover_item
+        if item is not None and item.scene() is self.scene and self._hover_bounds.contains(scene_pos):
+            # Still inside the bounds of the last hit: reuse it
+            PROFILER.count("hover.cache_hits")
+        else:
+            PROFILER.count("hover.hit_tests")
+            item = self.view.itemAt(self._hover_pos)
             if item:
-                self.view.setCursor(Qt.CursorShape.OpenHandCursor)
+                self._hover_item = item
+                self._hover_bounds = item.sceneBoundingRect()
             else:
-                self.view.setCursor(Qt.CursorShape.ArrowCursor)
+                PROFILER.count("hover.misses")
+                self._hover_item = None
+
+        if item:
+            self.view.setCursor(Qt.CursorShape.OpenHandCursor)
+        else:
+            self.view.setCursor(Qt.CursorShape.ArrowCursor)
 
     def mouse_release(self, event):
         QGraphicsView.mouseReleaseEvent(self.view, event)
         self.view.setCursor(Qt.CursorShape.ArrowCursor)
+        self.invalidate_hover()
 
         moved_items = []
+        old_positions = []
+        new_positions = []
         for item, old_pos in self.item_positions.items():
             new_pos = item.pos()
             if old_pos != new_pos:
-                moved_items.append((item, old_pos, new_pos))
+                moved_items.append(item)
+                old_positions.append(old_pos)
+                new_positions.append(new_pos)
 
         if moved_items:
-            self.undo_stack.beginMacro("Move Items")
-            for item, old_pos, new_pos in moved_items:
-                command = MoveCommand(item, old_pos, new_pos)
-                self.undo_stack.push(command)
-            self.undo_stack.endMacro()
+            # One command for the whole selection
+            command = BulkMoveCommand(moved_items, old_positions, new_positions)
+            self.undo_stack.push(command)
 
         self.item_positions.clear()
 
 class CreationTool(Tool):
+    """
+    Draws a rubber-band preview in the view foreground while dragging.
+
+    The preview is not a scene item: it never enters the BSP index and
+    moving the mouse only repaints the area it covers. The shape itself
+    is built once, on release, from the preview geometry.
+
+    The "polyline" mode records a freehand stroke: pointer samples are
+    decimated while they arrive, the preview path only grows by the
+    points that are kept.
+    """
+
+    # Extra margin around the preview for pen width and antialiasing
+    OVERLAY_MARGIN = 4
+
+    # Freehand points may stray this far (on-screen pixels) from the stroke
+    SIMPLIFY_PIXELS = 0.75
+
     def __init__(self, view, shape_type: str, undo_stack, color: str = "black"):
         super().__init__(view, undo_stack)
         self.shape_type = shape_type
         self.color = color
         self.start_pos = None
-        self.temp_shape = None
+        self.current_pos = None
+
+        # Updated in place on every mouse move
+        self._rect = QRectF()
+        self._line = QLineF()
+
+        # Freehand mode
+        self._simplifier = None
+        self._stroke = QPainterPath()
+        self._stroke_count = 0  # kept points already in _stroke
 
     def mouse_press(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.start_pos = self.view.mapToScene(event.pos())
-            try:
-                # Create 0-size shape immediately
-                self.temp_shape = ShapeFactory.create_shape(
-                    self.shape_type, self.start_pos, self.start_pos, self.color
-                )
-                self.scene.addItem(self.temp_shape)
-            except ValueError:
-                pass
+            self.current_pos = self.start_pos
+            if self.shape_type == "polyline":
+                self._start_stroke()
+            self._update_preview()
 
     def mouse_move(self, event):
-        if self.temp_shape and self.start_pos:
-            current_pos = self.view.mapToScene(event.pos())
-            # Update geometry dynamically
-            self.temp_shape.set_geometry(self.start_pos, current_pos)
+        if self.start_pos:
+            if self.shape_type == "polyline":
+                # Only the segment from the last kept point changes
+                old_bounds = self._line_bounds()
+                self.current_pos = self.view.mapToScene(event.pos())
+                self._update_preview()
+                self._repaint(old_bounds.united(self._line_bounds()))
+                return
+
+            old_bounds = self._preview_bounds()
+            self.current_pos = self.view.mapToScene(event.pos())
+            self._update_preview()
+            self._repaint(old_bounds.united(self._preview_bounds()))
 
     def mouse_release(self, event):
         if event.button() == Qt.MouseButton.LeftButton and self.start_pos:
-            if self.temp_shape:
-                self.scene.removeItem(self.temp_shape)
-                self.temp_shape = None
+            self.current_pos = self.view.mapToScene(event.pos())
+            self._update_preview()
+            bounds = self._preview_bounds()
 
-            end_pos = self.view.mapToScene(event.pos())
             try:
-                final_shape = ShapeFactory.create_shape(
-                    self.shape_type, self.start_pos, end_pos, self.color
-                )
+                # The only shape built during the whole gesture
+                if self.shape_type == "polyline":
+                    final_shape = ShapeFactory.create_polyline(self._simplifier.finish(), self.color)
+                else:
+                    final_shape = ShapeFactory.create_shape(
+                        self.shape_type, self.start_pos, self.current_pos, self.color
+                    )
                 command = AddShapeCommand(self.scene, final_shape)
                 self.undo_stack.push(command)
                 print(f"Action {command.text()}")
             except ValueError:
                 pass
 
-            self.start_pos = None
\ No newline at end of file
+            self.start_pos = None
+            self.current_pos = None
+            self._simplifier = None
+            self._stroke = QPainterPath()
+            self._repaint(bounds)
+
+    def draw_overlay(self, painter, rect):
+        if not self.start_pos:
+            return
+
+        painter.setPen(STYLES.pen(self.color, 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        if self.shape_type == "line":
+            painter.drawLine(self._line)
+        elif self.shape_type == "rect":
+            painter.drawRect(self._rect)
+        elif self.shape_type == "ellipse":
+            painter.drawEllipse(self._rect)
+        elif self.shape_type == "polyline":
+            painter.drawPath(self._stroke)
+            painter.drawLine(self._line)
+
+    def _start_stroke(self):
+        tolerance = self.SIMPLIFY_PIXELS / self.view.transform().m11()
+        self._simplifier = StreamingSimplifier(tolerance)
+        self._stroke = QPainterPath()
+        self._stroke_count = 0
+        self._rect.setCoords(self.start_pos.x(), self.start_pos.y(), self.start_pos.x(), self.start_pos.y())
+
+    def _update_preview(self):
+        start, end = self.start_pos, self.current_pos
+        if self.shape_type == "polyline":
+            self._update_stroke()
+            return
+        self._line.setPoints(start, end)
+        self._rect.setCoords(min(start.x(), end.x()), min(start.y(), end.y()),
+                             max(start.x(), end.x()), max(start.y(), end.y()))
+
+    def _update_stroke(self):
+        simplifier = self._simplifier
+        end = self.current_pos
+        simplifier.add(end.x(), end.y())
+
+        # Append the newly kept points, the path is never rebuilt
+        points = simplifier.points
+        for i in range(2 * self._stroke_count, len(points), 2):
+            if i == 0:
+                self._stroke.moveTo(points[0], points[1])
+            else:
+                self._stroke.lineTo(points[i], points[i + 1])
+        self._stroke_count = len(points) // 2
+
+        # Live segment: last kept point -> pointer
+        self._line.setPoints(QPointF(points[-2], points[-1]), end)
+
+        # Whole stroke, repainted on release (united() skips empty rects)
+        left, top, right, bottom = self._rect.getCoords()
+        self._rect.setCoords(min(left, end.x()), min(top, end.y()), max(right, end.x()), max(bottom, end.y()))
+
+    def _line_bounds(self) -> QRectF:
+        m = self.OVERLAY_MARGIN
+        return QRectF(self._line.p1(), self._line.p2()).normalized().adjusted(-m, -m, m, m)
+
+    def _preview_bounds(self) -> QRectF:
+        if self.start_pos is None:
+            return QRectF()
+        m = self.OVERLAY_MARGIN
+        return self._rect.adjusted(-m, -m, m, m)
+
+    def _repaint(self, scene_rect: QRectF):
+        # Only the viewport area under the old and new preview is repainted
+        view_rect = self.view.mapFromScene(scene_rect).boundingRect()
+        self.view.viewport().update(view_rect)
@@ -0,0 +1,133 @@
+import numpy as np
+from PySide6.QtWidgets import QGraphicsItem
+
+class TransformState:
+    """
+    Position, scale and rotation of many items, as NumPy columns.
+    Gathered once from the items, edited in vectorized passes, written back once.
+    """
+
+    def __init__(self, xy: np.ndarray, scale: np.ndarray, rotation: np.ndarray):
+        self.xy = xy              # float64 (n, 2)
+        self.scale = scale        # float64 (n,), None when only positions are handled
+        self.rotation = rotation  # float64 (n,), degrees, None with scale
+
+    @staticmethod
+    def capture(items, positions_only: bool = False) -> "TransformState":
+        # One list per column, converted once: filling arrays row by row is slower
+        n = len(items)
+        xy = np.array([(item.x(), item.y()) for item in items], dtype=float).reshape(n, 2)
+        if positions_only:
+            return TransformState(xy, None, None)
+        scale = np.fromiter((item.scale() for item in items), float, n)
+        rotation = np.fromiter((item.rotation() for item in items), float, n)
+        return TransformState(xy, scale, rotation)
+
+    @property
+    def positions_only(self) -> bool:
+        return self.scale is None
+
+    def copy(self) -> "TransformState":
+        if self.positions_only:
+            return TransformState(self.xy.copy(), None, None)
+        return TransformState(self.xy.copy(), self.scale.copy(), self.rotation.copy())
+
+    def apply(self, items):
+        """
+        Writes the state back to top-level items. QGraphicsItem.setPos is
+        called directly: the Python setPos of shapes only matters inside
+        cached groups, and costs 4x more per item.
+        """
+        set_pos = QGraphicsItem.setPos
+        # Plain floats: Qt converts them much faster than NumPy scalars
+        for item, (x, y) in zip(items, self.xy.tolist()):
+            set_pos(item, x, y)
+        if self.positions_only:
+            return
+        for item, scale, rotation in zip(items, self.scale.tolist(), self.rotation.tolist()):
+            item.setScale(scale)
+            item.setRotation(rotation)
+
+    @property
+    def nbytes(self) -> int:
+        if self.positions_only:
+            return self.xy.nbytes
+        return self.xy.nbytes + self.scale.nbytes + self.rotation.nbytes
+
+def scene_bounds(items) -> np.ndarray:
+    """float64 (n, 4): left, top, right, bottom of every item in scene coordinates"""
+    coords = [item.sceneBoundingRect().getCoords() for item in items]
+    return np.array(coords, dtype=float).reshape(len(items), 4)
+
+# --- Operations ---
+# Each one returns a new TransformState and leaves its input untouched.
+
+ALIGN_EDGES = ("left", "hcenter", "right", "top", "vcenter", "bottom")
+
+def align(state: TransformState, bounds: np.ndarray, edge: str) -> TransformState:
+    """Aligns every item on an edge (or the center) of the selection bounds"""
+    if edge not in ALIGN_EDGES:
+        raise ValueError(f"Unknown edge: {edge}")
+
+    axis = 0 if edge in ("left", "hcenter", "right") else 1
+    low = bounds[:, axis]
+    high = bounds[:, axis + 2]
+
+    if edge in ("left", "top"):
+        delta = low.min() - low
+    elif edge in ("right", "bottom"):
+        delta = high.max() - high
+    else:
+        center = (low + high) / 2
+        delta = (low.min() + high.max()) / 2 - center
+
+    result = state.copy()
+    result.xy[:, axis] += delta
+    return result
+
+def distribute(state: TransformState, bounds: np.ndarray, axis: int) -> TransformState:
+    """
+    Spaces the item centers evenly along an axis (0 = x, 1 = y),
+    keeping the first and the last item where they are.
+    """
+    result = state.copy()
+    n = len(bounds)
+    if n < 3:
+        return result
+
+    center = (bounds[:, axis] + bounds[:, axis + 2]) / 2
+    order = np.argsort(center, kind="stable")
+    targets = np.linspace(center[order[0]], center[order[-1]], n)
+
+    delta = np.empty(n)
+    delta[order] = targets - center[order]
+    result.xy[:, axis] += delta
+    return result
+
+def scale_about(state: TransformState, pivot, factor: float) -> TransformState:
+    """Scales the items, and their distances to the pivot, by `factor`"""
+    if factor <= 0:
+        raise ValueError("Scale factor must be positive")
+
+    pivot = np.asarray(pivot, dtype=float)
+    result = state.copy()
+    result.xy = pivot + (state.xy - pivot) * factor
+    result.scale = state.scale * factor
+    return result
+
+def rotate_about(state: TransformState, pivot, degrees: float) -> TransformState:
+    """Rotates the items, and their positions around the pivot, clockwise on screen"""
+    pivot = np.asarray(pivot, dtype=float)
+    theta = np.radians(degrees)
+    cos, sin = np.cos(theta), np.sin(theta)
+
+    # Qt's y axis points down, so a positive angle turns clockwise
+    offset = state.xy - pivot
+    result = state.copy()
+    result.xy = pivot + offset @ np.array([[cos, sin], [-sin, cos]])
+    result.rotation = np.mod(state.rotation + degrees, 360.0)
+    return result
+
+def selection_center(bounds: np.ndarray) -> tuple:
+    return ((bounds[:, 0].min() + bounds[:, 2].max()) / 2,
+            (bounds[:, 1].min() + bounds[:, 3].max()) / 2)
@@ -1,12 +1,25 @@
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene
-from PySide6.QtCore import Qt, QPointF
-from PySide6.QtGui import QPainter, QUndoStack
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPainter
 
 from src.logic.shapes import Group
 from src.logic.tools import SelectionTool, CreationTool
-from src.logic.commands import DeleteCommand
+from src.logic.commands import (BulkDeleteCommand, BulkTransformCommand, GroupCommand, UngroupCommand,
+                                 MakeSymbolCommand)
+from src.logic.document import DocumentModel
+from src.logic.records import RECORDS
+from src.logic.strategies import SaveStrategy
+from src.logic import transforms
+from src.logic.history import UndoStack
+from src.logic.instrumentation import PROFILER
 
 class EditorCanvas(QGraphicsView):
+    ZOOM_STEP = 1.15
+    MIN_ZOOM = 0.01
+    MAX_ZOOM = 100.0
+    # Below this zoom antialiasing costs more than it shows
+    ANTIALIAS_MIN_ZOOM = 0.5
+
     def __init__(self):
         super().__init__()
         self.scene = QGraphicsScene(self)
@@ -14,14 +27,35 @@ class EditorCanvas(QGraphicsView):
         self.scene.setSceneRect(0, 0, 800, 600)
         self.setRenderHint(QPainter.Antialiasing) # Enable Antialiasing for smooth lines
 
-        self.undo_stack = QUndoStack(self)
-        self.undo_stack.setUndoLimit(50)
+        # Navigation: zoom around the cursor, scrolling repaints only
+        # the newly exposed strip, the background is cached
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+        # Items set their own pen and brush, saving painter state per item is wasted
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState)
+        self.zoom = 1.0
+
+        self._pan_start = None
+        self._space_held = False
+        self._items_rect_dirty = True
+        self.scene.changed.connect(self._mark_items_rect_dirty)
+
+        # History is bounded by memory rather than by a command count
+        self.undo_stack = UndoStack(self)
+        self.undo_stack.set_memory_budget(UndoStack.DEFAULT_BUDGET)
+
+        # Headless copy of the document, follows every edit
+        self.document = DocumentModel()
+        self.undo_stack.commandApplied.connect(self._sync_command)
 
         self.tools = {
             "selection": SelectionTool(self, self.undo_stack),
             "line": CreationTool(self, "line", self.undo_stack),
             "rect": CreationTool(self, "rect", self.undo_stack),
             "ellipse": CreationTool(self, "ellipse", self.undo_stack),
+            "polyline": CreationTool(self, "polyline", self.undo_stack),
         }
 
         self.active_tool = self.tools["line"] 
@@ -37,44 +71,189 @@ class EditorCanvas(QGraphicsView):
         else:
             self.setCursor(Qt.CursorShape.CrossCursor)
 
+    # --- Document model ---
+    def _sync_command(self, command, undone: bool):
+        records = RECORDS.command_records(command, undone)
+        if records is None:
+            self.sync_document()
+        else:
+            with PROFILER.span("document.apply", "document"):
+                self.document.apply(records)
+
+    def sync_document(self):
+        """Rebuilds the document model from the scene, for edits without records"""
+        with PROFILER.span("document.rebuild", "document"):
+            self.document.reset(SaveStrategy.collect(self.scene, RECORDS.shape_dict))
+
     def group_selection(self):
-        selected_items = self.scene.selectedItems()
+        selected_items = self.top_level_selection()
         if len(selected_items) < 1:
             return  # Need at least two items to group
 
-        group = Group()
-        self.scene.addItem(group)
-
-        for item in selected_items:
-            item.setSelected(False)
-            group.addToGroup(item)
-
-        group.setSelected(True)
+        # Children keep their stacking order inside the group
+        stacking = {item: i for i, item in enumerate(self.scene.items(Qt.SortOrder.AscendingOrder))}
+        selected_items.sort(key=stacking.get)
+        self.undo_stack.push(GroupCommand(self.scene, selected_items))
         print("Group created")
 
     def ungroup_selection(self):
-        selected_items = self.scene.selectedItems()
-        for item in selected_items:
-            if isinstance(item, Group):
-                self.scene.destroyItemGroup(item)
-                print("Group destroyed")
+        groups = [item for item in self.top_level_selection() if isinstance(item, Group)]
+        if not groups:
+            return
+        for group in groups:
+            group.materialize()
+        self.undo_stack.push(UngroupCommand(self.scene, groups))
+        print(f"{len(groups)} group(s) destroyed")
+
+    def make_symbol_selection(self):
+        """Turns the selected groups into instances of shared symbols"""
+        groups = [item for item in self.top_level_selection() if isinstance(item, Group)]
+        if not groups:
+            return
+        command = MakeSymbolCommand(self.scene, groups)
+        self.undo_stack.push(command)
+        print(f"{len(groups)} group(s) replaced by instances of {len(command.symbols)} new symbol(s)")
+
+    # --- Arrange ---
+    def top_level_selection(self) -> list:
+        return [item for item in self.scene.selectedItems() if getattr(item, "parent_group", None) is None]
+
+    def _transform_selection(self, operation, text: str, min_items: int = 1, positions_only: bool = False):
+        """Runs a vectorized operation on the selection as one undoable command"""
+        items = self.top_level_selection()
+        if len(items) < min_items:
+            return
+
+        old_state = transforms.TransformState.capture(items, positions_only)
+        bounds = transforms.scene_bounds(items)
+        new_state = operation(old_state, bounds)
+        self.undo_stack.push(BulkTransformCommand(items, old_state, new_state, f"{text} ({len(items)} Items)"))
+
+    def align_selection(self, edge: str):
+        self._transform_selection(lambda state, bounds: transforms.align(state, bounds, edge),
+                                  f"Align {edge.capitalize()}", min_items=2, positions_only=True)
+
+    def distribute_selection(self, axis: int):
+        self._transform_selection(lambda state, bounds: transforms.distribute(state, bounds, axis),
+                                  "Distribute " + ("Horizontally" if axis == 0 else "Vertically"),
+                                  min_items=3, positions_only=True)
+
+    def scale_selection(self, factor: float):
+        self._transform_selection(
+            lambda state, bounds: transforms.scale_about(state, transforms.selection_center(bounds), factor),
+            f"Scale {factor * 100:g}%")
+
+    def rotate_selection(self, degrees: float):
+        self._transform_selection(
+            lambda state, bounds: transforms.rotate_about(state, transforms.selection_center(bounds), degrees),
+            f"Rotate {degrees:g}°")
+
+    def toggle_group_cache(self):
+        """Turns the pixmap cache of the selected groups on or off"""
+        groups = [item for item in self.scene.selectedItems() if isinstance(item, Group)]
+        enable = not all(group.render_cached for group in groups)
+        for group in groups:
+            group.set_render_cached(enable)
+        print(f"Render cache {'enabled' if enable else 'disabled'} for {len(groups)} group(s)")
+
+    # --- Zoom / Pan ---
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom_by(self.ZOOM_STEP ** steps)
+
+    def zoom_by(self, factor: float):
+        new_zoom = min(self.MAX_ZOOM, max(self.MIN_ZOOM, self.zoom * factor))
+        factor = new_zoom / self.zoom
+        if factor == 1.0:
+            return
+
+        self.zoom = new_zoom
+        self._update_navigation_rect()
+        self.scale(factor, factor)
+        self.setRenderHint(QPainter.Antialiasing, self.zoom >= self.ANTIALIAS_MIN_ZOOM)
+
+    def reset_zoom(self):
+        self.zoom_by(1.0 / self.zoom)
+
+    def _mark_items_rect_dirty(self, *args):
+        self._items_rect_dirty = True
+
+    def _update_navigation_rect(self):
+        # Panning may go past the document page, up to the drawn items
+        if self._items_rect_dirty:
+            self._items_rect = self.scene.itemsBoundingRect()
+            self._items_rect_dirty = False
+        self.setSceneRect(self.scene.sceneRect().united(self._items_rect))
+
+    def _is_pan_event(self, event) -> bool:
+        return (event.button() == Qt.MouseButton.MiddleButton
+                or (self._space_held and event.button() == Qt.MouseButton.LeftButton))
+
+    def _pan(self, pos):
+        delta = pos - self._pan_start
+        self._pan_start = pos
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
+        self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Space and not event.isAutoRepeat():
+            self._space_held = True
+            self.viewport().setCursor(Qt.CursorShape.OpenHandCursor)
+        super().keyPressEvent(event)
+
+    def keyReleaseEvent(self, event):
+        if event.key() == Qt.Key.Key_Space and not event.isAutoRepeat():
+            self._space_held = False
+            self.viewport().unsetCursor()
+        super().keyReleaseEvent(event)
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        self.active_tool.draw_overlay(painter, rect)
+
+    def paintEvent(self, event):
+        if not PROFILER.enabled:
+            return super().paintEvent(event)
+
+        # Items the scene index returns for the exposed area
+        exposed = self.mapToScene(event.rect()).boundingRect()
+        PROFILER.sample("paint.items", len(self.scene.items(exposed)))
+        with PROFILER.span("paint", "canvas"):
+            super().paintEvent(event)
 
     def mousePressEvent(self, event):
-        self.active_tool.mouse_press(event)
+        if self._is_pan_event(event):
+            self._pan_start = event.position().toPoint()
+            self.viewport().setCursor(Qt.CursorShape.ClosedHandCursor)
+            return
+        self._tool_event("mouse_press", event)
 
     def mouseMoveEvent(self, event):
-        self.active_tool.mouse_move(event)
+        if self._pan_start is not None:
+            self._pan(event.position().toPoint())
+            return
+        self._tool_event("mouse_move", event)
 
     def mouseReleaseEvent(self, event):
-        self.active_tool.mouse_release(event)
+        if self._pan_start is not None:
+            self._pan_start = None
+            self.viewport().unsetCursor()
+            return
+        self._tool_event("mouse_release", event)
+
+    def _tool_event(self, name: str, event):
+        handler = getattr(self.active_tool, name)
+        if not PROFILER.enabled:
+            return handler(event)
+        # The span name is only built while profiling
+        with PROFILER.span(f"{type(self.active_tool).__name__}.{name}", "tool"):
+            handler(event)
 
     def delete_selection(self):
         selected = self.scene.selectedItems()
         if not selected:
             return
 
-        self.undo_stack.beginMacro("Delete Selection")
-        for item in selected:
-            command = DeleteCommand(self.scene, item)
-            self.undo_stack.push(command)
-        self.undo_stack.endMacro()
\ No newline at end of file
+        command = BulkDeleteCommand(self.scene, selected)
+        self.undo_stack.push(command)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from PySide6.QtWidgets import QLabel
+from PySide6.QtCore import QTimer
+
+from src.logic.instrumentation import PROFILER
+
+class PerformanceOverlay(QLabel):
+    """
+    Status-bar readout of the profiler: paint time and item count,
+    then the spans that took the most time overall.
+    """
+
+    REFRESH_MS = 500
+    TOP_SPANS = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("font-family: monospace; color: #404040;")
+        self.hide()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def set_active(self, active: bool):
+        PROFILER.set_enabled(active)
+        self.setVisible(active)
+        if active:
+            self.setText("Profiling...")
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def refresh(self):
+        stats = PROFILER.span_stats()
+        parts = []
+
+        paint = stats.pop("paint", None)
+        if paint:
+            count, avg, peak, last = paint
+            items = PROFILER.samples.get("paint.items", 0)
+            parts.append(f"paint {last:.1f} ms (avg {avg:.1f}, max {peak:.1f}, {items} items)")
+
+        slowest = sorted(stats.items(), key=lambda entry: entry[1][0] * entry[1][1], reverse=True)
+        for name, (count, avg, peak, last) in slowest[:self.TOP_SPANS]:
+            parts.append(f"{name} {avg:.1f} ms x{count}")
+
+        self.setText(" | ".join(parts) if parts else "Profiling...")
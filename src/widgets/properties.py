@@ -2,18 +2,30 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel,
                                QSpinBox, QDoubleSpinBox, QPushButton, 
                                QColorDialog, QHBoxLayout)
 from PySide6.QtCore import Qt, QPointF
+import time
 
-from src.logic.commands import ChangeWidthCommand, ChangeColorCommand, ChangePosCommand
+from src.logic.commands import (BulkChangeWidthCommand, BulkChangeColorCommand,
+                                 BulkMoveCommand, EditGesture)
+from src.logic.selection import SelectionTracker
+from src.logic.instrumentation import PROFILER
 
 class PropertiesPanel(QWidget):
+    # Spinbox ticks closer than this belong to the same edit gesture
+    GESTURE_TIMEOUT = 0.5
+
     def __init__(self, scene, undo_stack):
         super().__init__()
         self.scene = scene
         self.undo_stack = undo_stack
+        self._gesture = None
+        self._gesture_time = 0.0
         self._init_ui()
         
-        # PATTERN OBSERVER: Listen to selection changes
-        self.scene.selectionChanged.connect(self.on_selection_changed)
+        # PATTERN OBSERVER: Listen to selection changes, at most once per frame
+        self.selection = SelectionTracker(scene, self)
+        self.selection.updated.connect(self.on_selection_changed)
+        # Edits (and their undo) change what the selection shows
+        self.undo_stack.commandApplied.connect(self.selection.command_applied)
 
     def _init_ui(self):
         self.setFixedWidth(200)
@@ -34,8 +46,11 @@ class PropertiesPanel(QWidget):
         # 1. Stroke Width
         layout.addWidget(QLabel("Stroke Width:"))
         self.spin_width = QSpinBox()
-        self.spin_width.setRange(1, 50)
+        # 0 stands for a selection with several widths
+        self.spin_width.setRange(0, 50)
+        self.spin_width.setSpecialValueText("Mixed")
         self.spin_width.valueChanged.connect(self.on_width_changed)
+        self.spin_width.editingFinished.connect(self.finish_editing)
         layout.addWidget(self.spin_width)
         
         # 2. Color
@@ -51,72 +66,128 @@ class PropertiesPanel(QWidget):
         self.spin_x.setRange(-10000, 10000)
         self.spin_x.setPrefix("X: ")
         self.spin_x.valueChanged.connect(self.on_geo_changed)
+        self.spin_x.editingFinished.connect(self.finish_editing)
         
         self.spin_y = QDoubleSpinBox()
         self.spin_y.setRange(-10000, 10000)
         self.spin_y.setPrefix("Y: ")
         self.spin_y.valueChanged.connect(self.on_geo_changed)
+        self.spin_y.editingFinished.connect(self.finish_editing)
         
         geo_layout.addWidget(self.spin_x)
         geo_layout.addWidget(self.spin_y)
         layout.addLayout(geo_layout)
+
+        self.lbl_bounds = QLabel()
+        self.lbl_bounds.setStyleSheet("color: gray;")
+        layout.addWidget(self.lbl_bounds)
         
         layout.addStretch()
         self.setEnabled(False)
 
     # --- MODEL -> VIEW (Read Data) ---
-    def on_selection_changed(self):
-        selected_items = self.scene.selectedItems()
+    def on_selection_changed(self, items_changed: bool):
+        with PROFILER.span("PropertiesPanel.on_selection_changed", "panel"):
+            self._show_selection(items_changed)
+
+    def _show_selection(self, items_changed: bool = True):
+        # A refresh after one of our own edits keeps the gesture going
+        if items_changed:
+            self.end_gesture()
+        count = self.selection.count()
         
-        if not selected_items:
+        if not count:
             self.setEnabled(False)
             self.lbl_type.setText("None")
+            self.lbl_bounds.setText("")
             return
 
         self.setEnabled(True)
-        item = selected_items[0]
-        
-        # Introspection
-        type_text = "Unknown"
-        if hasattr(item, "type_name"):
-            type_text = item.type_name.capitalize()
-        if len(selected_items) > 1:
-            type_text += f" (+{len(selected_items)-1})"
+        
+        # Introspection: aggregates of the whole selection
+        types = self.selection.types()
+        type_text = types[0].capitalize() if len(types) == 1 else "Mixed"
+        if count > 1:
+            type_text += f" (+{count-1})"
         self.lbl_type.setText(type_text)
 
         # Update UI components without triggering signals back to model
         self.block_signals_ui(True)
         
-        # Geometry
-        self.spin_x.setValue(item.x())
-        self.spin_y.setValue(item.y())
-        
-        # Style (Check if it has pen)
-        if hasattr(item, "pen"):
-            self.spin_width.setValue(item.pen().width())
-            color = item.pen().color().name()
-            self.btn_color.setStyleSheet(f"background-color: {color}; border: 1px solid gray;")
+        # Geometry: measuring a large selection again (a new pen width makes
+        # Qt stroke every path) waits until our own edit is finished
+        if items_changed or not self.in_gesture() or self.selection.bounds_known():
+            self._show_geometry()
+        
+        # Style: shown when every shape shares it. Symbol instances have no
+        # style of their own, there is nothing to edit without other shapes
+        styles = self.selection.styles()
+        self.spin_width.setEnabled(bool(styles))
+        self.btn_color.setEnabled(bool(styles))
+        widths = {style.width for style in styles}
+        colors = {style.color for style in styles}
+        self.spin_width.setValue(widths.pop() if len(widths) == 1 else 0)
+        if len(colors) == 1:
+            self.btn_color.setText("")
+            self.btn_color.setStyleSheet(f"background-color: {colors.pop()}; border: 1px solid gray;")
+        else:
+            self.btn_color.setText("Mixed" if colors else "")
+            self.btn_color.setStyleSheet("border: 1px solid gray;")
         
         self.block_signals_ui(False)
 
+    def _show_geometry(self):
+        # The position of a single item, the combined bounds of several
+        bounds = self.selection.bounds()
+        if self.selection.count() == 1:
+            item = next(iter(self.selection.items))
+            self.spin_x.setValue(item.x())
+            self.spin_y.setValue(item.y())
+        else:
+            self.spin_x.setValue(bounds.left())
+            self.spin_y.setValue(bounds.top())
+        self.lbl_bounds.setText(f"{bounds.width():g} × {bounds.height():g}")
+
+    def selected_items(self) -> list:
+        self.selection.flush()
+        return list(self.selection.items)
+
     def block_signals_ui(self, block: bool):
         self.spin_width.blockSignals(block)
         self.spin_x.blockSignals(block)
         self.spin_y.blockSignals(block)
 
+    # --- Edit gestures (undo merging) ---
+    def current_gesture(self) -> EditGesture:
+        now = time.monotonic()
+        if self._gesture is None or now - self._gesture_time > self.GESTURE_TIMEOUT:
+            self._gesture = EditGesture()
+        self._gesture_time = now
+        return self._gesture
+
+    def in_gesture(self) -> bool:
+        return self._gesture is not None and time.monotonic() - self._gesture_time <= self.GESTURE_TIMEOUT
+
+    def end_gesture(self):
+        self._gesture = None
+
+    def finish_editing(self):
+        self.end_gesture()
+        self.selection.flush()
+        if self.selection.count() and not self.selection.bounds_known():
+            self.block_signals_ui(True)
+            self._show_geometry()
+            self.block_signals_ui(False)
+
     # --- VIEW -> MODEL (Write Data) ---
     def on_width_changed(self, value):
-        selected_items = self.scene.selectedItems()
-        if not selected_items:
+        selected_items = self.selected_items()
+        if not selected_items or value == 0:
             return
 
-        # Use Macro to group changes
-        self.undo_stack.beginMacro("Change Width")
-        for item in selected_items:
-            # We don't check hasAttr here because command checks it inside
-            cmd = ChangeWidthCommand(item, value)
-            self.undo_stack.push(cmd)
-        self.undo_stack.endMacro()
+        # One command for the selection, ticks of one gesture merge into it
+        cmd = BulkChangeWidthCommand(selected_items, value, self.current_gesture())
+        self.undo_stack.push(cmd)
         
         self.scene.update()
 
@@ -124,17 +195,15 @@ class PropertiesPanel(QWidget):
         color = QColorDialog.getColor()
         if color.isValid():
             hex_color = color.name()
+            self.btn_color.setText("")
             self.btn_color.setStyleSheet(f"background-color: {hex_color}; border: 1px solid gray;")
 
-            selected_items = self.scene.selectedItems()
+            selected_items = self.selected_items()
             if not selected_items:
                 return
 
-            self.undo_stack.beginMacro("Change Color")
-            for item in selected_items:
-                cmd = ChangeColorCommand(item, hex_color)
-                self.undo_stack.push(cmd)
-            self.undo_stack.endMacro()
+            cmd = BulkChangeColorCommand(selected_items, hex_color)
+            self.undo_stack.push(cmd)
 
             self.scene.update()
 
@@ -143,14 +212,20 @@ class PropertiesPanel(QWidget):
         new_y = self.spin_y.value()
         new_pos = QPointF(new_x, new_y)
 
-        selected_items = self.scene.selectedItems()
+        selected_items = self.selected_items()
         if not selected_items:
             return
 
-        self.undo_stack.beginMacro("Change Position")
-        for item in selected_items:
-            cmd = ChangePosCommand(item, new_pos)
-            self.undo_stack.push(cmd)
-        self.undo_stack.endMacro()
+        # The fields show the item, or the corner of the selection bounds:
+        # every item moves by the same offset
+        if len(selected_items) == 1:
+            delta = new_pos - selected_items[0].pos()
+        else:
+            delta = new_pos - self.selection.bounds().topLeft()
+        old_positions = [item.pos() for item in selected_items]
+        new_positions = [pos + delta for pos in old_positions]
+        cmd = BulkMoveCommand(selected_items, old_positions, new_positions, self.current_gesture())
+        cmd.setText(f"Change Position to {new_pos}")
+        self.undo_stack.push(cmd)
 
         self.scene.update()
\ No newline at end of file
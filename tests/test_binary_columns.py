@@ -0,0 +1,84 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from array import array
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+
+from src.logic.document import DocumentModel
+from src.logic.io_manager import FileManager
+from src.logic.loader import load_scene
+from src.logic.simplify import pack_points
+from src.logic.strategies import SaveStrategy
+from src.logic.styles import STYLES
+from src.logic.symbols import SYMBOLS
+
+app = QApplication.instance() or QApplication([])
+
+FIXTURE = [
+    {"type": "rect", "pos": [0, 0],
+     "props": {"x": 0, "y": 0, "w": 20, "h": 10, "color": "#ff0000", "stroke_width": 2, "style": "wall"}},
+    {"type": "polyline", "pos": [1, 2], "rotation": 10.0,
+     "props": {"points": pack_points(array('d', [0, 0, 5, 5, 9, 1])), "color": "#00ff00", "stroke_width": 1}},
+    {"type": "group", "pos": [3, 12], "scale": 1.5, "bounds": [-0.5, -0.5, 4.5, 4.5], "children": [
+        {"type": "line", "pos": [0, 0], "props": {"x1": 0, "y1": 0, "x2": 4, "y2": 4, "color": "#000000", "stroke_width": 1}},
+    ]},
+]
+
+def project() -> dict:
+    """Named styles, symbols, polylines, lazy and built groups, transforms"""
+    return {
+        "version": "1.0",
+        "scene": {"width": 500, "height": 400},
+        "styles": [{"name": "wall", "color": "#ff0000", "stroke_width": 2}],
+        "symbols": [{"name": "fixture", "children": copy.deepcopy(FIXTURE)}],
+        "shapes": [
+            {"type": "group", "pos": [40, 0], "children": copy.deepcopy(FIXTURE)},
+            {"type": "symbol", "pos": [9, 9], "rotation": 5.0, "symbol": "fixture"},
+            *copy.deepcopy(FIXTURE),
+        ],
+    }
+
+class BinaryColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.binary = os.path.join(self.dir, "p.vecb")
+        self.json = os.path.join(self.dir, "p.json")
+        FileManager.save_binary(self.binary, project())
+        FileManager.save_json(self.json, project())
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        SYMBOLS.clear()
+        STYLES.clear_named()
+
+    def test_model_from_columns_matches_the_events(self):
+        expected = DocumentModel()
+        for key, value in FileManager.stream_project(self.binary):
+            expected.add_event(key, value)
+
+        model = DocumentModel.load(self.binary)
+
+        self.assertEqual(model.to_data(), expected.to_data())
+        _, bounds = model.top_level_bounds()
+        self.assertEqual(bounds.tolist(), expected.top_level_bounds()[1].tolist())
+
+    def test_scene_from_columns_matches_json(self):
+        from_json = QGraphicsScene()
+        load_scene(from_json, self.json)
+        expected = SaveStrategy.collect(from_json)
+        SYMBOLS.clear()
+        STYLES.clear_named()
+
+        scene = QGraphicsScene()
+        self.assertEqual(load_scene(scene, self.binary), 5)
+
+        self.assertEqual(SaveStrategy.collect(scene), expected)
+        self.assertEqual(scene.sceneRect().width(), 500)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from array import array
+
+from src.logic.io_manager import FileManager
+from src.logic.json_format import JsonFormat
+from src.logic.simplify import pack_points
+
+POINTS = pack_points(array('d', [0, 0, 5.5, 5, 9, 1.25]))
+
+def shapes() -> list:
+    return [
+        {"type": "rect", "pos": [10.0, 20.0], "uid": 7,
+         "props": {"x": 10.0, "y": 20.0, "w": 30.0, "h": 15.0, "color": "#ff0000", "stroke_width": 2, "style": "wall"}},
+        # Same pen as the named style, without the name
+        {"type": "ellipse", "pos": [0.0, 0.0], "rotation": 30.0, "scale": 1.5,
+         "props": {"x": 0.0, "y": 0.0, "w": 8.0, "h": 6.0, "color": "#ff0000", "stroke_width": 2}},
+        {"type": "polyline", "pos": [1.0, 2.0], "props": {"points": POINTS, "color": "#00ff00", "stroke_width": 1}},
+        {"type": "group", "pos": [3.0, 12.0], "bounds": [-0.5, -0.5, 4.5, 4.5], "children": [
+            {"type": "line", "pos": [0.0, 0.0],
+             "props": {"x1": 0.0, "y1": 0.0, "x2": 4.0, "y2": 4.0, "color": "#000000", "stroke_width": 1}},
+        ]},
+        {"type": "symbol", "pos": [9.0, 9.0], "rotation": 5.0, "symbol": "fixture"},
+    ]
+
+def project() -> dict:
+    """A version 1.0 project, as SaveStrategy.collect builds it"""
+    return {
+        "version": "1.0",
+        "scene": {"width": 500, "height": 400},
+        "styles": [{"name": "wall", "color": "#ff0000", "stroke_width": 2},
+                   {"name": "unused", "color": "#0000ff", "stroke_width": 4}],
+        "symbols": [{"name": "fixture", "children": shapes()[:3]}],
+        "shapes": shapes(),
+    }
+
+class JsonFormatTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "p.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def round_trip(self, data: dict, precision: int = None) -> dict:
+        FileManager.save_project_json(self.path, data, precision)
+        return FileManager.load_project(self.path)
+
+    def encoded(self, data: dict, precision: int = None) -> dict:
+        return json.loads("".join(JsonFormat.encode(data, precision)))
+
+    def test_round_trip_decodes_to_version_1(self):
+        self.assertEqual(self.round_trip(project()), project())
+
+    def test_named_styles_stay_apart_from_the_same_pen(self):
+        palette = self.encoded(project())["palette"]
+        self.assertEqual(palette[:2], [["#ff0000", 2, "wall"], ["#0000ff", 4, "unused"]])
+        self.assertIn(["#ff0000", 2], palette)
+
+        rect, ellipse = self.round_trip(project())["shapes"][:2]
+        self.assertEqual(rect["props"]["style"], "wall")
+        self.assertNotIn("style", ellipse["props"])
+
+    def test_group_bounds_and_symbols(self):
+        data = self.round_trip(project())
+        group, instance = data["shapes"][3:]
+        self.assertEqual(group["bounds"], [-0.5, -0.5, 4.5, 4.5])
+        self.assertEqual(instance["symbol"], "fixture")
+        self.assertEqual(data["symbols"], project()["symbols"])
+
+    def test_polyline_points_are_kept_exactly(self):
+        # Rounding only applies to coordinates, not to the packed points
+        polyline = self.round_trip(project(), precision=0)["shapes"][2]
+        self.assertEqual(polyline["props"]["points"], POINTS)
+
+    def test_precision_rounds_coordinates(self):
+        data = {"shapes": [{"type": "rect", "pos": [1.23456, 2.0], "rotation": 12.3456,
+                            "props": {"x": 1.23456, "y": 2.0, "w": 10.004, "h": 3.5,
+                                      "color": "#000000", "stroke_width": 1}}]}
+        rect = self.encoded(data, precision=2)["shapes"][0]
+        self.assertEqual(rect["p"], [1.23, 2])
+        self.assertEqual(rect["r"], 12.35)
+        self.assertEqual(rect["g"], [10, 3.5])
+        # Whole values are written as integers
+        self.assertIsInstance(rect["p"][1], int)
+
+        exact = self.encoded(data)["shapes"][0]
+        self.assertEqual(exact["p"], [1.23456, 2.0])
+
+    def test_version_1_file_is_read_unchanged(self):
+        FileManager.save_json(self.path, project())
+        self.assertEqual(FileManager.load_project(self.path), project())
+
+if __name__ == "__main__":
+    unittest.main()
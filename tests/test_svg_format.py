@@ -0,0 +1,39 @@
+import unittest
+import xml.etree.ElementTree as ET
+from array import array
+
+from src.logic.simplify import pack_points
+from src.logic.svg_format import SvgFormat
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+def props(**values) -> dict:
+    return {**values, "color": "#000000", "stroke_width": 2}
+
+def paths(data: dict) -> list:
+    root = ET.fromstring("".join(SvgFormat.encode(data)))
+    return [element.attrib for element in root.iter(f"{SVG}path")]
+
+class SvgStackingOrderTest(unittest.TestCase):
+    def test_transformed_shape_keeps_its_place_between_merged_shapes(self):
+        data = {"shapes": [
+            {"type": "rect", "pos": [0, 0], "props": props(x=0, y=0, w=10, h=10)},
+            {"type": "ellipse", "pos": [20, 0], "scale": 2.0, "props": props(x=20, y=0, w=10, h=10)},
+            {"type": "polyline", "pos": [0, 0], "props": props(points=pack_points(array('d', [0, 0, 5, 5])))},
+        ]}
+        elements = paths(data)
+
+        self.assertEqual(len(elements), 3)
+        self.assertTrue(elements[0]["d"].startswith("M0 0h10"))
+        self.assertEqual(elements[1]["transform"], "translate(20 0) scale(2)")
+        self.assertEqual(elements[2]["d"], "M0 0L5 5")
+
+    def test_untransformed_shapes_of_one_style_are_merged(self):
+        data = {"shapes": [
+            {"type": "rect", "pos": [0, 0], "props": props(x=0, y=0, w=10, h=10)},
+            {"type": "line", "pos": [0, 0], "props": props(x1=0, y1=0, x2=5, y2=5)},
+        ]}
+        self.assertEqual(len(paths(data)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+
+from src.logic.commands import GroupCommand, MakeSymbolCommand
+from src.logic.factory import ShapeFactory
+from src.logic.symbols import SYMBOLS
+
+app = QApplication.instance() or QApplication([])
+
+def fixture(x: float, y: float) -> list:
+    """A rect and an ellipse, drawn at (x, y)"""
+    return [
+        ShapeFactory.from_dict({"type": "rect", "pos": [x, y],
+                                "props": {"x": x, "y": y, "w": 20, "h": 10, "color": "#ff0000", "stroke_width": 2}}),
+        ShapeFactory.from_dict({"type": "ellipse", "pos": [x + 5, y + 15],
+                                "props": {"x": x + 5, "y": y + 15, "w": 8, "h": 6, "color": "#0000ff", "stroke_width": 1}}),
+    ]
+
+class MakeSymbolTest(unittest.TestCase):
+    def setUp(self):
+        SYMBOLS.clear()
+        self.scene = QGraphicsScene()
+
+    def tearDown(self):
+        self.scene.clear()
+        SYMBOLS.clear()
+
+    def group(self, items):
+        for item in items:
+            self.scene.addItem(item)
+        command = GroupCommand(self.scene, items)
+        command.redo()
+        return command.group
+
+    def test_same_fixture_placed_twice_shares_one_definition(self):
+        groups = [self.group(fixture(10, 10)), self.group(fixture(310, 40))]
+        placed = [group.sceneBoundingRect() for group in groups]
+
+        command = MakeSymbolCommand(self.scene, groups)
+        command.redo()
+
+        self.assertEqual(len(command.symbols), 1)
+        self.assertEqual(len(SYMBOLS.symbols()), 1)
+        # Every instance covers the area of the group it replaced
+        for instance, rect in zip(command.instances, placed):
+            self.assertEqual(instance.sceneBoundingRect(), rect)
+
+    def test_different_fixtures_get_their_own_definition(self):
+        other = fixture(10, 200)
+        other[1].set_stroke_width(3)
+        command = MakeSymbolCommand(self.scene, [self.group(fixture(10, 10)), self.group(other)])
+        self.assertEqual(len(command.symbols), 2)
+
+if __name__ == "__main__":
+    unittest.main()